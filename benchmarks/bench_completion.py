@@ -0,0 +1,102 @@
+"""
+Completion latency benchmark for the code editor
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_completion [keystrokes]
+"""
+
+import random
+import statistics
+import string
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QKeyEvent, QTextCursor
+from PyQt6.QtCore import Qt, QEvent
+
+from ide.editors.code_editor import CodeEditor
+from ide.editors.completion import CompletionEngine, ProjectNames
+
+from .fixtures import generateSource, metric, discardEditor
+
+# Names indexed for the project, as in a large code base
+PROJECT_NAMES = 300000
+# Prefixes typed a character at a time and then erased
+TYPED_WORDS = ["handler", "re", "se", "process_item", "get", "value", "ev", "Con", "data"]
+
+def projectNames(count):
+    """Return made-up project names with skewed counts"""
+    rng = random.Random(17)
+    stems = ["get", "set", "handle", "process", "load", "save", "value", "event", "data", "config",
+             "request", "response", "item", "node", "parse", "render", "update", "read", "write"]
+    counts = {}
+    while len(counts) < count:
+        name = "_".join(rng.choice(stems) for _ in range(rng.randint(1, 3)))
+        name += "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(0, 4)))
+        counts[name] = int(rng.paretovariate(1.2))
+    return counts
+
+def prepareEditor(app, engine, lines):
+    """Show an editor holding a generated module, fully indexed for completion"""
+    editor = CodeEditor()
+    editor.resize(1000, 800)
+    editor.setPlainText(generateSource(lines))
+    editor.show()
+    engine.attach(editor)
+    while engine.scan_timer.isActive():
+        app.processEvents()
+
+    block = editor.document().findBlockByNumber(editor.document().blockCount() // 2)
+    cursor = QTextCursor(block)
+    cursor.insertText("\n")
+    cursor.movePosition(QTextCursor.MoveOperation.Up)
+    editor.setTextCursor(cursor)
+    editor.setFocus()
+    app.processEvents()
+    return editor
+
+def benchCompletion(app, editor, count):
+    """Time each key press from delivery until the popup has been updated"""
+    samples = []
+    shown = 0
+    while len(samples) < count:
+        for word in TYPED_WORDS:
+            keys = [(Qt.Key.Key_unknown, char) for char in word] + [(Qt.Key.Key_Backspace, "\b")] * len(word)
+            for key, text in keys:
+                start = time.perf_counter()
+                QApplication.sendEvent(editor, QKeyEvent(QEvent.Type.KeyPress, key,
+                                                         Qt.KeyboardModifier.NoModifier, text))
+                app.processEvents()
+                samples.append(time.perf_counter() - start)
+                shown += editor.completionVisible()
+    return samples[:count], shown
+
+def measure(app, workdir=None, count=1000):
+    """Return keystroke latency percentiles with the completion popup in use"""
+    engine = CompletionEngine()
+    start = time.perf_counter()
+    engine.setProjectNames(ProjectNames(projectNames(PROJECT_NAMES)))
+    build = time.perf_counter() - start
+    editor = prepareEditor(app, engine, 10000)
+    samples, shown = benchCompletion(app, editor, count)
+    samples.sort()
+    engine.shutdown()
+    discardEditor(app, editor)
+    return {
+        "project_build": metric(build * 1000, "ms"),
+        "popup_shown": metric(shown, "keys", "higher"),
+        "keystroke.median": metric(statistics.median(samples) * 1000, "ms"),
+        "keystroke.p99": metric(samples[int(len(samples) * 0.99)] * 1000, "ms"),
+        "keystroke.max": metric(samples[-1] * 1000, "ms"),
+    }
+
+def main():
+    """Run the completion benchmark and print a report"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    app = QApplication.instance() or QApplication(sys.argv)
+    for name, result in measure(app, count=count).items():
+        print(f"{name + ':':<20}{result['value']:.1f} {result['unit']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Sustained typing latency benchmark for the code editor
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_editor [keystrokes]
+"""
+
+import statistics
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QKeyEvent, QTextCursor
+from PyQt6.QtCore import Qt, QEvent
+
+from ide.editors.code_editor import CodeEditor
+
+from .fixtures import generateSource, metric, discardEditor
+
+# Typed over and over, so both plain text and new lines are exercised
+TYPED_TEXT = "def handler(event, retries=3):\n    return {'event': event, 'retries': retries}\n"
+
+def keyEvents(text):
+    """Return press events for each character of text"""
+    events = []
+    for char in text:
+        if char == "\n":
+            events.append((Qt.Key.Key_Return, "\r"))
+        else:
+            events.append((Qt.Key.Key_unknown, char))
+    return events
+
+def prepareEditor(app, lines):
+    """Show a highlighted editor holding a generated module"""
+    editor = CodeEditor()
+    editor.resize(1000, 800)
+    editor.setPlainText(generateSource(lines))
+    editor.setupHighlighter("bench.py")
+    editor.show()
+    while editor.highlighter and editor.highlighter.chunk_timer.isActive():
+        app.processEvents()
+
+    # Type in the middle of the document, where edits re-highlight the most
+    block = editor.document().findBlockByNumber(editor.document().blockCount() // 2)
+    cursor = QTextCursor(block)
+    editor.setTextCursor(cursor)
+    editor.setFocus()
+    app.processEvents()
+    return editor
+
+def benchTyping(app, editor, count):
+    """Time each key press from delivery until the editor has repainted"""
+    events = keyEvents(TYPED_TEXT)
+    samples = []
+    for i in range(count):
+        key, text = events[i % len(events)]
+        start = time.perf_counter()
+        QApplication.sendEvent(editor, QKeyEvent(QEvent.Type.KeyPress, key, Qt.KeyboardModifier.NoModifier, text))
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def measure(app, workdir=None, count=2000):
+    """Return sustained typing latency percentiles"""
+    editor = prepareEditor(app, 10000)
+    samples = sorted(benchTyping(app, editor, count))
+    discardEditor(app, editor)
+    return {
+        "keystroke.median": metric(statistics.median(samples) * 1000, "ms"),
+        "keystroke.p95": metric(samples[int(len(samples) * 0.95)] * 1000, "ms"),
+        "keystroke.p99": metric(samples[int(len(samples) * 0.99)] * 1000, "ms"),
+        "keystroke.max": metric(samples[-1] * 1000, "ms"),
+    }
+
+def main():
+    """Run the typing benchmark and print a report"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = QApplication.instance() or QApplication(sys.argv)
+    for name, result in measure(app, count=count).items():
+        print(f"{name + ':':<22}{result['value']:.3f} {result['unit']}")
+
+if __name__ == "__main__":
+    main()
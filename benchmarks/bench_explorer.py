@@ -0,0 +1,107 @@
+"""
+Benchmark for expanding a large tree in the file explorer
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_explorer
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from ide.views.file_system_view import FileSystemView
+
+from .fixtures import makeTree, metric
+
+DIRECTORIES = 50
+FILES_PER_DIRECTORY = 1000
+# Files in the single directory of the huge directory case
+HUGE_DIRECTORY = 100000
+# Seconds to wait for the tree to populate before giving up
+TIMEOUT = 120
+
+def waitFor(app, condition, stalls):
+    """Process events until condition() holds, recording each iteration's length"""
+    deadline = time.perf_counter() + TIMEOUT
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("explorer did not finish populating")
+        iteration_start = time.perf_counter()
+        app.processEvents()
+        stalls.append(time.perf_counter() - iteration_start)
+
+def benchExpand(app, root, directories):
+    """Time listing the root and expanding every directory below it"""
+    view = FileSystemView()
+    view.resize(400, 800)
+    view.show()
+    stalls = []
+    waitFor(app, lambda: view.model is not None, stalls)
+
+    start = time.perf_counter()
+    view.setRootPath(root)
+    model = view.model
+    waitFor(app, lambda: model.rowCount(view.rootIndex()) == len(directories), stalls)
+    listed = time.perf_counter() - start
+
+    indexes = [model.indexForPath(path) for path in directories]
+    for index in indexes:
+        view.expand(index)
+    waitFor(app, lambda: all(model.rowCount(index) == FILES_PER_DIRECTORY for index in indexes), stalls)
+    expanded = time.perf_counter() - start
+    view.shutdown()
+    view.close()
+    return listed, expanded, max(stalls, default=0.0)
+
+def benchHugeDirectory(app, root, directory):
+    """Time expanding one directory with HUGE_DIRECTORY entries until its first rows show"""
+    view = FileSystemView()
+    view.resize(400, 800)
+    view.show()
+    stalls = []
+    waitFor(app, lambda: view.model is not None, stalls)
+    view.setRootPath(root)
+    model = view.model
+    waitFor(app, lambda: model.rowCount(view.rootIndex()) == 1, stalls)
+
+    stalls = []
+    start = time.perf_counter()
+    index = model.indexForPath(directory)
+    view.expand(index)
+    waitFor(app, lambda: model.rowCount(index) > 0, stalls)
+    shown = time.perf_counter() - start
+    view.shutdown()
+    view.close()
+    return shown, max(stalls, default=0.0)
+
+def measure(app, workdir):
+    """Return the explorer expansion metrics"""
+    tree_root = os.path.join(workdir, "tree")
+    directories = makeTree(tree_root, DIRECTORIES, FILES_PER_DIRECTORY)
+    listed, expanded, stall = benchExpand(app, tree_root, directories)
+
+    huge_root = os.path.join(workdir, "huge")
+    huge_directory, = makeTree(huge_root, 1, HUGE_DIRECTORY)
+    huge_shown, huge_stall = benchHugeDirectory(app, huge_root, huge_directory)
+    return {
+        "list_root": metric(listed * 1000, "ms"),
+        "expand_all": metric(expanded * 1000, "ms"),
+        "max_stall": metric(stall * 1000, "ms"),
+        "huge_dir.first_rows": metric(huge_shown * 1000, "ms"),
+        "huge_dir.max_stall": metric(huge_stall * 1000, "ms"),
+    }
+
+def main():
+    """Run the explorer benchmark and print a report"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as workdir:
+        results = measure(app, workdir)
+    print(f"entries:             {DIRECTORIES * FILES_PER_DIRECTORY} + {HUGE_DIRECTORY}")
+    for name, result in results.items():
+        print(f"{name + ':':<21}{result['value']:.1f} {result['unit']}")
+
+if __name__ == "__main__":
+    main()
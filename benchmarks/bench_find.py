@@ -0,0 +1,108 @@
+"""
+In-buffer find and replace benchmark on a large document
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_find [lines]
+"""
+
+import statistics
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QTextCursor
+
+from ide.editors.code_editor import CodeEditor
+from ide.editors.completion import CompletionEngine
+from ide.editors.buffer_search import BufferSearch, compileSearch
+
+from .fixtures import generateSource, metric, discardEditor
+
+# Lines in the searched document; every fourth line has a match
+DOCUMENT_LINES = 500000
+# Spaces typed after a match while the search is open
+KEYSTROKES = 100
+
+def waitForScan(app, search):
+    """Run the event loop until every line has been scanned"""
+    while search.scanner is not None or search.unscanned or search.rescan_timer.isActive():
+        app.processEvents()
+        time.sleep(0.001)
+
+def measure(app, workdir=None, lines=DOCUMENT_LINES):
+    """Return scan, keystroke, replace-all and undo times for a search with many matches"""
+    editor = CodeEditor()
+    editor.resize(1000, 800)
+    editor.setPlainText(generateSource(lines))
+    editor.setupHighlighter("bench.py")
+    editor.show()
+    engine = CompletionEngine()
+    engine.attach(editor)
+    while engine.scan_timer.isActive():
+        app.processEvents()
+
+    search = BufferSearch()
+    search.setEditor(editor)
+    start = time.perf_counter()
+    search.setPattern(compileSearch("value", False, True, True))
+    waitForScan(app, search)
+    scan = time.perf_counter() - start
+    matches = search.total
+
+    start = time.perf_counter()
+    search.updateHighlights()
+    highlight = time.perf_counter() - start
+
+    # Type on a line with matches in the middle of the document
+    cursor = QTextCursor(editor.document().findBlockByNumber(editor.document().blockCount() // 2))
+    editor.setTextCursor(cursor)
+    search.findNext()
+    cursor = editor.textCursor()
+    cursor.clearSelection()
+    samples = []
+    for _ in range(KEYSTROKES):
+        # The edit's handlers, without the highlighter's initial pass that runs between keys
+        start = time.perf_counter()
+        cursor.insertText(" ")
+        samples.append(time.perf_counter() - start)
+        app.processEvents()
+
+    start = time.perf_counter()
+    replaced = search.replaceAll("amount")
+    replace_all = time.perf_counter() - start
+    app.processEvents()
+    waitForScan(app, search)
+    remaining = search.total
+
+    start = time.perf_counter()
+    editor.undo()
+    undo = time.perf_counter() - start
+    app.processEvents()
+    waitForScan(app, search)
+    if replaced != matches or remaining or search.total != matches:
+        raise RuntimeError(f"replaced {replaced} of {matches} matches, {remaining} left, {search.total} after undo")
+
+    search.setEditor(None)
+    search.shutdown()
+    engine.detach(id(editor.document()))
+    discardEditor(app, editor)
+    samples.sort()
+    return {
+        "scan": metric(scan * 1000, "ms"),
+        "highlight.viewport": metric(highlight * 1000, "ms"),
+        "keystroke.median": metric(statistics.median(samples) * 1000, "ms"),
+        "keystroke.p95": metric(samples[int(len(samples) * 0.95)] * 1000, "ms"),
+        "replace_all": metric(replace_all * 1000, "ms"),
+        "undo": metric(undo * 1000, "ms"),
+    }
+
+def main():
+    """Run the find benchmark and print a report"""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else DOCUMENT_LINES
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = measure(app, lines=lines)
+    for name, result in results.items():
+        print(f"{name + ':':<22}{result['value']:.1f} {result['unit']}")
+
+if __name__ == "__main__":
+    main()
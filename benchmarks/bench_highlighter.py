@@ -0,0 +1,102 @@
+"""
+Benchmark for the incremental syntax highlighter
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_highlighter [lines]
+"""
+
+import statistics
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QTextCursor
+
+from ide.editors.code_editor import CodeEditor
+from ide.editors.syntax_highlighter import preloadLexers
+
+from .fixtures import generateSource, metric, discardEditor
+
+# Lines in the highlighted document
+DOCUMENT_LINES = 10000
+
+def benchLegacyOpen(app, source):
+    """Time the old whole-document Pygments HTML rendering"""
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_for_filename
+
+    start = time.perf_counter()
+    editor = CodeEditor()
+    editor.setPlainText(source)
+    html = highlight(source, get_lexer_for_filename("bench.py"), HtmlFormatter())
+    editor.appendHtml(html)
+    app.processEvents()
+    return time.perf_counter() - start
+
+def benchOpen(app, source):
+    """Time opening a file with the incremental highlighter"""
+    start = time.perf_counter()
+    editor = CodeEditor()
+    editor.setPlainText(source)
+    editor.setupHighlighter("bench.py")
+    app.processEvents()
+    opened = time.perf_counter() - start
+
+    # The rest of the document is highlighted in chunks from the event loop
+    stalls = []
+    while editor.highlighter.chunk_timer.isActive():
+        chunk_start = time.perf_counter()
+        app.processEvents()
+        stalls.append(time.perf_counter() - chunk_start)
+    return opened, time.perf_counter() - start, max(stalls, default=0.0), editor
+
+def benchKeystrokes(app, editor, count=200):
+    """Time single-character insertions in the middle of the document"""
+    block = editor.document().findBlockByNumber(editor.document().blockCount() // 2)
+    cursor = QTextCursor(block)
+    cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock)
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        cursor.insertText("x")
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def measure(app, workdir=None, lines=DOCUMENT_LINES):
+    """Return the open, full highlight, longest chunk and keystroke times"""
+    # The window preloads Pygments after startup, so don't time that import here
+    preloadLexers()
+    opened, completed, stall, editor = benchOpen(app, generateSource(lines))
+    samples = sorted(benchKeystrokes(app, editor))
+    discardEditor(app, editor)
+    return {
+        "open": metric(opened * 1000, "ms"),
+        "complete": metric(completed * 1000, "ms"),
+        "max_stall": metric(stall * 1000, "ms"),
+        "keystroke.median": metric(statistics.median(samples) * 1000, "ms"),
+        "keystroke.p95": metric(samples[int(len(samples) * 0.95)] * 1000, "ms"),
+    }
+
+def main():
+    """Run the highlighter benchmarks and print a report"""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else DOCUMENT_LINES
+    app = QApplication.instance() or QApplication(sys.argv)
+    source = generateSource(lines)
+
+    legacy = benchLegacyOpen(app, source)
+    opened, completed, stall, editor = benchOpen(app, source)
+    samples = benchKeystrokes(app, editor)
+    samples.sort()
+
+    print(f"lines:                 {source.count(chr(10))}")
+    print(f"open (pygments html):  {legacy * 1000:.1f} ms")
+    print(f"open (incremental):    {opened * 1000:.1f} ms")
+    print(f"full highlight:        {completed * 1000:.1f} ms")
+    print(f"longest chunk:         {stall * 1000:.1f} ms")
+    print(f"keystroke median:      {statistics.median(samples) * 1000:.3f} ms")
+    print(f"keystroke p95:         {samples[int(len(samples) * 0.95)] * 1000:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Single-instance forwarding benchmark: a second launch handing files to a running instance
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_instance [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from ide.editors.tab_widget import TabWidget
+from ide.instance_server import InstanceServer
+
+from .fixtures import metric, drainDeletes
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+# Files sent in one batched request
+BATCH_FILES = 500
+
+def launch(app, arguments, socket_path):
+    """Run a launch that forwards its files; returns its wall time in seconds"""
+    env = dict(os.environ, PYIDE_INSTANCE_SOCKET=socket_path)
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, MAIN, *arguments], env=env)
+    while process.poll() is None:
+        app.processEvents()
+        # Leave the CPU to the launch on single core machines
+        time.sleep(0.0005)
+    if process.returncode != 0:
+        raise RuntimeError(f"launch exited with {process.returncode}")
+    return time.perf_counter() - start
+
+def interpreterStart(app):
+    """Return the wall time of an interpreter that does nothing, for comparison"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+def measure(app, workdir, runs=5):
+    """Return forwarding latencies and the time the instance takes to open a batch"""
+    paths = []
+    for i in range(BATCH_FILES):
+        path = os.path.join(workdir, f"file{i:04d}.py")
+        with open(path, "w") as f:
+            f.write("value = 1\n" * 50)
+        paths.append(path)
+
+    tabs = TabWidget()
+    opened = []
+
+    def openLocations(locations):
+        start = time.perf_counter()
+        tabs.openFiles(locations)
+        opened.append(time.perf_counter() - start)
+
+    server = InstanceServer(os.path.join(workdir, "instance.sock"))
+    server.requestReceived.connect(openLocations)
+    server.listen()
+    try:
+        baseline = min(interpreterStart(app) for _ in range(runs))
+        single = [launch(app, [paths[0] + ":10:2"], server.path) for _ in range(runs)]
+        batch = []
+        for _ in range(runs):
+            for index in reversed(range(tabs.count())):
+                tabs.closeTab(index)
+            batch.append(launch(app, paths, server.path))
+    finally:
+        server.close()
+        tabs.cancelAllLoads()
+        tabs.watcher.shutdown()
+        tabs.finishSaves()
+        tabs.close()
+        tabs.deleteLater()
+        drainDeletes(app)
+    return {
+        "interpreter_start": metric(baseline * 1000, "ms"),
+        "forward.single": metric(statistics.median(single) * 1000, "ms"),
+        "forward.batch": metric(statistics.median(batch) * 1000, "ms"),
+        "batch.open": metric(statistics.median(opened[runs:]) * 1000, "ms"),
+    }
+
+def main():
+    """Run the instance benchmark and print a report"""
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as workdir:
+        results = measure(app, workdir, runs)
+    for name, result in results.items():
+        print(f"{name + ':':<20}{result['value']:.1f} {result['unit']}")
+
+if __name__ == "__main__":
+    main()
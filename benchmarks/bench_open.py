@@ -0,0 +1,78 @@
+"""
+Benchmark for opening files in the editor tabs
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_open
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from ide.editors.tab_widget import TabWidget
+from ide.editors.large_file_view import LargeFileView
+from ide.editors.syntax_highlighter import preloadLexers
+
+from .fixtures import writeSourceFile, metric, drainDeletes
+
+# Fixture name and size in bytes
+SIZES = (("100kb", 100 * 1024), ("10mb", 10 * 1024 * 1024), ("100mb", 100 * 1024 * 1024))
+
+def benchOpenFile(app, file_path):
+    """Time how long openFile blocks, when the file is fully available and the longest stall"""
+    tabs = TabWidget()
+    tabs.resize(1000, 800)
+    tabs.show()
+    app.processEvents()
+    loaded = []
+    tabs.fileLoaded.connect(loaded.append)
+
+    start = time.perf_counter()
+    tabs.openFile(file_path)
+    returned = time.perf_counter() - start
+
+    widget = tabs.currentWidget()
+    stalls = []
+    while True:
+        iteration_start = time.perf_counter()
+        app.processEvents()
+        stalls.append(time.perf_counter() - iteration_start)
+        if isinstance(widget, LargeFileView):
+            if widget.index.complete:
+                break
+        elif loaded:
+            break
+    complete = time.perf_counter() - start
+    tabs.closeTab(tabs.currentIndex())
+    tabs.close()
+    tabs.deleteLater()
+    drainDeletes(app)
+    return returned, complete, max(stalls, default=0.0)
+
+def measure(app, workdir):
+    """Return the open metrics for each fixture size"""
+    # The window preloads Pygments after startup, so don't time that import here
+    preloadLexers()
+    results = {}
+    for name, size in SIZES:
+        file_path = writeSourceFile(os.path.join(workdir, f"open_{name}.py"), size)
+        returned, complete, stall = benchOpenFile(app, file_path)
+        results[f"{name}.call"] = metric(returned * 1000, "ms")
+        results[f"{name}.complete"] = metric(complete * 1000, "ms")
+        results[f"{name}.max_stall"] = metric(stall * 1000, "ms")
+        os.remove(file_path)
+    return results
+
+def main():
+    """Run the open benchmark and print a report"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as workdir:
+        results = measure(app, workdir)
+    for name, result in results.items():
+        print(f"{name + ':':<22}{result['value']:.1f} {result['unit']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Paint time per frame while scrolling and moving the cursor through a large file
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_paint [lines]
+"""
+
+import statistics
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QKeyEvent, QTextCursor
+from PyQt6.QtCore import Qt, QEvent
+
+from ide.editors.code_editor import CodeEditor
+
+from .fixtures import generateSource, metric, discardEditor
+
+# Lines in the document; the highlighter's own cost is measured by bench_highlighter
+DOCUMENT_LINES = 1000000
+# Frames timed for each kind of movement
+FRAMES = 200
+
+def percentiles(samples):
+    """Return the median and 95th percentile of samples, in milliseconds"""
+    samples = sorted(samples)
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+def timeFrames(app, editor, step):
+    """Time each step from the change until the viewport and gutter have repainted"""
+    samples = []
+    for i in range(FRAMES):
+        start = time.perf_counter()
+        step(i)
+        app.processEvents()
+        editor.viewport().repaint()
+        editor.line_number_area.repaint()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def measure(app, workdir=None, lines=DOCUMENT_LINES):
+    """Return paint times per frame for scrolling, cursor movement and the decorations"""
+    editor = CodeEditor()
+    editor.resize(1000, 800)
+    editor.setPlainText(generateSource(lines))
+    editor.show()
+    cursor = QTextCursor(editor.document().findBlockByNumber(editor.document().blockCount() // 2))
+    editor.setTextCursor(cursor)
+    editor.centerCursor()
+    app.processEvents()
+
+    scrollbar = editor.verticalScrollBar()
+    scroll = timeFrames(app, editor, lambda i: scrollbar.setValue(scrollbar.value() + (3 if i % 40 < 20 else -3)))
+    jump = timeFrames(app, editor, lambda i: scrollbar.setValue((i * 7919 * 97) % scrollbar.maximum()))
+
+    editor.setFocus()
+    editor.setTextCursor(cursor)
+    editor.centerCursor()
+    keys = [Qt.Key.Key_Down] * 20 + [Qt.Key.Key_Right] * 20 + [Qt.Key.Key_Up] * 20
+
+    def press(i):
+        QApplication.sendEvent(editor, QKeyEvent(QEvent.Type.KeyPress, keys[i % len(keys)],
+                                                 Qt.KeyboardModifier.NoModifier))
+
+    keys_samples = timeFrames(app, editor, press)
+
+    # The debounced decorations: current line, brackets and occurrences in the viewport
+    decorations = []
+    for i in range(FRAMES):
+        press(i)
+        start = time.perf_counter()
+        editor.highlightCurrentLine()
+        editor.viewport().repaint()
+        decorations.append(time.perf_counter() - start)
+    discardEditor(app, editor)
+
+    results = {}
+    for name, samples in (("scroll", scroll), ("jump", jump), ("cursor", keys_samples), ("decorations", decorations)):
+        median, p95 = percentiles(samples)
+        results[f"{name}.median"] = metric(median, "ms")
+        results[f"{name}.p95"] = metric(p95, "ms")
+    return results
+
+def main():
+    """Run the paint benchmark and print a report"""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else DOCUMENT_LINES
+    app = QApplication.instance() or QApplication(sys.argv)
+    for name, result in measure(app, lines=lines).items():
+        print(f"{name + ':':<22}{result['value']:.2f} {result['unit']}")
+
+if __name__ == "__main__":
+    main()
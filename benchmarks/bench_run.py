@@ -0,0 +1,76 @@
+"""
+Run-to-first-output benchmark, cold interpreter against the warm pool
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_run [runs]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from ide.terminal.run_engine import RunEngine
+
+from .fixtures import metric
+
+# Standard library modules standing in for a script's heavy imports
+IMPORTS = ["asyncio", "email.mime.multipart", "http.client", "decimal", "json",
+           "xml.dom.minidom", "unittest", "logging", "argparse"]
+# Seconds a run may take before the benchmark gives up on it
+RUN_TIMEOUT = 30
+
+def writeScript(workdir):
+    """Write a script that imports the modules and prints a line"""
+    path = os.path.join(workdir, "imports.py")
+    with open(path, "w") as f:
+        f.write(f"import {', '.join(IMPORTS)}\nprint('ready')\n")
+    return path
+
+def runOnce(app, engine, path):
+    """Run the script and return its first-output latency"""
+    session = engine.run(path, os.path.dirname(path))
+    deadline = time.perf_counter() + RUN_TIMEOUT
+    while not session.isFinished() and time.perf_counter() < deadline:
+        app.processEvents()
+    if session.exit_code != 0 or session.firstOutputLatency() is None:
+        raise RuntimeError(f"run failed with exit code {session.exit_code}")
+    return session.firstOutputLatency()
+
+def benchRuns(app, engine, path, runs):
+    """Return the first-output latencies of several runs"""
+    return [runOnce(app, engine, path) for _ in range(runs)]
+
+def measure(app, workdir, runs=5):
+    """Return median first-output latencies of cold and warm runs"""
+    path = writeScript(workdir)
+    engine = RunEngine()
+    try:
+        cold = benchRuns(app, engine, path, runs)
+        engine.configure(None, True, IMPORTS)
+        engine.prewarm()
+        deadline = time.perf_counter() + RUN_TIMEOUT
+        while engine.pool.ready is None and time.perf_counter() < deadline:
+            app.processEvents()
+        warm = benchRuns(app, engine, path, runs)
+    finally:
+        engine.shutdown()
+    return {
+        "cold.first_output": metric(statistics.median(cold) * 1000, "ms"),
+        "warm.first_output": metric(statistics.median(warm) * 1000, "ms"),
+    }
+
+def main():
+    """Run the run benchmark and print a report"""
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as workdir:
+        results = measure(app, workdir, runs)
+    for name, result in results.items():
+        print(f"{name + ':':<20}{result['value']:.1f} {result['unit']}")
+
+if __name__ == "__main__":
+    main()
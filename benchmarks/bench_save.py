@@ -0,0 +1,75 @@
+"""
+Benchmark for saving a file from the main window
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_save
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from .fixtures import writeSourceFile, metric, drainDeletes
+
+FILE_SIZE = 10 * 1024 * 1024
+SAVES = 5
+
+def benchSave(app, window, file_path):
+    """Time how long saveFile blocks and how long until the file is on disk"""
+    loaded = []
+    window.editor_tabs.fileLoaded.connect(loaded.append)
+    window.openFile(file_path)
+    while not loaded:
+        app.processEvents()
+
+    editor = window.editor_tabs.currentWidget()
+    calls = []
+    completions = []
+    for i in range(SAVES):
+        editor.insertPlainText("x")
+        before = os.stat(file_path).st_mtime_ns
+        start = time.perf_counter()
+        window.saveFile()
+        calls.append(time.perf_counter() - start)
+        while os.stat(file_path).st_mtime_ns == before:
+            app.processEvents()
+        completions.append(time.perf_counter() - start)
+    return min(calls), min(completions)
+
+def measure(app, workdir):
+    """Return the save metrics for a 10 MB file"""
+    # Keep the window's settings, session and caches out of the real home directory
+    home = os.environ.get("HOME")
+    os.environ["HOME"] = workdir
+    try:
+        from ide.pyide import PyIDE
+        window = PyIDE()
+        window.show()
+        file_path = writeSourceFile(os.path.join(workdir, "save_10mb.py"), FILE_SIZE)
+        call, complete = benchSave(app, window, file_path)
+        window.close()
+        window.deleteLater()
+        drainDeletes(app)
+    finally:
+        if home is None:
+            del os.environ["HOME"]
+        else:
+            os.environ["HOME"] = home
+    return {
+        "10mb.call": metric(call * 1000, "ms"),
+        "10mb.complete": metric(complete * 1000, "ms"),
+    }
+
+def main():
+    """Run the save benchmark and print a report"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as workdir:
+        results = measure(app, workdir)
+    for name, result in results.items():
+        print(f"{name + ':':<16}{result['value']:.1f} {result['unit']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Throughput benchmark for the terminal output pipeline
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_terminal [lines]
+"""
+
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from ide.terminal.terminal import Terminal
+
+from .fixtures import metric
+
+# Carriage-return updates written by the progress case
+PROGRESS_UPDATES = 100000
+# Lines written by the coloured output case
+COLORED_LINES = 200000
+
+def runCommand(app, terminal, command):
+    """Run a command in the terminal and wait until its output is shown"""
+    # Quoted in the command line so that the shell's echo does not match
+    marker = f"__DONE_{time.monotonic_ns()}__"
+    terminal.execute(f"{command}; echo {marker[:2]}''{marker[2:]}")
+    document = terminal.document()
+    while True:
+        app.processEvents()
+        block = document.lastBlock()
+        # The marker line is followed by the next prompt
+        if marker in block.text() or marker in block.previous().text():
+            return
+
+def benchCommand(app, command):
+    """Time how long a fresh terminal takes to show a command's output"""
+    terminal = Terminal()
+    terminal.show()
+    runCommand(app, terminal, "true")
+
+    start = time.perf_counter()
+    runCommand(app, terminal, command)
+    elapsed = time.perf_counter() - start
+    terminal.close()
+    return elapsed, terminal.document().blockCount()
+
+def benchThroughput(app, lines):
+    """Time how long the terminal takes to show plain lines"""
+    return benchCommand(app, f"yes | head -n {lines}")
+
+def measure(app, workdir=None, lines=1000000):
+    """Return the terminal throughput metrics"""
+    elapsed, kept = benchThroughput(app, lines)
+    # A progress counter rewritten in place after carriage returns
+    progress, progress_lines = benchCommand(app, f"seq 1 {PROGRESS_UPDATES} | tr '\\n' '\\r'; echo")
+    # Lines coloured with SGR sequences, as test runners print them
+    colored, colored_lines = benchCommand(app, f"yes $'\\e[32mPASSED\\e[0m test' | head -n {COLORED_LINES}")
+    return {
+        "throughput": metric(lines / elapsed, "lines/s", better="higher"),
+        "elapsed": metric(elapsed * 1000, "ms"),
+        "progress.elapsed": metric(progress * 1000, "ms"),
+        "colored.elapsed": metric(colored * 1000, "ms"),
+    }
+
+def main():
+    """Run the terminal throughput benchmark and print a report"""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    app = QApplication.instance() or QApplication(sys.argv)
+    elapsed, kept = benchThroughput(app, lines)
+
+    print(f"lines:           {lines}")
+    print(f"elapsed:         {elapsed * 1000:.1f} ms")
+    print(f"throughput:      {lines / elapsed:,.0f} lines/s")
+    print(f"lines kept:      {kept}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Version control gutter benchmark on a large file with changes at both ends
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_vcs [lines]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QTextCursor
+
+from ide.editors.code_editor import CodeEditor
+from ide.project.vcs import VcsEngine
+
+from .fixtures import generateSource, metric, discardEditor
+
+# Lines in the committed file
+DOCUMENT_LINES = 200000
+# Edits timed in the middle of the file
+KEYSTROKES = 100
+
+def git(root, *args):
+    """Run a git command in the fixture repository"""
+    subprocess.run(['git', '-C', root, *args], check=True, capture_output=True)
+
+def waitForChanges(app, engine, file_path):
+    """Run the event loop until the file's edits have been compared"""
+    tracked = engine.files[file_path]
+    while tracked.base is None or tracked.dirty is not None:
+        app.processEvents()
+        time.sleep(0.001)
+
+def measure(app, workdir=None, lines=DOCUMENT_LINES):
+    """Return the first comparison, keystroke and edited-region comparison times, and the status read"""
+    root = os.path.join(workdir or tempfile.mkdtemp(), "repository")
+    os.makedirs(root, exist_ok=True)
+    git(root, 'init', '-q')
+    git(root, 'config', 'user.email', 'bench@example.com')
+    git(root, 'config', 'user.name', 'bench')
+    file_path = os.path.join(root, "bench.py")
+    source = generateSource(lines)
+    with open(file_path, 'w') as f:
+        f.write(source)
+    git(root, 'add', 'bench.py')
+    git(root, 'commit', '-qm', 'bench')
+
+    editor = CodeEditor()
+    editor.resize(1000, 800)
+    # Changed at both ends, so only the edited region keeps comparisons small
+    editor.setPlainText("# header\n" + source + "# footer\n")
+    editor.show()
+    engine = VcsEngine()
+    start = time.perf_counter()
+    engine.watch(file_path, editor)
+    waitForChanges(app, engine, file_path)
+    initial = time.perf_counter() - start
+
+    cursor = QTextCursor(editor.document().findBlockByNumber(editor.document().blockCount() // 2))
+    keystrokes = []
+    regions = []
+    for i in range(KEYSTROKES):
+        start = time.perf_counter()
+        cursor.insertText("\n" if i % 10 == 0 else "x")
+        keystrokes.append(time.perf_counter() - start)
+        # The comparison once edits pause, without the pause itself
+        engine.timer.stop()
+        start = time.perf_counter()
+        engine.diffPending()
+        waitForChanges(app, engine, file_path)
+        regions.append(time.perf_counter() - start)
+
+    statuses = {}
+    engine.statusChanged.connect(statuses.update)
+    start = time.perf_counter()
+    engine.setFolder(root)
+    while engine.head is None:
+        app.processEvents()
+        time.sleep(0.001)
+    status = time.perf_counter() - start
+    if statuses != {file_path: "modified"} and statuses:
+        raise RuntimeError(f"unexpected status {statuses}")
+
+    engine.shutdown()
+    discardEditor(app, editor)
+    keystrokes.sort()
+    regions.sort()
+    return {
+        "initial": metric(initial * 1000, "ms"),
+        "keystroke.median": metric(statistics.median(keystrokes) * 1000, "ms"),
+        "keystroke.p95": metric(keystrokes[int(len(keystrokes) * 0.95)] * 1000, "ms"),
+        "region.median": metric(statistics.median(regions) * 1000, "ms"),
+        "region.p95": metric(regions[int(len(regions) * 0.95)] * 1000, "ms"),
+        "status": metric(status * 1000, "ms"),
+    }
+
+def main():
+    """Run the version control benchmark and print a report"""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else DOCUMENT_LINES
+    app = QApplication.instance() or QApplication(sys.argv)
+    for name, result in measure(app, lines=lines).items():
+        print(f"{name + ':':<22}{result['value']:.2f} {result['unit']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Generated fixtures for the benchmarks
+"""
+
+import os
+
+from PyQt6.QtCore import QEvent
+
+SAMPLE = '''
+class Widget{n}(Base):
+    """Docstring for widget {n}"""
+    def method(self, value={n}):
+        # A comment line
+        result = [x * 2 for x in range(value) if x % 3]
+        return f"{{result}} and 'quoted' {n}"
+
+'''
+
+def generateSource(lines):
+    """Generate a Python module with roughly the given number of lines"""
+    chunk_lines = SAMPLE.count("\n")
+    return "".join(SAMPLE.format(n=i) for i in range(lines // chunk_lines + 1))
+
+def writeSourceFile(path, size):
+    """Write a Python file of about size bytes built from generated source"""
+    chunk = generateSource(2000).encode("utf-8")
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            data = chunk[:size - written]
+            f.write(data)
+            written += len(data)
+    return path
+
+def makeTree(root, directories, files_per_directory):
+    """Create directories each holding empty files; returns the directory paths"""
+    paths = []
+    for d in range(directories):
+        path = os.path.join(root, f"dir{d:04d}")
+        os.makedirs(path, exist_ok=True)
+        for f in range(files_per_directory):
+            open(os.path.join(path, f"file{f:05d}.py"), "wb").close()
+        paths.append(path)
+    return paths
+
+def discardEditor(app, editor):
+    """Stop an editor's background highlighting and delete it, so later benchmarks don't pay for it"""
+    if editor.highlighter is not None:
+        editor.highlighter.chunk_timer.stop()
+        editor.highlighter.setDocument(None)
+    editor.close()
+    editor.deleteLater()
+    drainDeletes(app)
+
+def drainDeletes(app):
+    """Delete objects whose deleteLater is pending; outside exec() processEvents alone never does"""
+    app.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+    app.processEvents()
+
+def metric(value, unit, better="lower"):
+    """Package a measurement for the JSON report"""
+    return {"value": value, "unit": unit, "better": better}
@@ -0,0 +1,152 @@
+"""
+Benchmark suite runner with JSON results and baseline comparison
+
+Run from the repository root:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.run [benchmark ...]
+        [--output results.json] [--baseline benchmarks/baseline.json]
+        [--threshold 0.25] [--update-baseline]
+
+Exits with status 1 when a metric is worse than the baseline by more
+than the threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+
+from . import bench_open, bench_highlighter, bench_editor, bench_terminal, bench_explorer, bench_save, bench_completion, bench_run, bench_instance, bench_find, bench_paint, bench_vcs
+
+# Suite entries, run in this order
+BENCHMARKS = {
+    "open": bench_open,
+    "highlighter": bench_highlighter,
+    "editor": bench_editor,
+    "terminal": bench_terminal,
+    "explorer": bench_explorer,
+    "save": bench_save,
+    "completion": bench_completion,
+    "run": bench_run,
+    "instance": bench_instance,
+    "find": bench_find,
+    "paint": bench_paint,
+    "vcs": bench_vcs,
+}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Relative change beyond which a metric counts as a regression
+DEFAULT_THRESHOLD = 0.25
+# Changes smaller than this many milliseconds are treated as noise
+MIN_DIFFERENCE_MS = 1.0
+
+def environment():
+    """Describe the machine and versions the results were measured with"""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "platform": platform.platform(),
+        "qpa": os.environ.get("QT_QPA_PLATFORM", ""),
+        "cpus": os.cpu_count(),
+    }
+
+def runSuite(app, names):
+    """Run the named benchmarks, each with its own fixture directory"""
+    results = {}
+    for name in names:
+        print(f"running {name}...", file=sys.stderr)
+        with tempfile.TemporaryDirectory(prefix=f"pyide-bench-{name}-") as workdir:
+            for metric_name, result in BENCHMARKS[name].measure(app, workdir).items():
+                results[f"{name}.{metric_name}"] = result
+    return results
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline value, value, relative change, regressed) for shared metrics
+
+    A positive change is always a slowdown, whichever direction is better.
+    """
+    rows = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None or previous["unit"] != result["unit"] or not previous["value"]:
+            continue
+        change = (result["value"] - previous["value"]) / previous["value"]
+        if result["better"] == "higher":
+            change = -change
+        regressed = change > threshold
+        if regressed and result["unit"] == "ms" and abs(result["value"] - previous["value"]) < MIN_DIFFERENCE_MS:
+            regressed = False
+        rows.append((name, previous["value"], result["value"], change, regressed))
+    return rows
+
+def printReport(results, rows):
+    """Print every metric, with its change against the baseline when there is one"""
+    compared = {row[0]: row for row in rows}
+    print(f"{'metric':<32}{'value':>14}  {'unit':<8}{'baseline':>12}{'change':>9}")
+    for name, result in results.items():
+        line = f"{name:<32}{result['value']:>14.2f}  {result['unit']:<8}"
+        if name in compared:
+            _, previous, _, change, regressed = compared[name]
+            line += f"{previous:>12.2f}{change * 100:>+8.1f}%"
+            if regressed:
+                line += "  REGRESSION"
+        print(line)
+
+def loadResults(file_path):
+    """Read the results of a previous run, or {} if there is none"""
+    try:
+        with open(file_path, "r") as f:
+            return json.load(f).get("results", {})
+    except (OSError, ValueError):
+        return {}
+
+def writeResults(file_path, results):
+    """Write results with their environment as JSON"""
+    with open(file_path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=4)
+        f.write("\n")
+
+def main():
+    """Run the suite, write the results and compare them with the baseline"""
+    parser = argparse.ArgumentParser(description="Run the PyIDE benchmark suite")
+    parser.add_argument("benchmarks", nargs="*",
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--output", default="benchmark-results.json", help="where to write the results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression (default: 0.25)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = runSuite(app, args.benchmarks or list(BENCHMARKS))
+    writeResults(args.output, results)
+
+    rows = compare(results, loadResults(args.baseline), args.threshold)
+    printReport(results, rows)
+    if args.update_baseline:
+        # Keep baseline entries for benchmarks that weren't run this time
+        baseline = loadResults(args.baseline)
+        baseline.update(results)
+        writeResults(args.baseline, baseline)
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
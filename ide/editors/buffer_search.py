@@ -0,0 +1,433 @@
+"""
+In-buffer find and replace component for PyIDE
+"""
+
+import re
+import time
+from itertools import chain
+
+from PyQt6.QtWidgets import QTextEdit
+from PyQt6.QtGui import QColor, QTextCursor
+from PyQt6.QtCore import QObject, QThread, QTimer, QEvent, pyqtSignal
+
+from ..instrumentation import tracer
+
+# Characters matched per step of a background scan, between checks for cancellation
+SCAN_CHUNK = 1024 * 1024
+# Seconds between batches of matches sent to the GUI thread
+RESULT_INTERVAL = 0.05
+# Edits touching more blocks than this are rescanned in the background
+SYNC_RESCAN_BLOCKS = 2000
+# Milliseconds edits must pause before a cancelled scan resumes
+RESCAN_DELAY = 200
+# Background of every visible match and of the selected one
+MATCH_COLOR = QColor("#5A5A3C")
+CURRENT_MATCH_COLOR = QColor("#A6882E")
+
+# Matches of a line without any
+NO_MATCHES = ()
+
+def compileSearch(query, is_regex, case_sensitive, whole_word):
+    """Return the regex for a query; raises re.error for an invalid one"""
+    flags = re.MULTILINE
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    pattern = query if is_regex else re.escape(query)
+    if whole_word:
+        pattern = rf'\b(?:{pattern})\b'
+    return re.compile(pattern, flags)
+
+def lineMatches(pattern, text):
+    """Return the (column, length) of each match in one line; empty matches are skipped"""
+    return tuple((match.start(), match.end() - match.start())
+                 for match in pattern.finditer(text) if match.end() > match.start()) or NO_MATCHES
+
+class MatchScanner(QThread):
+    """Thread that finds the matches in a snapshot of a document, from a given line on"""
+    # First line, line after the last, and {line: ((column, length), ...)} for the lines with matches
+    found = pyqtSignal(int, int, object)
+
+    def __init__(self, text, position, line, pattern, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.position = position
+        self.line = line
+        self.pattern = pattern
+
+    def run(self):
+        """Match a chunk of whole lines at a time, sending batches as they are found"""
+        text = self.text
+        length = len(text)
+        position = self.position
+        line = self.line
+        batch_line = line
+        batch = {}
+        sent = time.monotonic()
+        with tracer.span("search.scan", first_line=line):
+            while not self.isInterruptionRequested():
+                end = text.find('\n', min(position + SCAN_CHUNK, length))
+                if end == -1:
+                    end = length
+                current = line
+                line_start = position
+                for match in self.pattern.finditer(text, position, end):
+                    start, stop = match.span()
+                    if start == stop:
+                        continue
+                    newlines = text.count('\n', line_start, start)
+                    if newlines:
+                        current += newlines
+                        line_start = text.rfind('\n', line_start, start) + 1
+                    # Only matches within one line are found, as in an edited line
+                    if text.find('\n', start, stop) != -1:
+                        continue
+                    batch.setdefault(current, []).append((start - line_start, stop - start))
+                line += text.count('\n', position, end) + 1
+                if end >= length or time.monotonic() - sent >= RESULT_INTERVAL:
+                    self.found.emit(batch_line, line, {number: tuple(matches) for number, matches in batch.items()})
+                    batch_line = line
+                    batch = {}
+                    sent = time.monotonic()
+                if end >= length:
+                    break
+                position = end + 1
+
+class BufferSearch(QObject):
+    """Matches of a search in one editor, kept current as it is edited
+
+    Matches are held per line, like DocumentWords: a background scan fills
+    them in, and edits rescan only the lines they touch. Only the matches in
+    the viewport are shown.
+    """
+    # Matches found so far, and whether every line has been scanned
+    countChanged = pyqtSignal(int, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.editor = None
+        self.connections = []
+        self.pattern = None
+        self.is_regex = False
+        # (column, length) matches per block; None for blocks that haven't been scanned yet
+        self.lines = []
+        self.total = 0
+        self.unscanned = 0
+        self.scanner = None
+        # Bumped on every edit, so batches from a scan of older text are dropped
+        self.generation = 0
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(RESCAN_DELAY)
+        self.rescan_timer.timeout.connect(self.startScan)
+        self.highlight_timer = QTimer(self)
+        self.highlight_timer.setSingleShot(True)
+        self.highlight_timer.setInterval(0)
+        self.highlight_timer.timeout.connect(self.updateHighlights)
+
+    def setEditor(self, editor):
+        """Search a different editor, or none"""
+        if editor is self.editor:
+            return
+        self.detach()
+        self.editor = editor
+        if editor is not None:
+            self.connections = [
+                (editor.document().contentsChange, editor.document().contentsChange.connect(self.onContentsChange)),
+                (editor.verticalScrollBar().valueChanged,
+                 editor.verticalScrollBar().valueChanged.connect(self.scheduleHighlights)),
+                (editor.cursorPositionChanged, editor.cursorPositionChanged.connect(self.scheduleHighlights)),
+            ]
+            editor.viewport().installEventFilter(self)
+        self.restart()
+
+    def detach(self):
+        """Stop following the current editor and remove its highlights"""
+        self.cancelScan()
+        editor = self.editor
+        self.editor = None
+        try:
+            for signal, connection in self.connections:
+                signal.disconnect(connection)
+            if editor is not None:
+                editor.viewport().removeEventFilter(self)
+                editor.setSearchSelections([])
+        except (TypeError, RuntimeError):
+            # The editor has already been deleted
+            pass
+        self.connections = []
+
+    def setPattern(self, pattern, is_regex=False):
+        """Search for a compiled pattern, or stop searching with None"""
+        self.pattern = pattern
+        self.is_regex = is_regex
+        self.restart()
+
+    def restart(self):
+        """Forget every match and scan the whole document again"""
+        self.cancelScan()
+        self.rescan_timer.stop()
+        if self.editor is None or self.pattern is None:
+            self.lines = []
+            self.total = self.unscanned = 0
+            if self.editor is not None:
+                self.editor.setSearchSelections([])
+            self.countChanged.emit(0, True)
+            return
+        self.lines = [None] * self.editor.document().blockCount()
+        self.total = 0
+        self.unscanned = len(self.lines)
+        self.updateHighlights()
+        self.startScan()
+
+    def startScan(self):
+        """Scan a snapshot of the document from its first unscanned line in the background"""
+        if self.editor is None or self.pattern is None or not self.unscanned:
+            self.emitCount()
+            return
+        self.cancelScan()
+        line = self.lines.index(None)
+        position = self.editor.document().findBlockByNumber(line).position()
+        generation = self.generation
+        self.scanner = MatchScanner(self.editor.toPlainText(), position, line, self.pattern, self)
+        self.scanner.found.connect(lambda first, last, matches: self.onMatchesFound(generation, first, last, matches))
+        self.scanner.finished.connect(self.onScanFinished)
+        self.scanner.start()
+        self.emitCount()
+
+    def cancelScan(self):
+        """Stop the running scan; batches it has not delivered are dropped"""
+        self.generation += 1
+        if self.scanner is not None:
+            self.scanner.found.disconnect()
+            self.scanner.finished.disconnect()
+            self.scanner.requestInterruption()
+            self.scanner.finished.connect(self.scanner.deleteLater)
+            self.scanner = None
+
+    def onMatchesFound(self, generation, first, last, matches):
+        """Fill in a batch of scanned lines"""
+        if generation != self.generation:
+            return
+        lines = self.lines
+        last = min(last, len(lines))
+        for number in range(first, last):
+            if lines[number] is None:
+                found = matches.get(number, NO_MATCHES)
+                lines[number] = found
+                self.total += len(found)
+                self.unscanned -= 1
+        self.emitCount()
+        self.scheduleHighlights()
+
+    def onScanFinished(self):
+        """Report the final count once the scan is done"""
+        scanner = self.scanner
+        self.scanner = None
+        scanner.deleteLater()
+        self.emitCount()
+
+    def emitCount(self):
+        """Report the matches found so far"""
+        self.countChanged.emit(self.total, not self.unscanned)
+
+    def onContentsChange(self, position, removed, added):
+        """Rescan the lines an edit touched; a running scan resumes once edits pause"""
+        if self.pattern is None:
+            return
+        document = self.editor.document()
+        first = document.findBlock(position)
+        last = document.findBlock(position + added)
+        if not first.isValid():
+            first = document.lastBlock()
+        if not last.isValid():
+            last = document.lastBlock()
+        start = first.blockNumber()
+        count = last.blockNumber() - start + 1
+        if count > SYNC_RESCAN_BLOCKS:
+            new_lines = [None] * count
+        else:
+            new_lines = []
+            block = first
+            while True:
+                new_lines.append(lineMatches(self.pattern, block.text()))
+                if block == last:
+                    break
+                block = block.next()
+        # The blocks the edit replaced are the new ones less the blocks it added
+        end = min(len(self.lines), start + count - (document.blockCount() - len(self.lines)))
+        end = max(end, start)
+        self.replaceLines(start, end, new_lines)
+
+        if self.scanner is not None or self.unscanned:
+            # Scanned line numbers no longer match the document
+            self.cancelScan()
+            self.rescan_timer.start()
+        self.emitCount()
+        self.scheduleHighlights()
+
+    def replaceLines(self, start, end, new_lines):
+        """Swap lines[start:end] for new_lines, updating the counts"""
+        old_lines = self.lines[start:end]
+        # Unscanned lines are None and lines without matches are empty, so both are skipped
+        self.unscanned += new_lines.count(None) - old_lines.count(None)
+        self.total += sum(map(len, filter(None, new_lines))) - sum(map(len, filter(None, old_lines)))
+        self.lines[start:end] = new_lines
+
+    def matchesOn(self, number, block=None):
+        """Return the matches of a line, scanning it now if the scan hasn't reached it"""
+        matches = self.lines[number]
+        if matches is None:
+            if block is None:
+                block = self.editor.document().findBlockByNumber(number)
+            matches = lineMatches(self.pattern, block.text())
+            self.lines[number] = matches
+            self.total += len(matches)
+            self.unscanned -= 1
+        return matches
+
+    def eventFilter(self, watched, event):
+        """Update the highlights when the viewport shows more or fewer lines"""
+        if event.type() == QEvent.Type.Resize:
+            self.scheduleHighlights()
+        return False
+
+    def scheduleHighlights(self):
+        """Update the highlights once the current event has been handled"""
+        self.highlight_timer.start()
+
+    def updateHighlights(self):
+        """Highlight the matches in the viewport"""
+        editor = self.editor
+        if editor is None:
+            return
+        if self.pattern is None:
+            editor.setSearchSelections([])
+            return
+        unscanned = self.unscanned
+        with tracer.span("search.highlight"):
+            cursor = editor.textCursor()
+            current = (cursor.selectionStart(), cursor.selectionEnd())
+            document = editor.document()
+            selections = []
+            for block in editor.visibleBlocks():
+                number = block.blockNumber()
+                if number >= len(self.lines):
+                    break
+                position = block.position()
+                for column, length in self.matchesOn(number, block):
+                    selection = QTextEdit.ExtraSelection()
+                    selection.cursor = QTextCursor(document)
+                    selection.cursor.setPosition(position + column)
+                    selection.cursor.setPosition(position + column + length, QTextCursor.MoveMode.KeepAnchor)
+                    start = position + column
+                    selection.format.setBackground(
+                        CURRENT_MATCH_COLOR if current == (start, start + length) else MATCH_COLOR)
+                    selections.append(selection)
+            editor.setSearchSelections(selections)
+        if self.unscanned != unscanned:
+            self.emitCount()
+
+    def select(self, number, column, length):
+        """Select a match and scroll it into view"""
+        editor = self.editor
+        position = editor.document().findBlockByNumber(number).position() + column
+        cursor = editor.textCursor()
+        cursor.setPosition(position)
+        cursor.setPosition(position + length, QTextCursor.MoveMode.KeepAnchor)
+        editor.setTextCursor(cursor)
+        editor.centerCursor()
+
+    def findNext(self):
+        """Select the next match after the cursor, wrapping at the end; returns whether there was one"""
+        if self.editor is None or self.pattern is None or not self.lines:
+            return False
+        position = self.editor.textCursor().selectionEnd()
+        block = self.editor.document().findBlock(position)
+        line = block.blockNumber()
+        column = position - block.position()
+        for start, length in self.matchesOn(line, block):
+            if start >= column:
+                self.select(line, start, length)
+                return True
+        for number in chain(range(line + 1, len(self.lines)), range(0, line + 1)):
+            matches = self.matchesOn(number)
+            if matches:
+                self.select(number, *matches[0])
+                return True
+        return False
+
+    def findPrevious(self):
+        """Select the match before the cursor, wrapping at the start; returns whether there was one"""
+        if self.editor is None or self.pattern is None or not self.lines:
+            return False
+        position = self.editor.textCursor().selectionStart()
+        block = self.editor.document().findBlock(position)
+        line = block.blockNumber()
+        column = position - block.position()
+        for start, length in reversed(self.matchesOn(line, block)):
+            if start < column:
+                self.select(line, start, length)
+                return True
+        for number in chain(range(line - 1, -1, -1), range(len(self.lines) - 1, line - 1, -1)):
+            matches = self.matchesOn(number)
+            if matches:
+                self.select(number, *matches[-1])
+                return True
+        return False
+
+    def replacement(self, text, column, replacement):
+        """Return the text replacing the match at a column of a line"""
+        if not self.is_regex:
+            return replacement
+        return self.pattern.match(text, column).expand(replacement)
+
+    def replaceCurrent(self, replacement):
+        """Replace the selected match and select the next one; raises re.error for a bad template"""
+        if self.editor is None or self.pattern is None:
+            return False
+        cursor = self.editor.textCursor()
+        block = self.editor.document().findBlock(cursor.selectionStart())
+        column = cursor.selectionStart() - block.position()
+        length = cursor.selectionEnd() - cursor.selectionStart()
+        if cursor.hasSelection() and (column, length) in self.matchesOn(block.blockNumber(), block):
+            cursor.insertText(self.replacement(block.text(), column, replacement))
+            self.editor.setTextCursor(cursor)
+        return self.findNext()
+
+    def replaceAll(self, replacement):
+        """Replace every match as one undoable edit; returns the number replaced
+
+        Raises re.error for a bad replacement template.
+        """
+        if self.editor is None or self.pattern is None:
+            return 0
+        text = self.editor.toPlainText()
+        edits = []
+        with tracer.span("search.replaceAll"):
+            for match in self.pattern.finditer(text):
+                start, end = match.span()
+                if start == end or text.find('\n', start, end) != -1:
+                    continue
+                edits.append((start, end, match.expand(replacement) if self.is_regex else replacement))
+            if not edits:
+                return 0
+            # Positions are applied last first, so the earlier ones stay valid
+            cursor = QTextCursor(self.editor.document())
+            cursor.beginEditBlock()
+            set_position = cursor.setPosition
+            insert_text = cursor.insertText
+            move_anchor = QTextCursor.MoveMode.MoveAnchor
+            keep_anchor = QTextCursor.MoveMode.KeepAnchor
+            for start, end, new_text in reversed(edits):
+                set_position(start, move_anchor)
+                set_position(end, keep_anchor)
+                insert_text(new_text)
+            cursor.endEditBlock()
+        return len(edits)
+
+    def shutdown(self):
+        """Cancel the running scan and wait for its thread"""
+        scanner = self.scanner
+        self.cancelScan()
+        if scanner is not None:
+            scanner.wait()
@@ -2,9 +2,59 @@
 Code Editor component for PyIDE
 """
 
-from PyQt6.QtWidgets import QPlainTextEdit, QTextEdit
-from PyQt6.QtGui import QFont, QColor
-from PyQt6.QtCore import Qt
+import re
+from bisect import bisect_left
+from PyQt6.QtWidgets import QPlainTextEdit, QTextEdit, QToolTip, QCompleter, QWidget
+from PyQt6.QtGui import QFont, QColor, QTextCursor, QTextCharFormat, QTextFormat, QPainter
+from PyQt6.QtCore import Qt, QEvent, QStringListModel, QTimer, QRect, QSize
+
+from ..instrumentation import tracer
+from .completion import PREFIX, SUFFIX
+
+# Underline colour per diagnostic severity
+DIAGNOSTIC_COLORS = {"error": QColor("#F92672"), "warning": QColor("#E6DB74")}
+# Characters typed before completions are offered without asking
+COMPLETION_MIN_PREFIX = 2
+# Keys the completion popup handles while it is open
+COMPLETER_KEYS = (Qt.Key.Key_Enter, Qt.Key.Key_Return, Qt.Key.Key_Escape, Qt.Key.Key_Tab, Qt.Key.Key_Backtab)
+# Estimated bytes per block for its layout, user data and highlighting formats
+BLOCK_MEMORY = 500
+# Gutter colours for the background, line numbers and the cursor's line number
+GUTTER_COLOR = QColor("#2F2F2F")
+LINE_NUMBER_COLOR = QColor("#90908A")
+CURRENT_LINE_NUMBER_COLOR = QColor("#F8F8F2")
+# Background of the cursor's line, matching brackets and other occurrences of the word at the cursor
+CURRENT_LINE_COLOR = QColor("#2F2F2F")
+BRACKET_COLOR = QColor("#75715E")
+OCCURRENCE_COLOR = QColor("#3E3D32")
+# Gutter marker colour per kind of line changed since the last commit, and the marker width
+LINE_CHANGE_COLORS = {"added": QColor("#A6E22E"), "modified": QColor("#66D9EF"), "deleted": QColor("#F92672")}
+CHANGE_MARKER_WIDTH = 3
+# Milliseconds the cursor or scroll position must settle before the decorations are updated
+DECORATION_DELAY = 30
+# Closing bracket of each opening bracket, and the other way round
+BRACKETS = {'(': ')', '[': ']', '{': '}'}
+OPENING_BRACKETS = {closing: opening for opening, closing in BRACKETS.items()}
+# Identifier at the start of the text after the cursor
+IDENTIFIER = re.compile(r'[^\W\d]\w*')
+
+def changeEnd(change):
+    """Return the line after a (start, end, kind) change; a deletion marks the line it precedes"""
+    return max(change[1], change[0] + 1)
+
+class LineNumberArea(QWidget):
+    """Gutter beside the editor's viewport that shows line numbers"""
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+
+    def sizeHint(self):
+        """Return the width the current line count needs"""
+        return QSize(self.editor.lineNumberAreaWidth(), 0)
+
+    def paintEvent(self, event):
+        """Paint the numbers of the visible lines"""
+        self.editor.lineNumberAreaPaintEvent(event)
 
 class CodeEditor(QPlainTextEdit):
     """Code editor with syntax highlighting and line numbering"""
@@ -15,6 +65,19 @@ class CodeEditor(QPlainTextEdit):
         self.setupLineNumbers()
         self.tab_size = 4
         self.updateTabSize()
+        self.highlighter = None
+        self.encoding = 'utf-8'
+        # (selection, message) per diagnostic; the cursors follow later edits
+        self.diagnostics = []
+        # Highlights of the in-buffer search's visible matches
+        self.search_selections = []
+        # Current line, bracket and occurrence highlights for the visible lines
+        self.decoration_selections = []
+        # Sorted (start, end, kind) lines that differ from the committed file
+        self.line_changes = []
+        # Created once a completion engine indexes the document
+        self.completion_engine = None
+        self.completer = None
         
     def setupFont(self):
         """Set up the editor font"""
@@ -24,8 +87,116 @@ class CodeEditor(QPlainTextEdit):
         self.setFont(font)
         
     def setupLineNumbers(self):
-        """Set up editor styling"""
+        """Set up editor styling, the line number gutter and the cursor decorations"""
         self.setStyleSheet("QPlainTextEdit { background-color: #272822; color: #F8F8F2; }")
+        # Decorations follow the cursor once it settles, and cover only the visible lines
+        self.decoration_timer = QTimer(self)
+        self.decoration_timer.setSingleShot(True)
+        self.decoration_timer.setInterval(DECORATION_DELAY)
+        self.decoration_timer.timeout.connect(self.highlightCurrentLine)
+        self.cursorPositionChanged.connect(self.scheduleDecorations)
+        self.verticalScrollBar().valueChanged.connect(self.scheduleDecorations)
+        
+        # Gutter width per number of digits, so it is only measured when the digit count changes
+        self.gutter_widths = {}
+        self.gutter_width = 0
+        # What the gutter showed when it was last painted
+        self.gutter_state = None
+        self.line_number_area = LineNumberArea(self)
+        self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
+        self.updateRequest.connect(self.updateLineNumberArea)
+        self.updateLineNumberAreaWidth()
+        
+    def scheduleDecorations(self):
+        """Update the decorations once the cursor and scroll position settle"""
+        self.decoration_timer.start()
+        
+    def lineNumberAreaWidth(self):
+        """Return the gutter width for the current line count"""
+        digits = len(str(max(1, self.blockCount())))
+        width = self.gutter_widths.get(digits)
+        if width is None:
+            width = (digits + 2) * self.fontMetrics().horizontalAdvance('9')
+            self.gutter_widths[digits] = width
+        return width
+        
+    def updateLineNumberAreaWidth(self, block_count=None):
+        """Make room for the gutter when the line count gains or loses a digit"""
+        width = self.lineNumberAreaWidth()
+        if width != self.gutter_width:
+            self.gutter_width = width
+            self.setViewportMargins(width, 0, 0, 0)
+            self.resizeLineNumberArea()
+            
+    def gutterState(self):
+        """Return what the gutter shows: the first line and its offset, the cursor's line and the line count"""
+        return (self.firstVisibleBlock().blockNumber(), self.contentOffset().y(),
+                self.textCursor().blockNumber(), self.blockCount())
+        
+    def updateLineNumberArea(self, rect, dy):
+        """Scroll or repaint the gutter along with the viewport"""
+        if dy:
+            self.line_number_area.scroll(0, dy)
+        elif self.gutterState() != self.gutter_state:
+            # Typing within a line repaints the viewport but leaves the numbers as they are
+            self.line_number_area.update()
+            
+    def resizeLineNumberArea(self):
+        """Place the gutter to the left of the viewport"""
+        rect = self.contentsRect()
+        self.line_number_area.setGeometry(QRect(rect.left(), rect.top(), self.gutter_width, rect.height()))
+        
+    def resizeEvent(self, event):
+        """Keep the gutter as tall as the viewport"""
+        super().resizeEvent(event)
+        self.resizeLineNumberArea()
+        self.scheduleDecorations()
+        
+    def lineNumberAreaPaintEvent(self, event):
+        """Paint the line numbers of the blocks in the repainted part of the gutter"""
+        self.gutter_state = self.gutterState()
+        painter = QPainter(self.line_number_area)
+        rect = event.rect()
+        painter.fillRect(rect, GUTTER_COLOR)
+        painter.setPen(LINE_NUMBER_COLOR)
+        metrics = self.fontMetrics()
+        width = self.gutter_width - metrics.horizontalAdvance('9')
+        height = metrics.height()
+        current = self.textCursor().blockNumber()
+        block = self.firstVisibleBlock()
+        number = block.blockNumber()
+        top = round(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
+        # Only the changes of the visible lines are looked at
+        changes = self.line_changes
+        change = bisect_left(changes, number + 1, key=changeEnd)
+        marker_x = width + 2
+        while block.isValid() and top <= rect.bottom():
+            bottom = top + round(self.blockBoundingRect(block).height())
+            if block.isVisible() and bottom >= rect.top():
+                if number == current:
+                    painter.setPen(CURRENT_LINE_NUMBER_COLOR)
+                painter.drawText(0, top, width, height, Qt.AlignmentFlag.AlignRight, str(number + 1))
+                if number == current:
+                    painter.setPen(LINE_NUMBER_COLOR)
+                while change < len(changes) and changeEnd(changes[change]) <= number:
+                    change += 1
+                if change < len(changes) and changes[change][0] <= number:
+                    kind = changes[change][2]
+                    if kind == "deleted":
+                        # A notch across the boundary where the lines were removed
+                        painter.fillRect(marker_x, top - 2, CHANGE_MARKER_WIDTH * 2, 4, LINE_CHANGE_COLORS[kind])
+                    else:
+                        painter.fillRect(marker_x, top, CHANGE_MARKER_WIDTH, bottom - top, LINE_CHANGE_COLORS[kind])
+            block = block.next()
+            top = bottom
+            number += 1
+        painter.end()
+        
+    def setupHighlighter(self, file_path):
+        """Attach an incremental syntax highlighter for the file's language"""
+        # Import here so Pygments is only loaded once a file is opened
+        from .syntax_highlighter import SyntaxHighlighter
+        self.highlighter = SyntaxHighlighter.forFile(self.document(), file_path)
         
     def updateTabSize(self):
         """Configure tab size"""
@@ -33,22 +204,264 @@ class CodeEditor(QPlainTextEdit):
         metrics = self.fontMetrics()
         self.setTabStopDistance(self.tab_size * metrics.horizontalAdvance(' '))
         
+    def goToLine(self, line, column=None):
+        """Move the cursor to the given 1-based line, at its start or the 1-based column"""
+        block = self.document().findBlockByNumber(max(0, line - 1))
+        if block.isValid():
+            offset = min(max(0, column - 1), block.length() - 1) if column else 0
+            cursor = self.textCursor()
+            cursor.setPosition(block.position() + offset)
+            self.setTextCursor(cursor)
+            self.centerCursor()
+            
+    def viewState(self):
+        """Return the cursor and scroll position, for restoring the view later"""
+        return {"cursor": self.textCursor().position(), "scroll": self.verticalScrollBar().value()}
+        
+    def restoreViewState(self, state):
+        """Put the cursor and scroll position back as they were saved"""
+        cursor = self.textCursor()
+        cursor.setPosition(min(max(0, state.get("cursor", 0)), self.document().characterCount() - 1))
+        self.setTextCursor(cursor)
+        self.verticalScrollBar().setValue(state.get("scroll", 0))
+            
+    def memoryUsage(self):
+        """Return an estimate of the bytes the document holds: UTF-16 text plus per-block overhead"""
+        document = self.document()
+        return document.characterCount() * 2 + document.blockCount() * BLOCK_MEMORY
+            
+    def setCompletionEngine(self, engine):
+        """Offer completions from an engine that indexes this editor's document"""
+        self.completion_engine = engine
+        if self.completer is None:
+            self.completer = QCompleter(self)
+            self.completer.setWidget(self)
+            self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+            self.completer.setModel(QStringListModel(self.completer))
+            self.completer.activated.connect(self.insertCompletion)
+            
+    def completionVisible(self):
+        """Return whether the completion popup is open"""
+        return self.completer is not None and self.completer.popup().isVisible()
+        
     def keyPressEvent(self, event):
         """Handle special key presses"""
+        # The popup's own event filter accepts or dismisses the completion
+        if self.completionVisible() and event.key() in COMPLETER_KEYS:
+            event.ignore()
+            return
+        if (event.key() == Qt.Key.Key_Space and event.modifiers() == Qt.KeyboardModifier.ControlModifier
+                and self.completion_engine is not None):
+            self.updateCompletions(explicit=True)
+            return
+        
         # Handle special key presses
         if event.key() == Qt.Key.Key_Tab:
             self.insertPlainText(" " * self.tab_size)
         else:
             super().keyPressEvent(event)
+        
+        if self.completion_engine is not None:
+            text = event.text()
+            if text and (text[-1].isalnum() or text[-1] == '_'):
+                self.updateCompletions()
+            elif self.completionVisible():
+                # Backspace narrows back to a shorter prefix; anything else closes the popup
+                if event.key() == Qt.Key.Key_Backspace:
+                    self.updateCompletions()
+                elif text or event.key() in (Qt.Key.Key_Left, Qt.Key.Key_Right, Qt.Key.Key_Home, Qt.Key.Key_End):
+                    self.completer.popup().hide()
+            
+    def completionPrefix(self):
+        """Return the identifier before the cursor and the whole word around it"""
+        cursor = self.textCursor()
+        text = cursor.block().text()
+        column = cursor.positionInBlock()
+        match = PREFIX.search(text, 0, column)
+        if match is None:
+            return "", ""
+        return match.group(), match.group() + SUFFIX.match(text, column).group()
+        
+    def updateCompletions(self, explicit=False):
+        """Show the best completions of the identifier before the cursor"""
+        with tracer.span("completion.popup"):
+            prefix, word = self.completionPrefix()
+            popup = self.completer.popup()
+            if not prefix or (len(prefix) < COMPLETION_MIN_PREFIX and not explicit):
+                popup.hide()
+                return
+            names = self.completion_engine.completions(
+                self.document(), prefix, self.textCursor().blockNumber(), word)
+            if not names:
+                popup.hide()
+                return
+            model = self.completer.model()
+            model.setStringList(names)
+            self.completer.setCompletionPrefix(prefix)
+            popup.setCurrentIndex(model.index(0, 0))
+            rect = self.cursorRect()
+            rect.moveLeft(rect.left() - self.fontMetrics().horizontalAdvance(prefix))
+            rect.setWidth(popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width())
+            self.completer.complete(rect)
+            
+    def insertCompletion(self, name):
+        """Replace the identifier before the cursor with a picked completion"""
+        prefix, word = self.completionPrefix()
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.Left, QTextCursor.MoveMode.KeepAnchor, len(prefix))
+        cursor.insertText(name)
+        self.setTextCursor(cursor)
             
     def highlightCurrentLine(self):
-        """Highlight the line where the cursor is"""
-        extraSelections = []
+        """Highlight the line where the cursor is, its matching brackets and the word under it"""
+        with tracer.span("editor.decorations"):
+            extraSelections = []
+            selection = QTextEdit.ExtraSelection()
+            selection.format.setBackground(CURRENT_LINE_COLOR)
+            selection.format.setProperty(QTextFormat.Property.FullWidthSelection, True)
+            selection.cursor = self.textCursor()
+            selection.cursor.clearSelection()
+            extraSelections.append(selection)
+            
+            blocks = list(self.visibleBlocks())
+            if blocks:
+                extraSelections.extend(self.occurrenceSelections(blocks))
+                extraSelections.extend(self.bracketSelections(blocks))
+            self.decoration_selections = extraSelections
+            self.updateExtraSelections()
+        
+    def decorationSelection(self, start, end, color):
+        """Return an extra selection giving a range of the document a background"""
         selection = QTextEdit.ExtraSelection()
-        lineColor = QColor("#2F2F2F")
-        selection.format.setBackground(lineColor)
-        selection.format.setProperty(QTextEdit.ExtraSelectionProperty.FullWidthSelection, True)
-        selection.cursor = self.textCursor()
-        selection.cursor.clearSelection()
-        extraSelections.append(selection)
-        self.setExtraSelections(extraSelections)
+        selection.cursor = QTextCursor(self.document())
+        selection.cursor.setPosition(start)
+        selection.cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        selection.format.setBackground(color)
+        return selection
+        
+    def occurrenceSelections(self, blocks):
+        """Return highlights for the visible occurrences of the identifier at the cursor"""
+        cursor = self.textCursor()
+        if cursor.hasSelection():
+            return []
+        text = cursor.block().text()
+        column = cursor.positionInBlock()
+        prefix = PREFIX.search(text, 0, column)
+        start = prefix.start() if prefix else column
+        word = IDENTIFIER.match(text, start)
+        if word is None:
+            return []
+        pattern = re.compile(rf'\b{re.escape(word.group())}\b')
+        selections = []
+        for block in blocks:
+            position = block.position()
+            for match in pattern.finditer(block.text()):
+                selections.append(self.decorationSelection(position + match.start(), position + match.end(),
+                                                           OCCURRENCE_COLOR))
+        return selections
+        
+    def bracketSelections(self, blocks):
+        """Return highlights for the bracket at the cursor and its match, if both are visible"""
+        cursor = self.textCursor()
+        block = cursor.block()
+        number = block.blockNumber()
+        first = blocks[0].blockNumber()
+        if not first <= number < first + len(blocks):
+            return []
+        text = block.text()
+        column = cursor.positionInBlock()
+        # The bracket after the cursor wins over the one before it
+        for bracket_column in (column, column - 1):
+            if 0 <= bracket_column < len(text) and (text[bracket_column] in BRACKETS
+                                                    or text[bracket_column] in OPENING_BRACKETS):
+                break
+        else:
+            return []
+        bracket = text[bracket_column]
+        forward = bracket in BRACKETS
+        other = BRACKETS[bracket] if forward else OPENING_BRACKETS[bracket]
+        index = number - first
+        depth = 0
+        column = bracket_column
+        while 0 <= index < len(blocks):
+            line = blocks[index].text()
+            columns = range(column, len(line)) if forward else range(column, -1, -1)
+            for position in columns:
+                char = line[position]
+                if char == bracket:
+                    depth += 1
+                elif char == other:
+                    depth -= 1
+                    if not depth:
+                        start = block.position() + bracket_column
+                        match = blocks[index].position() + position
+                        return [self.decorationSelection(start, start + 1, BRACKET_COLOR),
+                                self.decorationSelection(match, match + 1, BRACKET_COLOR)]
+            index += 1 if forward else -1
+            if 0 <= index < len(blocks):
+                column = 0 if forward else len(blocks[index].text()) - 1
+        return []
+        
+    def setDiagnostics(self, diagnostics):
+        """Underline (line, column, end line, end column, severity, message) diagnostics"""
+        document = self.document()
+        self.diagnostics = []
+        for line, column, end_line, end_column, severity, message in diagnostics:
+            start_block = document.findBlockByNumber(line - 1)
+            end_block = document.findBlockByNumber(end_line - 1)
+            if not start_block.isValid():
+                continue
+            if not end_block.isValid():
+                end_block = start_block
+            start = start_block.position() + min(column, start_block.length() - 1)
+            end = end_block.position() + min(end_column, end_block.length() - 1)
+            if end <= start:
+                # Errors at the end of a line underline the character before
+                start, end = max(start - 1, start_block.position()), max(start, start_block.position() + 1)
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(document)
+            selection.cursor.setPosition(start)
+            selection.cursor.setPosition(min(end, document.characterCount() - 1), QTextCursor.MoveMode.KeepAnchor)
+            selection.format.setUnderlineStyle(QTextCharFormat.UnderlineStyle.SpellCheckUnderline)
+            selection.format.setUnderlineColor(DIAGNOSTIC_COLORS.get(severity, DIAGNOSTIC_COLORS["warning"]))
+            self.diagnostics.append((selection, message))
+        self.updateExtraSelections()
+        
+    def setLineChanges(self, changes):
+        """Mark the sorted (start, end, kind) lines changed since the last commit in the gutter"""
+        self.line_changes = changes
+        self.line_number_area.update()
+        
+    def setSearchSelections(self, selections):
+        """Highlight the visible matches of the in-buffer search"""
+        self.search_selections = selections
+        self.updateExtraSelections()
+        
+    def updateExtraSelections(self):
+        """Show the cursor decorations and search matches under the diagnostic underlines"""
+        self.setExtraSelections(self.decoration_selections + self.search_selections
+                                + [selection for selection, message in self.diagnostics])
+        
+    def visibleBlocks(self):
+        """Yield the blocks shown in the viewport, from the top"""
+        block = self.firstVisibleBlock()
+        offset = self.contentOffset()
+        bottom = self.viewport().height()
+        top = self.blockBoundingGeometry(block).translated(offset).top()
+        while block.isValid() and top <= bottom:
+            yield block
+            top += self.blockBoundingRect(block).height()
+            block = block.next()
+        
+    def viewportEvent(self, event):
+        """Show the message of a diagnostic under the mouse"""
+        if event.type() == QEvent.Type.ToolTip and self.diagnostics:
+            position = self.cursorForPosition(event.pos()).position()
+            messages = [message for selection, message in self.diagnostics
+                        if selection.cursor.selectionStart() <= position <= selection.cursor.selectionEnd()]
+            if messages:
+                QToolTip.showText(event.globalPos(), "\n".join(messages), self.viewport())
+            else:
+                QToolTip.hideText()
+            return True
+        return super().viewportEvent(event)
@@ -0,0 +1,387 @@
+"""
+Identifier completion component for PyIDE
+"""
+
+import heapq
+import math
+import re
+import sqlite3
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from ..instrumentation import tracer
+
+# Identifiers worth completing; shorter names are quicker to type than to pick
+WORD = re.compile(r'[^\W\d]\w{2,}')
+# Identifier ending at the cursor
+PREFIX = re.compile(r'[^\W\d]\w*$')
+# Identifier characters following the cursor
+SUFFIX = re.compile(r'\w*')
+# Completions shown in the popup
+MAX_COMPLETIONS = 50
+# Names looked at per query, so long lists of matches for short prefixes stay cheap
+MAX_CANDIDATES = 5000
+# Project prefixes this short have their best names ranked ahead of time
+SHORT_PREFIX = 2
+# Blocks scanned per event loop turn while a document is first indexed
+SCAN_BATCH = 2000
+# Lines either side of the cursor whose names get the proximity bonus
+NEARBY_LINES = 50
+NEARBY_BONUS = 4.0
+# Bonus for names that match the typed prefix's case exactly
+CASE_BONUS = 1.0
+
+def lineWords(text):
+    """Return the identifiers on one line"""
+    return tuple(WORD.findall(text))
+
+def prefixRange(names, prefix, limit):
+    """Return up to limit names from a sorted (lower, name) list whose lower form starts with prefix"""
+    start = bisect_left(names, (prefix,))
+    end = bisect_left(names, (prefix + '\uffff',), start, min(len(names), start + limit))
+    return [name for lower, name in names[start:end]]
+
+def loadProjectNames(db_file):
+    """Read symbol and module names from a symbol database, with how often each occurs"""
+    counts = {}
+    db = sqlite3.connect(db_file, timeout=10)
+    try:
+        for name, count in db.execute("SELECT name, COUNT(*) FROM symbols GROUP BY name"):
+            counts[name] = count
+        for (path,) in db.execute("SELECT path FROM files"):
+            # Modules and the packages they live in can be imported by name
+            parts = path[:-3].split('/') if path.endswith('.py') else path.split('/')
+            for part in parts:
+                if part.isidentifier() and part != '__init__':
+                    counts[part] = counts.get(part, 0) + 1
+    finally:
+        db.close()
+    return counts
+
+class ProjectNames:
+    """Sorted project names with their counts and the best names for short prefixes"""
+    def __init__(self, counts=None):
+        self.counts = counts or {}
+        self.names = sorted((name.lower(), name) for name in self.counts if len(name) > 1)
+        # The best names for every prefix of up to SHORT_PREFIX characters
+        groups = {}
+        for lower, name in self.names:
+            for length in range(1, SHORT_PREFIX + 1):
+                if len(lower) > length:
+                    groups.setdefault(lower[:length], []).append(name)
+        self.top = {prefix: heapq.nlargest(MAX_CANDIDATES // 10, names, key=self.counts.__getitem__)
+                    for prefix, names in groups.items()}
+
+    def candidates(self, prefix, limit):
+        """Return the limit most frequent names starting with a lower case prefix"""
+        if len(prefix) <= SHORT_PREFIX:
+            names = self.top.get(prefix, ())
+        else:
+            names = prefixRange(self.names, prefix, MAX_CANDIDATES)
+        return heapq.nlargest(limit, names, key=self.counts.__getitem__)
+
+class ProjectNamesLoader(QThread):
+    """Thread that reads the project's names from its symbol database"""
+    # The ProjectNames that were read
+    loaded = pyqtSignal(object)
+
+    def __init__(self, db_file, parent=None):
+        super().__init__(parent)
+        self.db_file = db_file
+
+    def run(self):
+        """Read and sort the names"""
+        try:
+            with tracer.span("completion.loadProject"):
+                self.loaded.emit(ProjectNames(loadProjectNames(self.db_file)))
+        except sqlite3.Error as e:
+            print(f"Error loading completion names: {str(e)}")
+
+class DocumentWords:
+    """The identifiers of one document, per block, kept current as it changes"""
+    def __init__(self, engine, document):
+        self.engine = engine
+        self.document = document
+        self.counts = {}
+        # Identifiers per block; None for blocks that haven't been scanned yet
+        self.lines = [None] * document.blockCount()
+        self.unscanned = len(self.lines)
+        self.scan_position = 0
+
+    def onContentsChange(self, position, removed, added):
+        """Rescan the blocks an edit touched"""
+        document = self.document
+        first = document.findBlock(position)
+        last = document.findBlock(position + added)
+        if not first.isValid():
+            first = document.lastBlock()
+        if not last.isValid():
+            last = document.lastBlock()
+        start = first.blockNumber()
+        count = last.blockNumber() - start + 1
+        if count > SCAN_BATCH:
+            # Large edits such as a replace-all are rescanned in batches
+            new_lines = [None] * count
+            self.engine.scan_timer.start()
+        else:
+            new_lines = []
+            block = first
+            while True:
+                new_lines.append(lineWords(block.text()))
+                if block == last:
+                    break
+                block = block.next()
+        # The blocks the edit replaced are the new ones less the blocks it added
+        end = min(len(self.lines), start + len(new_lines) - (document.blockCount() - len(self.lines)))
+        end = max(end, start)
+        self.replaceLines(start, end, new_lines)
+
+    def replaceLines(self, start, end, new_lines):
+        """Swap lines[start:end] for new_lines, updating the counts"""
+        old_lines = self.lines[start:end]
+        if len(old_lines) > SCAN_BATCH:
+            # Large edits are counted once per distinct word rather than once per line
+            self.unscanned -= old_lines.count(None)
+            self.removeCounts(Counter(chain.from_iterable(words for words in old_lines if words)))
+        else:
+            for words in old_lines:
+                if words is None:
+                    self.unscanned -= 1
+                else:
+                    self.removeWords(words)
+        for words in new_lines:
+            if words is None:
+                self.unscanned += 1
+            else:
+                self.addWords(words)
+        self.lines[start:end] = new_lines
+
+    def addWords(self, words):
+        """Count the identifiers of a line"""
+        counts = self.counts
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        self.engine.addWords(words)
+
+    def removeWords(self, words):
+        """Stop counting the identifiers of a line"""
+        counts = self.counts
+        for word in words:
+            count = counts[word] - 1
+            if count:
+                counts[word] = count
+            else:
+                del counts[word]
+        self.engine.removeWords(words)
+
+    def removeCounts(self, removed):
+        """Stop counting identifiers, given how often each occurred"""
+        counts = self.counts
+        for word, number in removed.items():
+            count = counts[word] - number
+            if count:
+                counts[word] = count
+            else:
+                del counts[word]
+        self.engine.removeCounts(removed)
+
+    def scan(self, limit):
+        """Scan up to limit unscanned blocks; returns whether any are left"""
+        if not self.unscanned:
+            return False
+        if self.scan_position >= len(self.lines):
+            self.scan_position = 0
+        block = self.document.findBlockByNumber(self.scan_position)
+        scanned = 0
+        while block.isValid() and scanned < limit and self.unscanned:
+            number = block.blockNumber()
+            if self.lines[number] is None:
+                words = lineWords(block.text())
+                self.lines[number] = words
+                self.unscanned -= 1
+                self.addWords(words)
+            scanned += 1
+            block = block.next()
+        self.scan_position += scanned
+        return bool(self.unscanned)
+
+    def nearbyNames(self, line):
+        """Return the identifiers within NEARBY_LINES of a 0-based line"""
+        names = set()
+        for words in self.lines[max(0, line - NEARBY_LINES):line + NEARBY_LINES + 1]:
+            if words:
+                names.update(words)
+        return names
+
+    def clear(self):
+        """Stop counting every line"""
+        for words in self.lines:
+            if words is not None:
+                self.removeWords(words)
+        self.lines = []
+        self.unscanned = 0
+
+class CompletionEngine(QObject):
+    """Ranks identifiers from the open documents and the project for completion"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.documents = {}
+        self.connections = {}
+        # Identifier counts over every open document and their sorted (lower, name) keys
+        self.counts = {}
+        self.names = []
+        self.project = ProjectNames()
+        self.loader = None
+        self.pending_db_file = None
+        self.scan_timer = QTimer(self)
+        self.scan_timer.setInterval(0)
+        self.scan_timer.timeout.connect(self.scanPending)
+
+    def attach(self, editor):
+        """Index an editor's document and keep it indexed as it changes"""
+        document = editor.document()
+        key = id(document)
+        if key in self.documents:
+            return
+        words = DocumentWords(self, document)
+        self.documents[key] = words
+        self.connections[key] = document.contentsChange.connect(words.onContentsChange)
+        document.destroyed.connect(lambda: self.detach(key))
+        editor.setCompletionEngine(self)
+        self.scan_timer.start()
+
+    def detach(self, key):
+        """Forget a document, by the id of the QTextDocument"""
+        words = self.documents.pop(key, None)
+        if words is None:
+            return
+        connection = self.connections.pop(key)
+        try:
+            words.document.contentsChange.disconnect(connection)
+        except (TypeError, RuntimeError):
+            # The document has already been deleted
+            pass
+        words.clear()
+
+    def wordsFor(self, document):
+        """Return the DocumentWords of an attached document, or None"""
+        return self.documents.get(id(document))
+
+    def addWords(self, words):
+        """Count identifiers added to an open document"""
+        counts = self.counts
+        for word in words:
+            count = counts.get(word, 0)
+            if not count:
+                insort(self.names, (word.lower(), word))
+            counts[word] = count + 1
+
+    def removeWords(self, words):
+        """Stop counting identifiers removed from an open document"""
+        counts = self.counts
+        for word in words:
+            count = counts[word] - 1
+            if count:
+                counts[word] = count
+            else:
+                del counts[word]
+                key = (word.lower(), word)
+                index = bisect_left(self.names, key)
+                if index < len(self.names) and self.names[index] == key:
+                    del self.names[index]
+
+    def removeCounts(self, removed):
+        """Stop counting identifiers removed from an open document, given how often each occurred"""
+        counts = self.counts
+        gone = set()
+        for word, number in removed.items():
+            count = counts[word] - number
+            if count:
+                counts[word] = count
+            else:
+                del counts[word]
+                gone.add((word.lower(), word))
+        if gone:
+            # One pass over the sorted names instead of a deletion per name
+            self.names = [key for key in self.names if key not in gone]
+
+    def scanPending(self):
+        """Index a batch of blocks of the documents still being scanned"""
+        with tracer.span("completion.scan"):
+            remaining = [words for words in self.documents.values() if words.scan(SCAN_BATCH)]
+        if not remaining:
+            self.scan_timer.stop()
+
+    def loadProject(self, db_file):
+        """Read the project's names from a symbol database in the background"""
+        if self.loader is not None:
+            self.pending_db_file = db_file
+            return
+        loader = ProjectNamesLoader(db_file, self)
+        loader.loaded.connect(self.setProjectNames)
+        loader.finished.connect(self.onLoaderFinished)
+        self.loader = loader
+        loader.start()
+
+    def onLoaderFinished(self):
+        """Start the load that was requested while loading"""
+        self.loader.deleteLater()
+        self.loader = None
+        if self.pending_db_file is not None:
+            db_file, self.pending_db_file = self.pending_db_file, None
+            self.loadProject(db_file)
+
+    def setProjectNames(self, project):
+        """Use newly loaded project names"""
+        self.project = project
+
+    def clearProject(self):
+        """Forget the project's names, for example when another folder is opened"""
+        self.pending_db_file = None
+        self.project = ProjectNames()
+
+    def completions(self, document, prefix, line, typed=None):
+        """Return the best names starting with prefix for a cursor on a 0-based line
+
+        Names used in the document count for more than names from other open
+        documents or the project, and names used near the cursor most of all.
+        typed is the whole word at the cursor, which is never offered.
+        """
+        lower = prefix.lower()
+        with tracer.span("completion.query", prefix=prefix):
+            words = self.wordsFor(document)
+            local = words.counts if words is not None else {}
+            nearby = words.nearbyNames(line) if words is not None else set()
+            candidates = set(prefixRange(self.names, lower, MAX_CANDIDATES))
+            # Only frequency ranks names that aren't in an open document, so the
+            # project's most used names are enough
+            candidates.update(self.project.candidates(lower, MAX_COMPLETIONS))
+            candidates.discard(typed or prefix)
+            if not candidates:
+                return []
+            counts = self.counts
+            project_counts = self.project.counts
+
+            def score(name):
+                in_document = local.get(name, 0)
+                value = (3 * math.log1p(in_document)
+                         + math.log1p(counts.get(name, 0) - in_document)
+                         + math.log1p(project_counts.get(name, 0)))
+                if name in nearby:
+                    value += NEARBY_BONUS
+                if name.startswith(prefix):
+                    value += CASE_BONUS
+                # Shorter names win ties
+                return value - len(name) * 0.001
+
+            return heapq.nlargest(MAX_COMPLETIONS, candidates, key=score)
+
+    def shutdown(self):
+        """Stop scanning and wait for a project load to finish"""
+        self.scan_timer.stop()
+        self.pending_db_file = None
+        if self.loader is not None:
+            self.loader.wait()
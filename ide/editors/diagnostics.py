@@ -0,0 +1,253 @@
+"""
+On-the-fly Python diagnostics for PyIDE
+"""
+
+import ast
+import builtins
+import warnings
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from ..project.search import processPool, shutdownPool
+from ..instrumentation import tracer
+
+# Milliseconds without edits before a buffer is checked
+DIAGNOSTICS_DELAY = 500
+# Buffers larger than this many characters aren't checked
+DIAGNOSTICS_MAX_CHARS = 4 * 1024 * 1024
+# Diagnostics reported per file
+MAX_DIAGNOSTICS = 500
+
+ERROR = "error"
+WARNING = "warning"
+
+# Names every module can use without defining them
+MODULE_NAMES = frozenset(dir(builtins)) | {
+    '__file__', '__name__', '__doc__', '__spec__', '__loader__', '__package__',
+    '__builtins__', '__path__', '__annotations__', '__class__', '__cached__',
+}
+
+def characterColumn(lines, line, byte_offset):
+    """Convert a UTF-8 byte offset on a 1-based line to a character column"""
+    if 0 < line <= len(lines):
+        return len(lines[line - 1].encode('utf-8')[:byte_offset].decode('utf-8', errors='ignore'))
+    return byte_offset
+
+def syntaxDiagnostic(error, severity=ERROR):
+    """Turn a SyntaxError into a diagnostic"""
+    line = error.lineno or 1
+    column = max((error.offset or 1) - 1, 0)
+    end_line = getattr(error, 'end_lineno', None) or line
+    end_column = getattr(error, 'end_offset', None)
+    end_column = end_column - 1 if end_column and end_line >= line else column
+    if end_line == line and end_column <= column:
+        end_column = column + 1
+    return (line, column, end_line, end_column, severity, error.msg)
+
+def boundNames(tree):
+    """Return every name the module binds anywhere, and whether it star-imports"""
+    names = set()
+    star_import = False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if not isinstance(node.ctx, ast.Load):
+                names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == '*':
+                    star_import = True
+                else:
+                    names.add(alias.asname or alias.name.split('.')[0])
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            names.add(node.name)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            names.add(node.rest)
+        elif hasattr(ast, 'TypeVar') and isinstance(node, (ast.TypeVar, ast.ParamSpec, ast.TypeVarTuple)):
+            names.add(node.name)
+    return names, star_import
+
+def undefinedNames(tree, lines):
+    """Report names that are read but never bound anywhere in the module
+
+    Scopes are ignored, so this misses names used outside the scope that
+    binds them, but it never reports a name that is defined somewhere.
+    """
+    bound, star_import = boundNames(tree)
+    if star_import:
+        return []
+    diagnostics = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            if node.id not in bound and node.id not in MODULE_NAMES:
+                column = characterColumn(lines, node.lineno, node.col_offset)
+                diagnostics.append((node.lineno, column, node.lineno, column + len(node.id),
+                                    WARNING, f"undefined name '{node.id}'"))
+    return diagnostics
+
+def pyflakesMessages(tree, filename, lines):
+    """Run pyflakes over a parsed module; returns None if pyflakes isn't installed"""
+    try:
+        from pyflakes.checker import Checker
+    except ImportError:
+        return None
+    diagnostics = []
+    for message in Checker(tree, filename=filename).messages:
+        line = message.lineno
+        column = getattr(message, 'col', 0) or 0
+        if 0 < line <= len(lines):
+            # Underline the identifier at the reported column
+            text = lines[line - 1]
+            end = column
+            while end < len(text) and (text[end].isalnum() or text[end] == '_'):
+                end += 1
+            end = max(end, column + 1)
+        else:
+            end = column + 1
+        diagnostics.append((line, column, line, end, WARNING, message.message % message.message_args))
+    return diagnostics
+
+def checkSource(source, filename):
+    """Compile a buffer and look for undefined names; runs in a worker process"""
+    lines = source.splitlines()
+    diagnostics = []
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
+            tree = ast.parse(source, filename)
+            # Some errors, like 'return' outside a function, are only found by the compiler
+            compile(tree, filename, 'exec', dont_inherit=True)
+        except SyntaxError as e:
+            return [syntaxDiagnostic(e)]
+        except (ValueError, RecursionError, MemoryError) as e:
+            return [(1, 0, 1, 1, ERROR, str(e))]
+    for warning in caught:
+        # Compiler warnings such as "is" with a literal or an invalid escape sequence
+        if warning.filename == filename and warning.lineno:
+            line = warning.lineno
+            end = len(lines[line - 1]) if line <= len(lines) else 1
+            diagnostics.append((line, 0, line, max(end, 1), WARNING, str(warning.message)))
+
+    messages = pyflakesMessages(tree, filename, lines)
+    if messages is None:
+        messages = undefinedNames(tree, lines)
+    diagnostics.extend(messages)
+    diagnostics.sort()
+    return diagnostics[:MAX_DIAGNOSTICS]
+
+class DiagnosticsEngine(QObject):
+    """Checks watched editors in the worker pool once their edits pause"""
+    # File path and its diagnostics as (line, column, end line, end column, severity, message)
+    diagnosticsChanged = pyqtSignal(str, list)
+    # File path, generation and future; emitted from the pool's callback thread
+    jobFinished = pyqtSignal(str, int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.editors = {}
+        self.connections = {}
+        # Bumped on every edit, so results for older text are dropped
+        self.generations = {}
+        self.futures = {}
+        self.pending = set()
+        self.jobFinished.connect(self.onJobFinished)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DIAGNOSTICS_DELAY)
+        self.timer.timeout.connect(self.checkPending)
+
+    def watch(self, file_path, editor):
+        """Check an editor now and again whenever its edits pause"""
+        self.forget(file_path)
+        self.editors[file_path] = editor
+        self.connections[file_path] = editor.document().contentsChanged.connect(
+            lambda: self.schedule(file_path))
+        self.schedule(file_path)
+
+    def forget(self, file_path, clear=True):
+        """Stop checking a file; its diagnostics are cleared unless clear is False"""
+        editor = self.editors.pop(file_path, None)
+        if editor is None:
+            return
+        try:
+            editor.document().contentsChanged.disconnect(self.connections.pop(file_path))
+        except (TypeError, RuntimeError):
+            # The editor has already been deleted
+            pass
+        self.cancel(file_path)
+        self.generations.pop(file_path, None)
+        self.pending.discard(file_path)
+        if clear:
+            self.diagnosticsChanged.emit(file_path, [])
+
+    def schedule(self, file_path):
+        """Note an edit; the newest text is checked once edits pause"""
+        self.generations[file_path] = self.generations.get(file_path, 0) + 1
+        self.cancel(file_path)
+        self.pending.add(file_path)
+        self.timer.start()
+
+    def cancel(self, file_path):
+        """Cancel a check that hasn't started; a running one finishes and is ignored"""
+        future = self.futures.pop(file_path, None)
+        if future is not None:
+            future.cancel()
+
+    def checkPending(self):
+        """Check every file edited since the last check"""
+        pending = self.pending
+        self.pending = set()
+        for file_path in pending:
+            self.check(file_path)
+
+    def check(self, file_path):
+        """Snapshot an editor's text and check it in the worker pool"""
+        editor = self.editors.get(file_path)
+        if editor is None:
+            return
+        if editor.document().characterCount() > DIAGNOSTICS_MAX_CHARS:
+            self.diagnosticsChanged.emit(file_path, [])
+            return
+        generation = self.generations.get(file_path, 0)
+        with tracer.span("diagnostics.snapshot", path=file_path):
+            text = editor.toPlainText()
+        try:
+            future = processPool().submit(checkSource, text, file_path)
+        except RuntimeError as e:
+            # The pool is shutting down or broken
+            print(f"Error checking {file_path}: {str(e)}")
+            shutdownPool()
+            return
+        self.futures[file_path] = future
+        future.add_done_callback(
+            lambda done, path=file_path, gen=generation: self.jobFinished.emit(path, gen, done))
+
+    def onJobFinished(self, file_path, generation, future):
+        """Publish a check's results unless the text has changed since"""
+        if self.generations.get(file_path) != generation or future.cancelled():
+            return
+        if self.futures.get(file_path) is future:
+            del self.futures[file_path]
+        try:
+            diagnostics = future.result()
+        except Exception as e:
+            from concurrent.futures.process import BrokenProcessPool
+            if isinstance(e, BrokenProcessPool):
+                shutdownPool()
+            print(f"Error checking {file_path}: {str(e)}")
+            return
+        self.diagnosticsChanged.emit(file_path, diagnostics)
+
+    def shutdown(self):
+        """Stop checking; pending checks are cancelled"""
+        self.timer.stop()
+        self.pending.clear()
+        for file_path in list(self.futures):
+            self.cancel(file_path)
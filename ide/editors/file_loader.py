@@ -0,0 +1,147 @@
+"""
+Background file loading for PyIDE
+"""
+
+import codecs
+import io
+import os
+import time
+
+from PyQt6.QtCore import QThread, QSemaphore, pyqtSignal
+
+from ..instrumentation import tracer
+
+# Bytes read from disk per read call
+READ_CHUNK_SIZE = 256 * 1024
+# Decoded characters collected before they are handed to the GUI thread
+BATCH_CHARS = 256 * 1024
+# Longest time decoded text is held back before being handed over anyway
+BATCH_INTERVAL = 0.1
+# Batches handed over but not yet inserted, so the GUI is never flooded
+MAX_PENDING_BATCHES = 2
+# Bytes at the end of what was read kept to recognise later appends to the file
+TAIL_SIZE = 4096
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Decodes any bytes and writes them back unchanged, for files that turn out not to be UTF-8
+FALLBACK_ENCODING = 'latin-1'
+
+def detectEncoding(head):
+    """Guess the encoding of a file from its first chunk"""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+def fallbackEncoding(encoding):
+    """Return the encoding to try when a file guessed to be UTF-8 doesn't decode, or None"""
+    return FALLBACK_ENCODING if encoding in ('utf-8', 'utf-8-sig') else None
+
+class FileLoader(QThread):
+    """Thread that reads and decodes a file in chunks"""
+    # Decoded text ready to be appended to the document
+    textLoaded = pyqtSignal(str)
+    # Bytes read so far and total file size
+    progress = pyqtSignal(int, int)
+    # The text handed over so far should be dropped; the file is being decoded again from the start
+    restarted = pyqtSignal()
+    # Emitted with the detected encoding once the whole file is loaded
+    loaded = pyqtSignal(str)
+    # Emitted with an error message if the file could not be read
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.encoding = None
+        # (mtime, size) of what was read and its last TAIL_SIZE bytes, once loaded
+        self.stamp = None
+        self.tail = b''
+        self.pending_batches = QSemaphore(MAX_PENDING_BATCHES)
+
+    def batchInserted(self):
+        """Let the loader hand over another batch; call after inserting one"""
+        self.pending_batches.release()
+
+    def emitBatch(self, text):
+        """Hand a batch to the GUI thread once it has room, unless interrupted"""
+        while not self.pending_batches.tryAcquire(1, 50):
+            if self.isInterruptionRequested():
+                return False
+        self.textLoaded.emit(text)
+        return True
+
+    def run(self):
+        """Read the file, timing the whole read when instrumentation is on"""
+        with tracer.span("loader.read", path=self.file_path):
+            self.readFile()
+
+    def readFile(self):
+        """Read, decode and hand over the file in batches until done or interrupted"""
+        try:
+            total = os.path.getsize(self.file_path)
+            with open(self.file_path, 'rb') as f:
+                self.encoding = detectEncoding(f.read(READ_CHUNK_SIZE))
+                try:
+                    done = self.decodeFile(f, total)
+                except UnicodeDecodeError:
+                    # Only the first chunk was checked; bytes are never replaced, as saving would write the replacements
+                    fallback = fallbackEncoding(self.encoding)
+                    if fallback is None:
+                        raise
+                    self.encoding = fallback
+                    self.restarted.emit()
+                    done = self.decodeFile(f, total)
+                if not done:
+                    return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.loaded.emit(self.encoding)
+
+    def decodeFile(self, f, total):
+        """Decode the file from the start with self.encoding; returns False if interrupted"""
+        f.seek(0)
+        self.tail = b''
+        read = 0
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(self.encoding)(), translate=True)
+        data = f.read(READ_CHUNK_SIZE)
+        pending = []
+        pending_chars = 0
+        last_emit = time.monotonic()
+        while data:
+            if self.isInterruptionRequested():
+                return False
+            read += len(data)
+            self.tail = (self.tail + data[-TAIL_SIZE:])[-TAIL_SIZE:]
+            text = decoder.decode(data)
+            pending.append(text)
+            pending_chars += len(text)
+
+            now = time.monotonic()
+            if pending_chars >= BATCH_CHARS or now - last_emit >= BATCH_INTERVAL:
+                if not self.emitBatch("".join(pending)):
+                    return False
+                self.progress.emit(read, total)
+                pending = []
+                pending_chars = 0
+                last_emit = now
+            data = f.read(READ_CHUNK_SIZE)
+
+        pending.append(decoder.decode(b'', final=True))
+        self.stamp = (os.fstat(f.fileno()).st_mtime_ns, read)
+        if not self.emitBatch("".join(pending)):
+            return False
+        self.progress.emit(read, total)
+        return True
@@ -0,0 +1,369 @@
+"""
+External file change watcher for PyIDE
+"""
+
+import codecs
+import difflib
+import io
+import os
+
+from PyQt6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from PyQt6.QtGui import QTextCursor
+
+from .code_editor import CodeEditor
+from .large_file_view import LargeFileView
+from .file_loader import READ_CHUNK_SIZE, TAIL_SIZE, detectEncoding, fallbackEncoding
+from .file_writer import fileStamp
+from ..instrumentation import tracer
+
+# Milliseconds change notifications are collected before the files are read
+CHANGE_DELAY = 100
+# Changed regions larger than this (old lines times new lines) are replaced whole instead of diffed
+MAX_DIFF_WORK = 10 * 1000 * 1000
+
+class FileState:
+    """The version of a file that a view's text was last in step with"""
+    def __init__(self, stamp, tail, encoding, decoder_state=None):
+        # (mtime, size) as fileStamp returns it
+        self.stamp = stamp
+        # The last TAIL_SIZE bytes the text was read from
+        self.tail = tail
+        self.encoding = encoding
+        # Incremental decoder state after the last byte read, for decoding appends
+        self.decoder_state = decoder_state
+
+    def size(self):
+        """Return how many bytes of the file the text was read from"""
+        return self.stamp[1]
+
+def readTail(file_path, size):
+    """Return up to TAIL_SIZE bytes of a file, ending at byte offset size"""
+    start = max(0, size - TAIL_SIZE)
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        return f.read(size - start)
+
+def diskState(file_path, encoding):
+    """Return the state of a file as it is on disk now, or None if it can't be read"""
+    stamp = fileStamp(file_path)
+    if stamp is None:
+        return None
+    try:
+        return FileState(stamp, readTail(file_path, stamp[1]), encoding)
+    except OSError:
+        return None
+
+def isAppend(file_path, state, stamp):
+    """Return whether a file has only grown past the end that state was read up to"""
+    if stamp[1] < state.size():
+        return False
+    try:
+        return readTail(file_path, state.size()) == state.tail
+    except OSError:
+        return False
+
+def newlineDecoder(encoding):
+    """Return an incremental decoder that turns every line ending into "\\n", as the loader does
+
+    Bytes that don't decode raise rather than being replaced, since a view
+    holding replacement characters would write them back when saved.
+    """
+    return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+
+def splitLines(text):
+    """Split text into lines that keep their "\\n", so joining them gives the text back"""
+    lines = text.split('\n')
+    return [line + '\n' for line in lines[:-1]] + [lines[-1]]
+
+def lineEdits(old_text, new_text):
+    """Return the (first line, end line, new text) edits that turn old_text into new_text
+
+    Edits are ordered last first, so applying them in order leaves the
+    line numbers of the ones still to come valid.
+    """
+    old = splitLines(old_text)
+    new = splitLines(new_text)
+    # Only the lines between the common head and tail can differ
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = new[prefix:len(new) - suffix]
+    if not old_middle and not new_middle:
+        return []
+    if len(old_middle) * len(new_middle) > MAX_DIFF_WORK:
+        return [(prefix, prefix + len(old_middle), ''.join(new_middle))]
+
+    edits = []
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            edits.append((prefix + i1, prefix + i2, ''.join(new_middle[j1:j2])))
+    edits.reverse()
+    return edits
+
+def linePosition(document, line):
+    """Return the position where a 0-based line starts, or the end of the document past the last one"""
+    block = document.findBlockByNumber(line)
+    if block.isValid():
+        return block.position()
+    return document.characterCount() - 1
+
+class ChangeReader(QThread):
+    """Thread that reads what changed in a file since a known state"""
+    # Decoded text appended to the file and the state after it
+    appended = pyqtSignal(str, object)
+    # Edits from lineEdits and the state after them
+    replaced = pyqtSignal(list, object)
+    # Emitted with an error message if the file could not be read
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, state, snapshot=None, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.state = state
+        # The editor's text to diff against, or None to read only what was appended
+        self.snapshot = snapshot
+
+    def run(self):
+        """Read the appended bytes, or the whole file and diff it"""
+        try:
+            if self.snapshot is None:
+                self.readAppend()
+            else:
+                self.readRewrite()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def readAppend(self):
+        """Decode the bytes past the known end of the file"""
+        with tracer.span("watcher.readAppend", path=self.file_path):
+            with open(self.file_path, 'rb') as f:
+                f.seek(self.state.size())
+                data = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+            decoder = newlineDecoder(self.state.encoding)
+            if self.state.decoder_state is not None:
+                decoder.setstate(self.state.decoder_state)
+            text = decoder.decode(data)
+        state = FileState((mtime, self.state.size() + len(data)),
+                          (self.state.tail + data[-TAIL_SIZE:])[-TAIL_SIZE:],
+                          self.state.encoding, decoder.getstate())
+        self.appended.emit(text, state)
+
+    def readRewrite(self):
+        """Read the whole file and diff its lines against the snapshot"""
+        with tracer.span("watcher.diff", path=self.file_path):
+            with open(self.file_path, 'rb') as f:
+                data = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+            encoding = detectEncoding(data[:READ_CHUNK_SIZE])
+            try:
+                text = newlineDecoder(encoding).decode(data, final=True)
+            except UnicodeDecodeError:
+                encoding = fallbackEncoding(encoding)
+                if encoding is None:
+                    raise
+                text = newlineDecoder(encoding).decode(data, final=True)
+            edits = lineEdits(self.snapshot, text)
+        self.replaced.emit(edits, FileState((mtime, len(data)), data[-TAIL_SIZE:], encoding))
+
+class FileWatcher(QObject):
+    """Watches the files open in a TabWidget and brings their views up to date when they change on disk
+
+    Files that only grew have just the new bytes read and appended; any
+    other change is diffed by line on a worker thread and only the changed
+    blocks are replaced, in one undo step. Editors with unsaved changes are
+    left alone.
+    """
+    # File path of an editor with unsaved changes whose file changed on disk
+    conflict = pyqtSignal(str)
+
+    def __init__(self, tabs):
+        super().__init__(tabs)
+        self.tabs = tabs
+        self.states = {}
+        self.readers = {}
+        self.changed = set()
+        # Files whose views keep the end of the file in sight as it grows
+        self.following = set()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.onFileChanged)
+        # Changes are collected rather than debounced, so a file that never stops growing is still read
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(CHANGE_DELAY)
+        self.timer.timeout.connect(self.checkChanged)
+
+    def track(self, file_path, state):
+        """Watch a file whose view is in step with state"""
+        if state is None:
+            return
+        self.states[file_path] = state
+        if file_path not in self.watcher.files():
+            self.watcher.addPath(file_path)
+        if fileStamp(file_path) != state.stamp:
+            # It changed while it was being read
+            self.onFileChanged(file_path)
+
+    def resync(self, file_path):
+        """Take the file on disk as what its view shows, after the view was saved to it"""
+        widget = self.tabs.open_files.get(file_path)
+        if isinstance(widget, CodeEditor):
+            self.track(file_path, diskState(file_path, widget.encoding))
+
+    def forget(self, file_path):
+        """Stop watching a file; a read in progress is ignored when it finishes"""
+        self.states.pop(file_path, None)
+        self.readers.pop(file_path, None)
+        self.changed.discard(file_path)
+        self.following.discard(file_path)
+        if file_path in self.watcher.files():
+            self.watcher.removePath(file_path)
+
+    def setFollowing(self, file_path, follow):
+        """Keep the end of a file in view as it grows, or stop doing so"""
+        if follow:
+            self.following.add(file_path)
+        else:
+            self.following.discard(file_path)
+        widget = self.tabs.open_files.get(file_path)
+        if isinstance(widget, LargeFileView):
+            widget.setFollow(follow)
+        elif isinstance(widget, CodeEditor) and follow:
+            widget.moveCursor(QTextCursor.MoveOperation.End)
+
+    def isFollowing(self, file_path):
+        """Return whether a file's view follows its end"""
+        return file_path in self.following
+
+    def onFileChanged(self, file_path):
+        """Note a change; changed files are read together shortly after"""
+        self.changed.add(file_path)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def checkChanged(self):
+        """Bring every file changed since the last check up to date"""
+        changed = self.changed
+        self.changed = set()
+        for file_path in changed:
+            self.check(file_path)
+
+    def check(self, file_path):
+        """Start reading what changed in a file, if its view can take it"""
+        state = self.states.get(file_path)
+        if state is None:
+            return
+        if file_path not in self.watcher.files() and os.path.exists(file_path):
+            # Files replaced by a rename, as atomic saves do, drop out of the watch list
+            self.watcher.addPath(file_path)
+        if file_path in self.readers:
+            # Checked again once the current read finishes
+            self.changed.add(file_path)
+            return
+        stamp = fileStamp(file_path)
+        if stamp is None or stamp == state.stamp:
+            return
+
+        widget = self.tabs.open_files.get(file_path)
+        if isinstance(widget, LargeFileView):
+            widget.reload()
+            self.states[file_path] = diskState(file_path, state.encoding) or state
+            return
+        if (not isinstance(widget, CodeEditor) or file_path in self.tabs.loaders
+                or self.tabs.writer.isPending(file_path)):
+            return
+        if self.tabs.isDirty(widget):
+            self.conflict.emit(file_path)
+            return
+
+        if isAppend(file_path, state, stamp):
+            reader = ChangeReader(file_path, state, None, self)
+        else:
+            with tracer.span("watcher.snapshot", path=file_path):
+                reader = ChangeReader(file_path, state, widget.toPlainText(), self)
+        revision = widget.document().revision()
+        reader.appended.connect(lambda text, new_state: self.applyAppend(file_path, reader, text, new_state))
+        reader.replaced.connect(
+            lambda edits, new_state: self.applyEdits(file_path, reader, revision, edits, new_state))
+        reader.failed.connect(lambda message: print(f"Error reading changes to {file_path}: {message}"))
+        reader.finished.connect(lambda: self.onReaderFinished(file_path, reader))
+        reader.finished.connect(reader.deleteLater)
+        self.readers[file_path] = reader
+        reader.start()
+
+    def currentEditor(self, file_path, reader):
+        """Return the editor a read's results are for, or None if they no longer apply"""
+        editor = self.tabs.open_files.get(file_path)
+        if self.readers.get(file_path) is not reader or not isinstance(editor, CodeEditor):
+            return None
+        if self.tabs.isDirty(editor):
+            # Edited while the file was being read
+            self.conflict.emit(file_path)
+            return None
+        return editor
+
+    def applyAppend(self, file_path, reader, text, state):
+        """Append the text a file grew by to its editor"""
+        editor = self.currentEditor(file_path, reader)
+        if editor is None:
+            return
+        if text:
+            with tracer.span("watcher.append", path=file_path, chars=len(text)):
+                document = editor.document()
+                cursor = QTextCursor(document)
+                cursor.movePosition(QTextCursor.MoveOperation.End)
+                cursor.insertText(text)
+                document.setModified(False)
+        self.states[file_path] = state
+        if file_path in self.following:
+            editor.moveCursor(QTextCursor.MoveOperation.End)
+
+    def applyEdits(self, file_path, reader, revision, edits, state):
+        """Replace the lines of an editor that differ from its file, as one undo step"""
+        editor = self.currentEditor(file_path, reader)
+        if editor is None:
+            return
+        document = editor.document()
+        if document.revision() != revision:
+            # The edits were worked out against older text
+            self.changed.add(file_path)
+            return
+        if edits:
+            scroll = editor.verticalScrollBar().value()
+            with tracer.span("watcher.applyEdits", path=file_path, edits=len(edits)):
+                cursor = QTextCursor(document)
+                cursor.beginEditBlock()
+                for start, end, text in edits:
+                    cursor.setPosition(linePosition(document, start))
+                    cursor.setPosition(linePosition(document, end), QTextCursor.MoveMode.KeepAnchor)
+                    cursor.insertText(text)
+                cursor.endEditBlock()
+                document.setModified(False)
+            if file_path in self.following:
+                editor.moveCursor(QTextCursor.MoveOperation.End)
+            else:
+                editor.verticalScrollBar().setValue(scroll)
+        editor.encoding = state.encoding
+        self.states[file_path] = state
+
+    def onReaderFinished(self, file_path, reader):
+        """Check changes that arrived while a file was being read"""
+        if self.readers.get(file_path) is reader:
+            del self.readers[file_path]
+        if self.changed and not self.timer.isActive():
+            self.timer.start()
+
+    def shutdown(self):
+        """Stop watching and wait for reads in progress"""
+        self.timer.stop()
+        self.changed.clear()
+        readers = list(self.readers.values())
+        self.readers.clear()
+        for reader in readers:
+            reader.wait()
@@ -0,0 +1,140 @@
+"""
+Background atomic file writing for PyIDE
+"""
+
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from ..instrumentation import tracer
+
+def processUmask():
+    """Return the umask; briefly sets it to 0, so only call it before worker threads start"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+# Permissions of new files; read at import, on the GUI thread, since the umask is process-wide
+NEW_FILE_MODE = 0o666 & ~processUmask()
+
+def writeAtomically(file_path, data):
+    """Replace a file's contents so a crash leaves either the old or the new file"""
+    # A symlink keeps pointing at the file, which is what gets replaced
+    file_path = os.path.realpath(file_path)
+    directory = os.path.dirname(file_path)
+    try:
+        mode = os.stat(file_path).st_mode & 0o7777
+    except FileNotFoundError:
+        # New files get the usual permissions rather than mkstemp's private ones
+        mode = NEW_FILE_MODE
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if hasattr(os, 'O_DIRECTORY'):
+        # Make the rename itself durable
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def fileStamp(file_path):
+    """Return (mtime, size) identifying the current version of a file, or None"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class FileWriter(QThread):
+    """Thread that encodes and writes queued saves; later saves of a path replace earlier ones"""
+    # File path and the token passed to save()
+    saved = pyqtSignal(str, object)
+    # File path, token and error message
+    failed = pyqtSignal(str, object, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        # Latest job per path; older queued jobs for the same path are skipped
+        self.latest = {}
+        # Per path: hash of the bytes last written and the file's stamp afterwards
+        self.written = {}
+
+    def save(self, file_path, text, encoding, token=None):
+        """Queue text to be written to file_path"""
+        job = (file_path, text, encoding, token)
+        with self.lock:
+            self.latest[file_path] = job
+        self.jobs.put(job)
+        if not self.isRunning():
+            self.start()
+
+    def isPending(self, file_path):
+        """Return whether a save of file_path is queued or being written"""
+        with self.lock:
+            return file_path in self.latest
+
+    def stop(self):
+        """Finish the queued saves, then end the thread"""
+        if self.isRunning():
+            self.jobs.put(None)
+            self.wait()
+
+    def run(self):
+        """Write jobs as they arrive"""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            file_path, text, encoding, token = job
+            with self.lock:
+                if self.latest.get(file_path) is not job:
+                    # Superseded by a newer save of the same file
+                    continue
+            try:
+                with tracer.span("writer.save", path=file_path, chars=len(text)):
+                    self.write(file_path, text, encoding)
+            except Exception as e:
+                error = str(e)
+            else:
+                error = None
+            with self.lock:
+                if self.latest.get(file_path) is job:
+                    del self.latest[file_path]
+            if error is None:
+                self.saved.emit(file_path, token)
+            else:
+                self.failed.emit(file_path, token, error)
+
+    def write(self, file_path, text, encoding):
+        """Encode and write one file, unless the disk already holds exactly these bytes"""
+        if os.linesep != '\n':
+            text = text.replace('\n', os.linesep)
+        data = text.encode(encoding)
+        digest = hashlib.sha1(data).digest()
+        last = self.written.get(file_path)
+        if last is not None and last == (digest, fileStamp(file_path)):
+            # Edited back to what was last saved, and nothing else touched the file
+            tracer.count("writer.skipped")
+            return
+        writeAtomically(file_path, data)
+        self.written[file_path] = (digest, fileStamp(file_path))
@@ -0,0 +1,336 @@
+"""
+Read-only large file viewer for PyIDE
+"""
+
+import mmap
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+
+from PyQt6.QtWidgets import QAbstractScrollArea, QApplication
+from PyQt6.QtGui import QFont, QPainter, QColor
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+
+# Bytes covered by one entry of the sparse line index
+INDEX_CHUNK_SIZE = 1 << 16
+# Longest prefix of a single line that is ever decoded and drawn
+MAX_LINE_BYTES = 1 << 14
+
+class LineIndex:
+    """Sparse line-offset index over a memory-mapped file"""
+    def __init__(self, mm):
+        self.mm = mm
+        self.size = len(mm)
+        # chunk_lines[i] is the number of newlines before byte i * INDEX_CHUNK_SIZE
+        self.chunk_lines = array('q', [0])
+        self.complete = self.size == 0
+        self.last_line = 0
+        self.last_offset = 0
+
+    def indexedBytes(self):
+        """Return how many bytes of the file have been indexed"""
+        return min((len(self.chunk_lines) - 1) * INDEX_CHUNK_SIZE, self.size)
+
+    def extend(self, mm):
+        """Take over a new mapping of the file after it grew, keeping the lines indexed so far"""
+        if (len(self.chunk_lines) - 1) * INDEX_CHUNK_SIZE > self.size:
+            # The last entry only counted up to the old end of the file
+            self.chunk_lines.pop()
+        self.mm = mm
+        self.size = len(mm)
+        self.complete = False
+
+    def lineCount(self):
+        """Return the number of lines indexed so far"""
+        return self.chunk_lines[-1] + 1
+
+    def indexChunk(self):
+        """Index the next chunk of the file, returning False once done"""
+        start = self.indexedBytes()
+        if start >= self.size:
+            self.complete = True
+            return False
+        end = min(start + INDEX_CHUNK_SIZE, self.size)
+        self.chunk_lines.append(self.chunk_lines[-1] + self.mm[start:end].count(b'\n'))
+        return True
+
+    def lineOffset(self, line):
+        """Return the byte offset where a line starts, or None if not indexed yet"""
+        if line <= 0:
+            return 0
+        if line >= self.lineCount():
+            return None
+
+        # Walk forward from the last lookup when scrolling sequentially
+        if self.last_line <= line < self.last_line + 256:
+            offset = self.last_offset
+            remaining = line - self.last_line
+        else:
+            # The line starts after the line-th newline, which lies in this chunk
+            chunk = bisect_left(self.chunk_lines, line) - 1
+            offset = chunk * INDEX_CHUNK_SIZE
+            remaining = line - self.chunk_lines[chunk]
+
+        while remaining:
+            offset = self.newlineAfter(offset) + 1
+            remaining -= 1
+
+        self.last_line = line
+        self.last_offset = offset
+        return offset
+
+    def newlineAfter(self, position):
+        """Return the offset of the first newline at or after position, or -1 if none is indexed
+
+        Chunks without a newline are skipped using the index, so a very long
+        line never means scanning to the end of the file.
+        """
+        chunk = position // INDEX_CHUNK_SIZE
+        indexed_chunks = len(self.chunk_lines) - 1
+        if chunk >= indexed_chunks:
+            return -1
+        newline = self.mm.find(b'\n', position, min((chunk + 1) * INDEX_CHUNK_SIZE, self.size))
+        if newline != -1:
+            return newline
+        # The next newline is in the chunk before the count next goes up
+        following = bisect_right(self.chunk_lines, self.chunk_lines[chunk + 1])
+        if following > indexed_chunks:
+            return -1
+        start = (following - 1) * INDEX_CHUNK_SIZE
+        return self.mm.find(b'\n', start, min(start + INDEX_CHUNK_SIZE, self.size))
+
+    def lineText(self, offset):
+        """Decode the line starting at a byte offset, truncated to MAX_LINE_BYTES, and the next line's offset
+
+        The next offset is None when the end of a truncated line hasn't been indexed yet.
+        """
+        end = self.mm.find(b'\n', offset, offset + MAX_LINE_BYTES)
+        if end != -1:
+            return self.mm[offset:end].decode('utf-8', errors='replace').rstrip('\r'), end + 1
+        end = min(offset + MAX_LINE_BYTES, self.size)
+        # The rest of a truncated line isn't shown; the next line starts after its newline
+        newline = self.newlineAfter(end)
+        if newline != -1:
+            next_offset = newline + 1
+        else:
+            next_offset = self.size + 1 if self.complete else None
+        return self.mm[offset:end].decode('utf-8', errors='replace').rstrip('\r'), next_offset
+
+class LineIndexer(QThread):
+    """Background thread that builds a LineIndex"""
+    progress = pyqtSignal(int)
+
+    # Emit progress every this many indexed chunks
+    PROGRESS_CHUNKS = 256
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+
+    def run(self):
+        """Index the whole file, reporting progress as lines become available"""
+        chunks = 0
+        while not self.isInterruptionRequested() and self.index.indexChunk():
+            chunks += 1
+            if chunks % self.PROGRESS_CHUNKS == 0:
+                self.progress.emit(self.index.indexedBytes())
+        self.progress.emit(self.index.indexedBytes())
+
+class LargeFileView(QAbstractScrollArea):
+    """Read-only viewer that only decodes and paints the lines in the viewport"""
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.file = open(file_path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = LineIndex(self.mm)
+        self.max_columns = 0
+        # Top line to restore once enough of the file has been indexed
+        self.pending_top_line = None
+        # Whether the view keeps the end of the file in sight as it grows
+        self.follow = False
+        self.setupFont()
+        self.setStyleSheet("QAbstractScrollArea { background-color: #272822; color: #F8F8F2; }")
+        self.verticalScrollBar().setSingleStep(1)
+        self.horizontalScrollBar().setSingleStep(1)
+
+        self.indexer = LineIndexer(self.index, self)
+        self.indexer.progress.connect(self.onIndexProgress)
+        self.indexer.start()
+
+    def setupFont(self):
+        """Set up the viewer font"""
+        font = QFont("Consolas", 10)
+        font.setFixedPitch(True)
+        self.setFont(font)
+
+    def isReadOnly(self):
+        """Large files are never editable"""
+        return True
+
+    def undo(self):
+        """Nothing to undo in a read-only view"""
+
+    def redo(self):
+        """Nothing to redo in a read-only view"""
+
+    def cut(self):
+        """Cutting is not supported in a read-only view"""
+
+    def copy(self):
+        """Copy the first visible line to the clipboard"""
+        offset = self.index.lineOffset(self.verticalScrollBar().value())
+        if offset is not None:
+            QApplication.clipboard().setText(self.index.lineText(offset)[0])
+
+    def paste(self):
+        """Pasting is not supported in a read-only view"""
+
+    def selectAll(self):
+        """Selection is not supported in a read-only view"""
+
+    def lineCount(self):
+        """Return the number of lines indexed so far"""
+        return self.index.lineCount()
+
+    def visibleLineCount(self):
+        """Return how many lines fit in the viewport"""
+        return max(1, self.viewport().height() // self.fontMetrics().height())
+
+    def goToLine(self, line, column=None):
+        """Scroll so the given 1-based line is at the top of the viewport; there is no cursor to place"""
+        self.verticalScrollBar().setValue(max(0, line - 1))
+
+    def viewState(self):
+        """Return the scroll position, for restoring the view later"""
+        if self.pending_top_line is not None:
+            return {"cursor": 0, "scroll": self.pending_top_line}
+        return {"cursor": 0, "scroll": self.verticalScrollBar().value()}
+
+    def restoreViewState(self, state):
+        """Scroll back to a saved position once it has been indexed"""
+        self.pending_top_line = state.get("scroll", 0)
+        self.onIndexProgress(self.index.indexedBytes())
+
+    def memoryUsage(self):
+        """Return the bytes of the line index; the mapped file is left to the page cache"""
+        return len(self.index.chunk_lines) * self.index.chunk_lines.itemsize
+
+    def reload(self):
+        """Catch up with the file after it changed on disk; the index is kept if the file only grew"""
+        self.indexer.requestInterruption()
+        self.indexer.wait()
+        old_mm = self.mm
+        old_file = self.file
+        try:
+            stat = os.stat(self.file_path)
+            if os.path.samestat(stat, os.fstat(self.file.fileno())) and stat.st_size > self.index.size:
+                self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.index.extend(self.mm)
+            else:
+                self.file = open(self.file_path, 'rb')
+                self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.index = LineIndex(self.mm)
+                self.indexer.index = self.index
+        except (OSError, ValueError) as e:
+            # Keep showing what was there; an empty file can't be mapped
+            print(f"Error reloading {self.file_path}: {str(e)}")
+            if self.file is not old_file:
+                self.file.close()
+            self.file = old_file
+            self.mm = old_mm
+            self.indexer.start()
+            return
+        old_mm.close()
+        if self.file is not old_file:
+            old_file.close()
+        self.indexer.start()
+
+    def setFollow(self, follow):
+        """Keep the end of the file in sight as it grows, or stop doing so"""
+        self.follow = follow
+        if follow:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+
+    def onIndexProgress(self, indexed_bytes):
+        """Grow the scroll range as more of the file is indexed"""
+        self.updateScrollBars()
+        if self.follow:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        elif self.pending_top_line is not None:
+            self.verticalScrollBar().setValue(self.pending_top_line)
+            if self.verticalScrollBar().value() == self.pending_top_line or self.index.complete:
+                self.pending_top_line = None
+        self.viewport().update()
+
+    def updateScrollBars(self):
+        """Size the scroll bars to the indexed lines and widest painted line"""
+        page = self.visibleLineCount()
+        self.verticalScrollBar().setPageStep(page)
+        self.verticalScrollBar().setRange(0, max(0, self.lineCount() - page))
+        columns = self.viewport().width() // max(1, self.fontMetrics().horizontalAdvance(' '))
+        self.horizontalScrollBar().setPageStep(columns)
+        self.horizontalScrollBar().setRange(0, max(0, self.max_columns - columns))
+
+    def resizeEvent(self, event):
+        """Recompute the scroll ranges for the new viewport size"""
+        super().resizeEvent(event)
+        self.updateScrollBars()
+
+    def scrollContentsBy(self, dx, dy):
+        """Repaint instead of scrolling pixels, since only visible lines exist"""
+        self.viewport().update()
+
+    def keyPressEvent(self, event):
+        """Handle document start/end navigation"""
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier and event.key() == Qt.Key.Key_Home:
+            self.verticalScrollBar().setValue(0)
+        elif event.modifiers() & Qt.KeyboardModifier.ControlModifier and event.key() == Qt.Key.Key_End:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        else:
+            super().keyPressEvent(event)
+
+    def paintEvent(self, event):
+        """Paint the lines in the viewport and their line numbers"""
+        painter = QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        line_height = metrics.height()
+        char_width = max(1, metrics.horizontalAdvance(' '))
+        first = self.verticalScrollBar().value()
+        last = min(first + self.visibleLineCount() + 1, self.lineCount())
+        gutter = (len(str(last)) + 2) * char_width
+        x = gutter - self.horizontalScrollBar().value() * char_width
+
+        painter.fillRect(0, 0, gutter, self.viewport().height(), QColor("#2F2F2F"))
+        widest = self.max_columns
+        offset = self.index.lineOffset(first)
+        y = metrics.ascent()
+        for line in range(first, last):
+            if offset is None or offset > self.index.size:
+                break
+            text, offset = self.index.lineText(offset)
+            widest = max(widest, len(text))
+            painter.setPen(QColor("#90908A"))
+            painter.drawText(char_width, y, str(line + 1))
+            painter.setClipRect(gutter, 0, self.viewport().width() - gutter, self.viewport().height())
+            painter.setPen(QColor("#F8F8F2"))
+            painter.drawText(x, y, text)
+            painter.setClipping(False)
+            y += line_height
+        painter.end()
+
+        if widest != self.max_columns:
+            self.max_columns = widest
+            self.updateScrollBars()
+
+    def stopIndexing(self):
+        """Interrupt the indexer and wait for its thread to exit"""
+        self.indexer.requestInterruption()
+        self.indexer.wait()
+
+    def closeEvent(self, event):
+        """Stop indexing and release the mapping"""
+        self.stopIndexing()
+        self.mm.close()
+        self.file.close()
+        super().closeEvent(event)
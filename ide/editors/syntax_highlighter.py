@@ -0,0 +1,212 @@
+"""
+Incremental syntax highlighter for PyIDE
+"""
+
+from pygments.lexer import RegexLexer, ExtendedRegexLexer
+from pygments.lexers import get_lexer_for_filename
+from pygments.styles import get_style_by_name
+from pygments.token import Error, Whitespace, _TokenType
+from pygments.util import ClassNotFound
+from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
+from PyQt6.QtCore import QTimer
+
+from ..instrumentation import tracer
+
+# Block state used by Qt for blocks that have never been highlighted
+NO_STATE = -1
+# Block state for blocks the initial pass has not reached yet
+PENDING_STATE = -2
+# Number of blocks highlighted per event loop iteration on the initial pass
+CHUNK_BLOCKS = 200
+# Edits spanning more blocks than this leave all but their first chunk to the chunked pass
+LARGE_EDIT_BLOCKS = 1000
+
+def preloadLexers(file_names=("module.py",)):
+    """Import the lexers and style for common files ahead of the first open"""
+    for file_name in file_names:
+        try:
+            get_lexer_for_filename(file_name)
+        except ClassNotFound:
+            pass
+    get_style_by_name("monokai")
+
+class SyntaxHighlighter(QSyntaxHighlighter):
+    """Per-block Pygments highlighter that carries lexer state between blocks"""
+    def __init__(self, document, lexer, style_name="monokai"):
+        # Attach after connecting, so large edits are seen before Qt relexes them
+        super().__init__(None)
+        self.setParent(document)
+        self.lexer = lexer
+        self.style = get_style_by_name(style_name)
+        self.formats = {}
+        # Lexer state stacks are interned so a block state is a small int
+        self.states = {}
+        self.stacks = []
+        self.stateful = isinstance(lexer, RegexLexer) and not isinstance(lexer, ExtendedRegexLexer)
+        
+        # Highlight large documents a chunk at a time so opening never stalls
+        self.highlight_limit = CHUNK_BLOCKS
+        self.chunk_timer = QTimer(self)
+        self.chunk_timer.setInterval(0)
+        self.chunk_timer.timeout.connect(self.highlightNextChunk)
+        # Blocks Qt relexes in full before a large edit's remaining blocks are skipped
+        self.deferred_after = None
+        document.contentsChange.connect(self.onContentsChange)
+        self.setDocument(document)
+
+    @classmethod
+    def forFile(cls, document, file_path):
+        """Create a highlighter for the file's language, or None if unknown"""
+        try:
+            lexer = get_lexer_for_filename(file_path, stripnl=False, ensurenl=False)
+        except ClassNotFound:
+            return None
+        return cls(document, lexer)
+
+    def onContentsChange(self, position, removed, added):
+        """Leave most of a large edit, such as a replace-all or its undo, to the chunked pass"""
+        self.deferred_after = None
+        document = self.document()
+        first = document.findBlock(position).blockNumber()
+        last = document.findBlock(position + added).blockNumber()
+        if last - first > LARGE_EDIT_BLOCKS:
+            self.highlight_limit = min(self.highlight_limit, first + CHUNK_BLOCKS)
+            # Qt relexes in order from the first changed block, so counting calls
+            # is enough to tell when the limit is reached
+            self.deferred_after = self.highlight_limit - first
+            self.chunk_timer.start()
+
+    def highlightBlock(self, text):
+        """Lex a single block, resuming from the previous block's lexer state"""
+        if self.deferred_after is not None:
+            if self.deferred_after <= 0:
+                # Every later block of the edit is pending; skip the limit check
+                self.setCurrentBlockState(PENDING_STATE)
+                return
+            self.deferred_after -= 1
+        if self.currentBlock().blockNumber() >= self.highlight_limit:
+            self.setCurrentBlockState(PENDING_STATE)
+            if not self.chunk_timer.isActive():
+                self.chunk_timer.start()
+            return
+        if tracer.enabled:
+            tracer.count("highlight.blocks")
+        
+        if self.stateful:
+            stack = self.stackForState(self.previousBlockState())
+            tokens, stack = self.lexLine(text + "\n", stack)
+            self.setCurrentBlockState(self.stateForStack(stack))
+        else:
+            tokens = self.lexer.get_tokens_unprocessed(text + "\n")
+
+        length = len(text)
+        for pos, ttype, value in tokens:
+            if pos >= length:
+                break
+            fmt = self.formatFor(ttype)
+            if fmt is not None:
+                self.setFormat(pos, min(len(value), length - pos), fmt)
+
+    def highlightNextChunk(self):
+        """Extend the initial pass over the next chunk of pending blocks"""
+        document = self.document()
+        block = document.findBlockByNumber(self.highlight_limit) if document else None
+        if block is None or not block.isValid():
+            self.chunk_timer.stop()
+            return
+        self.deferred_after = None
+        self.highlight_limit += CHUNK_BLOCKS
+        # Qt keeps going while block states change, i.e. up to the new limit
+        with tracer.span("highlight.chunk", first_block=block.blockNumber()):
+            self.rehighlightBlock(block)
+
+    def lexLine(self, text, stack):
+        """Run the lexer's state machine over one line and return its end state"""
+        # Mirrors RegexLexer.get_tokens_unprocessed, which does not expose its stack
+        lexer = self.lexer
+        tokendefs = lexer._tokens
+        statestack = list(stack)
+        statetokens = tokendefs[statestack[-1]]
+        tokens = []
+        pos = 0
+        while True:
+            for rexmatch, action, new_state in statetokens:
+                m = rexmatch(text, pos)
+                if m:
+                    if action is not None:
+                        if type(action) is _TokenType:
+                            tokens.append((pos, action, m.group()))
+                        else:
+                            tokens.extend(action(lexer, m))
+                    pos = m.end()
+                    if new_state is not None:
+                        if isinstance(new_state, tuple):
+                            for state in new_state:
+                                if state == '#pop':
+                                    if len(statestack) > 1:
+                                        statestack.pop()
+                                elif state == '#push':
+                                    statestack.append(statestack[-1])
+                                else:
+                                    statestack.append(state)
+                        elif isinstance(new_state, int):
+                            if abs(new_state) >= len(statestack):
+                                del statestack[1:]
+                            else:
+                                del statestack[new_state:]
+                        elif new_state == '#push':
+                            statestack.append(statestack[-1])
+                        statetokens = tokendefs[statestack[-1]]
+                    break
+            else:
+                if pos >= len(text):
+                    break
+                if text[pos] == '\n':
+                    statestack = ['root']
+                    statetokens = tokendefs['root']
+                    tokens.append((pos, Whitespace, '\n'))
+                else:
+                    tokens.append((pos, Error, text[pos]))
+                pos += 1
+        return tokens, tuple(statestack)
+
+    def stackForState(self, state):
+        """Return the lexer stack stored under a block state"""
+        if state < 0:
+            return ('root',)
+        return self.stacks[state]
+
+    def stateForStack(self, stack):
+        """Return the block state for a lexer stack, interning new stacks"""
+        if stack == ('root',):
+            return NO_STATE
+        state = self.states.get(stack)
+        if state is None:
+            state = len(self.stacks)
+            self.stacks.append(stack)
+            self.states[stack] = state
+        return state
+
+    def formatFor(self, ttype):
+        """Return the cached character format for a token type"""
+        try:
+            return self.formats[ttype]
+        except KeyError:
+            pass
+
+        style = self.style.style_for_token(ttype)
+        fmt = None
+        if style['color'] or style['bgcolor'] or style['bold'] or style['italic'] or style['underline']:
+            fmt = QTextCharFormat()
+            if style['color']:
+                fmt.setForeground(QColor(f"#{style['color']}"))
+            if style['bgcolor']:
+                fmt.setBackground(QColor(f"#{style['bgcolor']}"))
+            if style['bold']:
+                fmt.setFontWeight(QFont.Weight.Bold)
+            if style['italic']:
+                fmt.setFontItalic(True)
+            if style['underline']:
+                fmt.setFontUnderline(True)
+        self.formats[ttype] = fmt
+        return fmt
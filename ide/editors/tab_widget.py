@@ -3,60 +3,512 @@ Editor tabs component for PyIDE
 """
 
 import os
-from PyQt6.QtWidgets import QTabWidget, QMessageBox
+import time
+from collections import OrderedDict
+from PyQt6.QtWidgets import QTabWidget, QMessageBox, QWidget
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtCore import pyqtSignal, QTimer
 
 from .code_editor import CodeEditor
+from .large_file_view import LargeFileView
+from .file_loader import FileLoader
+from .file_writer import FileWriter
+from .file_watcher import FileWatcher, FileState, diskState
+from ..instrumentation import tracer
+
+# Files at least this large open in the read-only large file viewer
+LARGE_FILE_THRESHOLD = 32 * 1024 * 1024
+# Milliseconds without edits before autosave writes, when it is enabled
+AUTOSAVE_DELAY = 1000
+# Least recently used tabs beyond this many editors are hibernated
+MAX_LIVE_TABS = 30
+# Estimated editor memory, in bytes, kept before least recently used tabs are hibernated
+MAX_LIVE_MEMORY = 512 * 1024 * 1024
+# Milliseconds after a tab change before idle tabs are hibernated
+HIBERNATE_DELAY = 500
+
+def formatMemory(size):
+    """Return a byte count as a short human readable string"""
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} KB"
+    if size < 1024 * 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / (1024 * 1024 * 1024):.2f} GB"
+
+class TabStub(QWidget):
+    """Placeholder for a restored or hibernated tab whose file is read when it is next shown"""
+    def __init__(self, file_path, view_state=None, mtime=None, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.view_state = view_state or {}
+        # Modification time of the file when its editor was hibernated
+        self.mtime = mtime
+
+    def isReadOnly(self):
+        """Stubs can't be edited or saved"""
+        return True
+
+    def viewState(self):
+        """Return the view state the tab was saved with"""
+        return self.view_state
+
+    def memoryUsage(self):
+        """Stubs hold no text"""
+        return 0
+
+    def changedOnDisk(self):
+        """Return whether the file has changed since its editor was hibernated"""
+        if self.mtime is None:
+            return False
+        try:
+            return os.path.getmtime(self.file_path) != self.mtime
+        except OSError:
+            return True
 
 class TabWidget(QTabWidget):
     """Tab widget for managing multiple open files"""
+    # File path and percentage loaded while a file is being read
+    loadProgress = pyqtSignal(str, int)
+    # File path once a file has been fully loaded
+    fileLoaded = pyqtSignal(str)
+    # File path once a save has reached the disk
+    fileSaved = pyqtSignal(str)
+    # File path and error message when a save fails
+    saveFailed = pyqtSignal(str, str)
+    # File path of a tab that was closed
+    fileClosed = pyqtSignal(str)
+    # File path of a tab whose editor was released until it is shown again
+    fileHibernated = pyqtSignal(str)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setTabsClosable(True)
         self.setMovable(True)
         self.tabCloseRequested.connect(self.closeTab)
+        # Connected first so stubs are replaced before other slots see them
+        self.currentChanged.connect(self.materializeTab)
+        self.currentChanged.connect(self.noteActivation)
         self.open_files = {}
-        
+        self.loaders = {}
+        self.pending_lines = {}
+        self.pending_views = {}
+        self.large_file_threshold = LARGE_FILE_THRESHOLD
+
+        # Editors by when they were last current; the least recent are hibernated first
+        self.recent = OrderedDict()
+        self.max_live_tabs = MAX_LIVE_TABS
+        self.max_live_memory = MAX_LIVE_MEMORY
+        self.hibernate_timer = QTimer(self)
+        self.hibernate_timer.setSingleShot(True)
+        self.hibernate_timer.setInterval(HIBERNATE_DELAY)
+        self.hibernate_timer.timeout.connect(self.hibernateIdleTabs)
+
+        # Saves are written on a background thread
+        self.writer = FileWriter(self)
+        self.writer.saved.connect(self.onWriteFinished)
+        self.writer.failed.connect(self.onWriteFailed)
+
+        # Open files are brought up to date when they change on disk
+        self.watcher = FileWatcher(self)
+
+        # Autosave is off until a delay is set; bursts of edits share one save
+        self.autosave_enabled = False
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(AUTOSAVE_DELAY)
+        self.autosave_timer.timeout.connect(self.saveAll)
+
     def closeTab(self, index):
         """Close a tab and clean up resources"""
         widget = self.widget(index)
         if widget:
-            self.removeTab(index)
             file_path = self.tabToolTip(index)
+            self.removeTab(index)
             if file_path in self.open_files:
                 del self.open_files[file_path]
-    
-    def openFile(self, file_path):
+            if file_path in self.loaders:
+                self.cancelLoad(file_path)
+            self.pending_lines.pop(file_path, None)
+            self.pending_views.pop(file_path, None)
+            self.recent.pop(widget, None)
+            self.watcher.forget(file_path)
+            widget.close()
+            widget.deleteLater()
+            if file_path:
+                self.fileClosed.emit(file_path)
+
+    def openFile(self, file_path, line=None, column=None):
         """Open a file in a new tab or focus existing tab if already open"""
-        if file_path in self.open_files:
-            self.setCurrentIndex(self.indexOf(self.open_files[file_path]))
-        else:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                editor = CodeEditor()
-                editor.setPlainText(content)
-                
-                # Try to set syntax highlighting based on file extension
+        with tracer.span("tabs.openFile", path=file_path):
+            if line is not None:
+                # Applied once the file has loaded, or right away if it already has
+                self.pending_lines[file_path] = (line, column)
+            if file_path in self.open_files:
+                self.setCurrentIndex(self.indexOf(self.open_files[file_path]))
+                if file_path not in self.loaders:
+                    self.applyPendingPosition(file_path)
+            else:
                 try:
-                    # Import here to avoid circular imports
-                    import pygments
-                    from pygments.lexers import get_lexer_for_filename
-                    from pygments.formatters import HtmlFormatter
-                    from pygments import highlight
-                    
-                    lexer = get_lexer_for_filename(file_path)
-                    formatter = HtmlFormatter()
-                    highlighted_content = highlight(content, lexer, formatter)
-                    editor.setHtml(highlighted_content)
-                except Exception:
-                    # If highlighting fails, just use plain text
-                    editor.setPlainText(content)
-                
-                file_name = os.path.basename(file_path)
-                index = self.addTab(editor, file_name)
-                self.setTabToolTip(index, file_path)
-                self.open_files[file_path] = editor
-                self.setCurrentIndex(index)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Could not open file: {str(e)}")
+                    widget = self.createFileWidget(file_path)
+                    self.addFileTab(widget, file_path)
+                    self.startFileWidget(widget, file_path)
+                except Exception as e:
+                    self.pending_lines.pop(file_path, None)
+                    QMessageBox.critical(self, "Error", f"Could not open file: {str(e)}")
+
+    def openFiles(self, locations):
+        """Open (path, line, column) locations at once; only the last is read now, the rest when shown"""
+        if not locations:
+            return
+        with tracer.span("tabs.openFiles", count=len(locations)):
+            self.blockSignals(True)
+            current_index = self.currentIndex()
+            for file_path, line, column in locations[:-1]:
+                if line is not None:
+                    self.pending_lines[file_path] = (line, column)
+                if file_path not in self.open_files:
+                    self.addStubTab(file_path)
+                elif line is not None and file_path not in self.loaders and not isinstance(
+                        self.open_files[file_path], TabStub):
+                    self.applyPendingPosition(file_path)
+            if current_index != -1:
+                self.setCurrentIndex(current_index)
+            self.blockSignals(False)
+            self.openFile(*locations[-1])
+            if isinstance(self.currentWidget(), TabStub):
+                # The first stub became current while signals were blocked
+                self.currentChanged.emit(self.currentIndex())
+
+    def createFileWidget(self, file_path):
+        """Create the view for a file, before any of its text is read"""
+        if os.path.getsize(file_path) >= self.large_file_threshold:
+            return LargeFileView(file_path)
+
+        # Show a read-only placeholder while the file streams in
+        editor = CodeEditor()
+        editor.setReadOnly(True)
+        editor.setUndoRedoEnabled(False)
+
+        # Highlight incrementally, per block, as the text arrives
+        try:
+            editor.setupHighlighter(file_path)
+        except Exception:
+            # If highlighting fails, just use plain text
+            editor.highlighter = None
+        return editor
+
+    def startFileWidget(self, widget, file_path):
+        """Start filling a view created by createFileWidget"""
+        if isinstance(widget, LargeFileView):
+            self.applyPendingPosition(file_path)
+            self.watcher.track(file_path, diskState(file_path, 'utf-8'))
+        else:
+            self.startLoad(widget, file_path)
+
+    def applyPendingPosition(self, file_path):
+        """Move an open file's view to the line or saved view requested when opening it"""
+        position = self.pending_lines.pop(file_path, None)
+        view_state = self.pending_views.pop(file_path, None)
+        if position is not None:
+            self.open_files[file_path].goToLine(*position)
+        elif view_state is not None:
+            self.open_files[file_path].restoreViewState(view_state)
+
+    def addFileTab(self, widget, file_path):
+        """Add a tab showing a file and make it current"""
+        index = self.addTab(widget, os.path.basename(file_path))
+        self.setTabToolTip(index, file_path)
+        self.open_files[file_path] = widget
+        self.setCurrentIndex(index)
+
+    def addStubTab(self, file_path, view_state=None):
+        """Add a tab for a file without reading it until the tab is activated"""
+        stub = TabStub(file_path, view_state)
+        index = self.addTab(stub, os.path.basename(file_path))
+        self.setTabToolTip(index, file_path)
+        self.open_files[file_path] = stub
+        return index
+
+    def materializeTab(self, index):
+        """Replace a stub that has become current with a view of its file"""
+        stub = self.widget(index)
+        if not isinstance(stub, TabStub):
+            return
+        file_path = stub.file_path
+        try:
+            widget = self.createFileWidget(file_path)
+        except Exception as e:
+            print(f"Error restoring tab: {str(e)}")
+            self.closeTab(index)
+            return
+
+        self.replaceTabWidget(index, widget, file_path, index)
+        stub.deleteLater()
+
+        # A cursor saved before the file changed on disk could land anywhere
+        if file_path not in self.pending_lines and not stub.changedOnDisk():
+            self.pending_views[file_path] = stub.view_state
+        self.startFileWidget(widget, file_path)
+
+    def replaceTabWidget(self, index, widget, file_path, current_index):
+        """Swap the widget of a file's tab without reporting the intermediate tab changes"""
+        self.blockSignals(True)
+        self.removeTab(index)
+        self.insertTab(index, widget, os.path.basename(file_path))
+        self.setTabToolTip(index, file_path)
+        self.setCurrentIndex(current_index)
+        self.blockSignals(False)
+        self.open_files[file_path] = widget
+
+    def noteActivation(self, index):
+        """Move the current tab's editor to the most recently used end"""
+        widget = self.widget(index)
+        if widget is None or isinstance(widget, TabStub):
+            return
+        self.recent[widget] = None
+        self.recent.move_to_end(widget)
+        self.hibernate_timer.start()
+
+    def tabMemory(self, index):
+        """Return the estimated bytes a tab's view holds"""
+        widget = self.widget(index)
+        return widget.memoryUsage() if widget is not None else 0
+
+    def memoryUsage(self):
+        """Return the estimated bytes held by all tabs and how many of them are not hibernated"""
+        total = 0
+        live = 0
+        for index in range(self.count()):
+            widget = self.widget(index)
+            if not isinstance(widget, TabStub):
+                total += widget.memoryUsage()
+                live += 1
+        return total, live
+
+    def canHibernate(self, widget):
+        """Return whether a tab's editor could be released and rebuilt from its file"""
+        if not isinstance(widget, CodeEditor) or widget is self.currentWidget():
+            return False
+        file_path = self.tabToolTip(self.indexOf(widget))
+        return (bool(file_path) and self.open_files.get(file_path) is widget
+                and file_path not in self.loaders and file_path not in self.pending_lines
+                and not self.isDirty(widget) and not self.writer.isPending(file_path)
+                and not self.watcher.isFollowing(file_path) and os.path.isfile(file_path))
+
+    def hibernateIdleTabs(self):
+        """Hibernate the least recently used tabs while over the tab count or memory limit"""
+        editors = [self.widget(index) for index in range(self.count())
+                   if isinstance(self.widget(index), CodeEditor)]
+        live = len(editors)
+        memory = sum(editor.memoryUsage() for editor in editors)
+        if live <= self.max_live_tabs and memory <= self.max_live_memory:
+            return
+
+        # Editors never made current count as the least recently used
+        order = {widget: position for position, widget in enumerate(self.recent)}
+        editors.sort(key=lambda editor: order.get(editor, -1))
+        with tracer.span("tabs.hibernate", live=live, memory=memory):
+            for editor in editors:
+                if live <= self.max_live_tabs and memory <= self.max_live_memory:
+                    break
+                if not self.canHibernate(editor):
+                    continue
+                editor_memory = editor.memoryUsage()
+                if self.hibernateTab(self.indexOf(editor)):
+                    live -= 1
+                    memory -= editor_memory
+
+    def hibernateTab(self, index):
+        """Replace a tab's editor with a stub keeping only its file, view and mtime"""
+        editor = self.widget(index)
+        file_path = self.tabToolTip(index)
+        try:
+            mtime = os.path.getmtime(file_path)
+        except OSError:
+            return False
+        stub = TabStub(file_path, editor.viewState(), mtime)
+        self.replaceTabWidget(index, stub, file_path, self.currentIndex())
+        self.recent.pop(editor, None)
+        self.watcher.forget(file_path)
+        editor.close()
+        editor.deleteLater()
+        tracer.count("tabs.hibernated")
+        self.fileHibernated.emit(file_path)
+        return True
+
+    def sessionState(self):
+        """Return the path and view state of each file tab, in tab order"""
+        tabs = []
+        for index in range(self.count()):
+            file_path = self.tabToolTip(index)
+            if not file_path:
+                continue
+            if file_path in self.loaders or file_path in self.pending_views:
+                # Not shown yet; keep the state it is being restored to
+                view_state = self.pending_views.get(file_path, {})
+            else:
+                view_state = self.widget(index).viewState()
+            tabs.append({"path": file_path, **view_state, "current": index == self.currentIndex()})
+        return tabs
+
+    def restoreSession(self, tabs):
+        """Reopen saved tabs as stubs; only the current one is read now"""
+        self.blockSignals(True)
+        current_index = 0
+        for tab in tabs:
+            if os.path.isfile(tab["path"]) and tab["path"] not in self.open_files:
+                index = self.addStubTab(tab["path"], {"cursor": tab.get("cursor", 0), "scroll": tab.get("scroll", 0)})
+                if tab.get("current"):
+                    current_index = index
+        self.setCurrentIndex(current_index)
+        self.blockSignals(False)
+        if self.count():
+            self.currentChanged.emit(self.currentIndex())
+
+    def startLoad(self, editor, file_path):
+        """Read a file into an editor on a background thread"""
+        loader = FileLoader(file_path, self)
+        cursor = QTextCursor(editor.document())
+        load_start = time.perf_counter()
+
+        def appendText(text):
+            with tracer.span("tabs.insertBatch", chars=len(text)):
+                cursor.movePosition(QTextCursor.MoveOperation.End)
+                cursor.insertText(text)
+            loader.batchInserted()
+
+        def restartText():
+            # The file is being decoded again with another encoding
+            cursor.select(QTextCursor.SelectionType.Document)
+            cursor.removeSelectedText()
+
+        def reportProgress(read, total):
+            self.loadProgress.emit(file_path, read * 100 // total if total else 100)
+
+        def finishLoad(encoding):
+            del self.loaders[file_path]
+            editor.encoding = encoding
+            editor.setUndoRedoEnabled(True)
+            editor.setReadOnly(False)
+            editor.document().setModified(False)
+            self.trackEdits(editor)
+            self.watcher.track(file_path, FileState(loader.stamp, loader.tail, encoding))
+            editor.moveCursor(QTextCursor.MoveOperation.Start)
+            self.applyPendingPosition(file_path)
+            self.hibernate_timer.start()
+            if tracer.enabled:
+                tracer.record("tabs.loadFile", load_start, time.perf_counter(), {"path": file_path})
+            self.fileLoaded.emit(file_path)
+
+        def failLoad(message):
+            del self.loaders[file_path]
+            self.pending_lines.pop(file_path, None)
+            self.pending_views.pop(file_path, None)
+            self.closeTab(self.indexOf(editor))
+            QMessageBox.critical(self, "Error", f"Could not open file: {message}")
+
+        loader.textLoaded.connect(appendText)
+        loader.restarted.connect(restartText)
+        loader.progress.connect(reportProgress)
+        loader.loaded.connect(finishLoad)
+        loader.failed.connect(failLoad)
+        loader.finished.connect(loader.deleteLater)
+        self.loaders[file_path] = loader
+        loader.start()
+
+    def cancelLoad(self, file_path):
+        """Stop loading a file whose tab has been closed"""
+        loader = self.loaders.pop(file_path)
+        # Drop batches already queued for the closed editor
+        loader.textLoaded.disconnect()
+        loader.restarted.disconnect()
+        loader.progress.disconnect()
+        loader.loaded.disconnect()
+        loader.failed.disconnect()
+        loader.requestInterruption()
+        return loader
+
+    def cancelAllLoads(self):
+        """Stop every pending load and large file index, and wait for their threads to exit"""
+        for file_path in list(self.loaders):
+            self.cancelLoad(file_path).wait()
+        for index in range(self.count()):
+            widget = self.widget(index)
+            if isinstance(widget, LargeFileView):
+                widget.stopIndexing()
+
+    def trackEdits(self, editor):
+        """Follow an editor's unsaved changes once its text is in place"""
+        document = editor.document()
+        document.modificationChanged.connect(lambda modified: self.updateTabTitle(editor))
+        document.contentsChanged.connect(self.scheduleAutosave)
+
+    def updateTabTitle(self, editor):
+        """Mark a tab whose editor has unsaved changes"""
+        index = self.indexOf(editor)
+        if index == -1:
+            return
+        title = os.path.basename(self.tabToolTip(index)) or "Untitled"
+        if editor.document().isModified():
+            title += " *"
+        self.setTabText(index, title)
+
+    def isDirty(self, widget):
+        """Return whether a tab's editor has changes that aren't on disk"""
+        return (isinstance(widget, CodeEditor) and not widget.isReadOnly()
+                and widget.document().isModified())
+
+    def saveEditor(self, editor, file_path, force=False):
+        """Queue an editor's text to be written to file_path
+
+        Unmodified editors are skipped unless force is set. Returns whether
+        a write of file_path is pending, in which case fileSaved or
+        saveFailed follows.
+        """
+        if force or self.isDirty(editor):
+            # The snapshot has to be taken here; the encoding and write happen on the writer thread
+            with tracer.span("tabs.saveSnapshot", path=file_path):
+                text = editor.toPlainText()
+            self.writer.save(file_path, text, editor.encoding, editor.document().revision())
+        return self.writer.isPending(file_path)
+
+    def saveAll(self):
+        """Save every modified editor that has a file"""
+        for index in range(self.count()):
+            file_path = self.tabToolTip(index)
+            if file_path:
+                self.saveEditor(self.widget(index), file_path)
+
+    def setAutosave(self, enabled, delay=AUTOSAVE_DELAY):
+        """Turn autosave on or off; it saves once no edit has happened for delay milliseconds"""
+        self.autosave_enabled = enabled
+        self.autosave_timer.setInterval(delay)
+        if not enabled:
+            self.autosave_timer.stop()
+
+    def scheduleAutosave(self):
+        """Restart the autosave countdown after an edit"""
+        if self.autosave_enabled:
+            self.autosave_timer.start()
+
+    def onWriteFinished(self, file_path, revision):
+        """Mark an editor clean if nothing was typed since its text was captured"""
+        editor = self.open_files.get(file_path)
+        if isinstance(editor, CodeEditor) and editor.document().revision() == revision:
+            editor.document().setModified(False)
+            # A clean editor may now be hibernated
+            self.hibernate_timer.start()
+        if isinstance(editor, CodeEditor):
+            self.watcher.resync(file_path)
+        self.fileSaved.emit(file_path)
+
+    def onWriteFailed(self, file_path, revision, message):
+        """Report a save that didn't reach the disk; the editor stays modified"""
+        self.saveFailed.emit(file_path, message)
+
+    def finishSaves(self):
+        """Write pending autosaves and wait for every queued save"""
+        if self.autosave_timer.isActive():
+            self.autosave_timer.stop()
+            self.saveAll()
+        self.writer.stop()
@@ -0,0 +1,74 @@
+"""
+Single-instance client for PyIDE
+
+A launch that finds a running PyIDE hands its files to it over a Unix
+domain socket and exits. This module only uses the standard library, so
+forwarding a request doesn't pay for importing Qt.
+
+Requests are one JSON line:
+    {"files": [{"path": ..., "line": ..., "column": ...}, ...]}
+and the running instance answers "ok" once it has taken the request.
+"""
+
+import json
+import os
+import socket
+
+# Seconds to wait for the running instance to accept and answer a request
+REQUEST_TIMEOUT = 5
+# Reply sent by the running instance once it has taken a request
+REPLY = b"ok\n"
+
+def socketPath():
+    """Return the per-user socket the running instance listens on"""
+    path = os.environ.get("PYIDE_INSTANCE_SOCKET")
+    if path:
+        return path
+    directory = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(directory, f"pyide-{os.getuid()}.sock")
+
+def parseLocation(argument, cwd=None):
+    """Turn a "path[:line[:column]]" argument into an absolute path and 1-based line and column"""
+    path = os.path.join(cwd or os.getcwd(), os.path.expanduser(argument))
+    line = column = None
+    if not os.path.exists(path):
+        parts = path.split(":")
+        numbers = []
+        # At most two trailing numbers: the line and the column
+        while len(parts) > 1 and len(numbers) < 2 and parts[-1].isdigit():
+            numbers.insert(0, int(parts.pop()))
+        if numbers:
+            path = ":".join(parts)
+            line = numbers[0]
+            column = numbers[1] if len(numbers) > 1 else None
+    return os.path.normpath(path), line, column
+
+def encodeRequest(locations):
+    """Return the request line for a list of (path, line, column) locations"""
+    files = [{"path": path, "line": line, "column": column} for path, line, column in locations]
+    return json.dumps({"files": files}).encode('utf-8') + b"\n"
+
+def decodeRequest(data):
+    """Return the (path, line, column) locations of a request line"""
+    request = json.loads(data)
+    return [(entry["path"], entry.get("line"), entry.get("column")) for entry in request.get("files", [])]
+
+def forwardRequest(locations, path=None, timeout=REQUEST_TIMEOUT):
+    """Hand locations to a running instance; returns False if there is none to take them"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(path or socketPath())
+        client.sendall(encodeRequest(locations))
+        reply = b""
+        while not reply.endswith(b"\n"):
+            data = client.recv(64)
+            if not data:
+                break
+            reply += data
+        return reply == REPLY
+    except OSError:
+        # No instance, a stale socket left by one that crashed, or one that stopped answering
+        return False
+    finally:
+        client.close()
@@ -0,0 +1,108 @@
+"""
+Single-instance server for PyIDE
+"""
+
+import fcntl
+import os
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+from .instance import REPLY, decodeRequest, socketPath
+from .instrumentation import tracer
+
+# Longest request line accepted; a batch of thousands of paths fits easily
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+# Milliseconds to wait when checking whether an instance is listening on the socket
+PROBE_TIMEOUT = 1000
+
+class InstanceServer(QObject):
+    """Takes open requests from later launches on the instance socket"""
+    # List of (path, line, column) locations to open
+    requestReceived = pyqtSignal(list)
+
+    def __init__(self, path=None, parent=None):
+        super().__init__(parent)
+        self.path = path or socketPath()
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.onNewConnection)
+        self.buffers = {}
+
+    def listen(self):
+        """Start listening; returns False if another instance is listening already
+
+        A socket left behind by an instance that died is replaced. Launches
+        take a lock file while checking and replacing it, so two that start
+        together can't both become the running instance. The check can't rely
+        on listen failing: with socket options set, Qt renames its socket over
+        an existing one.
+        """
+        try:
+            lock = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError as e:
+            print(f"Error locking {self.path}: {str(e)}")
+            return False
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if self.isAnswered():
+                return False
+            QLocalServer.removeServer(self.path)
+            if self.server.listen(self.path):
+                return True
+            print(f"Error listening on {self.path}: {self.server.errorString()}")
+            return False
+        finally:
+            os.close(lock)
+
+    def isAnswered(self):
+        """Return True if a running instance accepts connections on the socket"""
+        probe = QLocalSocket()
+        probe.connectToServer(self.path)
+        connected = probe.waitForConnected(PROBE_TIMEOUT)
+        probe.abort()
+        return connected
+
+    def onNewConnection(self):
+        """Read the request of each launch that has connected"""
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            self.buffers[connection] = b""
+            connection.readyRead.connect(lambda connection=connection: self.onReadyRead(connection))
+            connection.disconnected.connect(lambda connection=connection: self.onDisconnected(connection))
+            # Data may have arrived with the connection
+            self.onReadyRead(connection)
+
+    def onReadyRead(self, connection):
+        """Collect a request line and answer it once it is complete"""
+        if connection not in self.buffers:
+            return
+        self.buffers[connection] += bytes(connection.readAll())
+        data = self.buffers[connection]
+        if b"\n" not in data:
+            if len(data) > MAX_REQUEST_SIZE:
+                self.onDisconnected(connection)
+                connection.abort()
+            return
+        del self.buffers[connection]
+        line = data.split(b"\n", 1)[0]
+        try:
+            with tracer.span("instance.request", bytes=len(line)):
+                locations = decodeRequest(line)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Error reading open request: {str(e)}")
+            connection.abort()
+            return
+        connection.write(REPLY)
+        connection.flush()
+        connection.disconnectFromServer()
+        self.requestReceived.emit(locations)
+
+    def onDisconnected(self, connection):
+        """Drop a connection that closed"""
+        self.buffers.pop(connection, None)
+        connection.deleteLater()
+
+    def close(self):
+        """Stop listening and remove the socket"""
+        self.server.close()
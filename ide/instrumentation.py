@@ -0,0 +1,197 @@
+"""
+Hot-path instrumentation for PyIDE
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer
+
+# Trace events kept in memory; the oldest are dropped first
+MAX_EVENTS = 200000
+# GUI thread blocks longer than this many seconds are reported
+STALL_THRESHOLD = 0.05
+# Milliseconds between event loop heartbeats while the watchdog runs
+HEARTBEAT_INTERVAL = 10
+
+class NullSpan:
+    """Span returned while instrumentation is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    """Times a block of code and records it as a complete trace event"""
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+class Tracer:
+    """Collects spans and counters as Chrome Trace Event records"""
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.counters = {}
+        # Per span name: count, total and max seconds since the last summary
+        self.window = {}
+        self.thread_names = {}
+
+    def enable(self):
+        """Start recording"""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording; recorded events are kept for export"""
+        self.enabled = False
+
+    def clear(self):
+        """Drop everything recorded so far"""
+        with self.lock:
+            self.origin = time.perf_counter()
+            self.events.clear()
+            self.counters.clear()
+            self.window.clear()
+
+    def span(self, name, **args):
+        """Return a context manager that records how long its block takes"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def count(self, name, value=1):
+        """Add to a counter"""
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, name, start, end, args=None):
+        """Record a complete event between two perf_counter() times"""
+        thread = threading.current_thread()
+        duration = end - start
+        event = {
+            "name": name,
+            "cat": name.split('.')[0],
+            "ph": "X",
+            "ts": (start - self.origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+            self.thread_names[thread.ident] = thread.name
+            count, total, longest = self.window.get(name, (0, 0.0, 0.0))
+            self.window[name] = (count + 1, total + duration, max(longest, duration))
+
+    def sampleCounters(self):
+        """Record the current counter values as trace counter events"""
+        ts = (time.perf_counter() - self.origin) * 1e6
+        with self.lock:
+            for name, value in self.counters.items():
+                self.events.append({"name": name, "ph": "C", "ts": ts, "pid": os.getpid(),
+                                    "args": {name.split('.')[-1]: value}})
+
+    def summary(self):
+        """Return a one-line summary of the spans since the last call"""
+        self.sampleCounters()
+        with self.lock:
+            window = self.window
+            self.window = {}
+        parts = []
+        for name, (count, total, longest) in sorted(window.items(), key=lambda item: -item[1][1]):
+            parts.append(f"{name} {count}x {total * 1000:.0f} ms (max {longest * 1000:.0f})")
+        return " | ".join(parts)
+
+    def export(self, file_path):
+        """Write the recorded events as Chrome Trace Event JSON"""
+        with self.lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+        pid = os.getpid()
+        metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in thread_names.items()]
+        metadata.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "PyIDE"}})
+        with open(file_path, 'w') as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+# Shared by every instrumented module
+tracer = Tracer()
+
+class EventLoopWatchdog(QObject):
+    """Reports GUI thread blocks longer than STALL_THRESHOLD with a sample of the blocked stack"""
+    def __init__(self, threshold=STALL_THRESHOLD, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold
+        self.gui_thread_id = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        self.stalled_stack = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setInterval(HEARTBEAT_INTERVAL)
+        self.heartbeat.timeout.connect(self.beat)
+
+    def start(self):
+        """Start the heartbeat and the thread watching it"""
+        if self.thread is not None:
+            return
+        self.last_beat = time.perf_counter()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.watch, name="event-loop-watchdog", daemon=True)
+        self.thread.start()
+        self.heartbeat.start()
+
+    def stop(self):
+        """Stop watching"""
+        self.heartbeat.stop()
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def beat(self):
+        """Runs on the GUI thread; a late beat means the event loop was blocked"""
+        now = time.perf_counter()
+        blocked = now - self.last_beat - HEARTBEAT_INTERVAL / 1000
+        if blocked > self.threshold:
+            stack = self.stalled_stack or ""
+            tracer.record("eventloop.stall", self.last_beat, now, {"stack": stack})
+            tracer.count("eventloop.stalls")
+            print(f"Event loop blocked for {blocked * 1000:.0f} ms; GUI thread was in:\n{stack}",
+                  file=sys.stderr)
+        self.last_beat = now
+        self.stalled_stack = None
+
+    def watch(self):
+        """Runs on a background thread; samples the GUI thread's stack while it is blocked"""
+        while not self.stop_event.wait(self.threshold / 2):
+            if self.stalled_stack is None and time.perf_counter() - self.last_beat > self.threshold:
+                frame = sys._current_frames().get(self.gui_thread_id)
+                self.stalled_stack = "".join(traceback.format_stack(frame)) if frame else ""
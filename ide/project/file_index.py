@@ -0,0 +1,476 @@
+"""
+Background project file index for PyIDE
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from PyQt6.QtCore import QObject, QThread, QFileSystemWatcher, QTimer, pyqtSignal
+
+from .ignore import rulesForDirectory
+
+# Bumped whenever the on-disk cache format changes
+CACHE_VERSION = 1
+# Paths added to the index per lock acquisition while crawling
+CRAWL_BATCH = 2000
+# Milliseconds to coalesce change notifications before rescanning
+RESCAN_DELAY = 200
+# Directories watched for changes, shallowest first; inotify watches are a per-user limit
+MAX_WATCHED_DIRECTORIES = 4096
+# Milliseconds between full rescans when some directories could not be watched
+PERIODIC_RESCAN_INTERVAL = 60000
+# Trigram postings longer than this are cheaper to answer by scanning
+MAX_TRIGRAM_CANDIDATES = 5000
+# Matches scored per query; scans stop once this many have been found
+MAX_SCORED_MATCHES = 500
+
+def cacheDirectory():
+    """Return the directory holding PyIDE's caches"""
+    return os.path.join(os.path.expanduser("~"), ".pyide", "index")
+
+def trigrams(text):
+    """Return the set of three-character substrings of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def containsSorted(values, value):
+    """Return True if a sorted array contains value"""
+    i = bisect_left(values, value)
+    return i < len(values) and values[i] == value
+
+def scoreMatch(path, query):
+    """Score how well a lower-case path matches a query, or None if it doesn't"""
+    name_start = path.rfind('/') + 1
+    position = path.find(query, name_start)
+    if position != -1:
+        # Substring of the file name; prefixes and short names rank first
+        score = 300 - position * 2
+        if position == name_start:
+            score += 100
+    elif query in path:
+        score = 200
+    else:
+        # Fuzzy: every query character in order, preferring a tight span
+        position = -1
+        first = None
+        for char in query:
+            position = path.find(char, position + 1)
+            if position == -1:
+                return None
+            if first is None:
+                first = position
+        score = 100 - (position - first - len(query))
+        if first >= name_start:
+            score += 50
+    return score - len(path) * 0.1
+
+class FileIndex:
+    """Relative paths of a project with a trigram index over their lower-case form"""
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        self.paths = []
+        self.lower_paths = []
+        self.ids = {}
+        self.removed = set()
+        # Trigram to sorted array of path ids containing it
+        self.postings = {}
+        # Per directory: mtime when last listed, file names and subdirectory names
+        self.dir_mtimes = {}
+        self.dir_files = {}
+        self.dir_subdirs = {}
+        # Lower-case paths joined by newlines, in rank order, for fuzzy scans
+        self.scan_order = array('I')
+        self.scan_line_starts = array('I')
+        self.scan_blob = ''
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, rel_path):
+        """Add a path; the caller must hold the lock"""
+        if rel_path in self.ids:
+            return
+        path_id = len(self.paths)
+        lower = rel_path.lower()
+        self.paths.append(rel_path)
+        self.lower_paths.append(lower)
+        self.ids[rel_path] = path_id
+        rel_dir, _, name = rel_path.rpartition('/')
+        self.dir_files.setdefault(rel_dir, set()).add(name)
+        postings = self.postings
+        for gram in trigrams(lower):
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = array('I', (path_id,))
+            else:
+                posting.append(path_id)
+
+    def remove(self, rel_path):
+        """Remove a path; the caller must hold the lock"""
+        path_id = self.ids.pop(rel_path, None)
+        if path_id is not None:
+            self.removed.add(path_id)
+            rel_dir, _, name = rel_path.rpartition('/')
+            self.dir_files[rel_dir].discard(name)
+
+    def removeDirectory(self, rel_dir):
+        """Remove a directory and everything below it; the caller must hold the lock"""
+        # Every directory is below the project root
+        prefix = rel_dir + '/' if rel_dir else ''
+        for directory in [d for d in self.dir_mtimes if d == rel_dir or d.startswith(prefix)]:
+            del self.dir_mtimes[directory]
+            self.dir_subdirs.pop(directory, None)
+        for directory in [d for d in self.dir_files if d == rel_dir or d.startswith(prefix)]:
+            for name in self.dir_files.pop(directory):
+                self.removed.add(self.ids.pop(f"{directory}/{name}" if directory else name))
+
+    def rebuildScanOrder(self):
+        """Rebuild the text scanned by fuzzy queries, short file names first"""
+        with self.lock:
+            live = list(self.ids.items())
+        live.sort(key=lambda item: (len(item[0]) - item[0].rfind('/'), len(item[0])))
+        order = array('I', (path_id for _, path_id in live))
+        line_starts = array('I')
+        # Every line, including the first, is preceded by a newline
+        position = 1
+        for rel_path, _ in live:
+            line_starts.append(position)
+            position += len(rel_path) + 1
+        blob = ''.join(f"\n{rel_path.lower()}" for rel_path, _ in live)
+        with self.lock:
+            self.scan_order = order
+            self.scan_line_starts = line_starts
+            self.scan_blob = blob
+
+    def candidatesFromTrigrams(self, terms):
+        """Return ids containing every term, or None if the trigrams are not selective"""
+        grams = set()
+        for term in terms:
+            grams |= trigrams(term)
+        if not grams:
+            return None
+        postings = sorted((self.postings.get(g, ()) for g in grams), key=len)
+        if len(postings[0]) > MAX_TRIGRAM_CANDIDATES:
+            return None
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates = {i for i in candidates if containsSorted(posting, i)}
+        return candidates
+
+    def candidatesFromScan(self, terms):
+        """Yield ids whose path contains every term as a subsequence"""
+        # Leftmost matching of each character never needs to backtrack
+        lookaheads = ''.join(
+            "(?=" + ''.join(f"[^\\n{re.escape(c)}]*+{re.escape(c)}" for c in term) + ")"
+            for term in terms)
+        order = self.scan_order
+        line_starts = self.scan_line_starts
+        # Starting with a literal newline lets the regex engine skip ahead quickly
+        for match in re.finditer(f"\n{lookaheads}", self.scan_blob):
+            yield order[bisect_right(line_starts, match.end()) - 1]
+
+    def query(self, text, limit=50):
+        """Return up to limit (score, path) pairs ranked best first"""
+        terms = text.lower().replace('\\', '/').split()
+        if not terms:
+            return []
+
+        with self.lock:
+            candidates = self.candidatesFromTrigrams(terms)
+            if not candidates:
+                # Short, common or abbreviated queries scan the paths in rank order
+                candidates = self.candidatesFromScan(terms)
+
+            results = []
+            lower_paths = self.lower_paths
+            removed = self.removed
+            for path_id in candidates:
+                if path_id in removed:
+                    continue
+                path = lower_paths[path_id]
+                total = 0
+                for term in terms:
+                    score = scoreMatch(path, term)
+                    if score is None:
+                        break
+                    total += score
+                else:
+                    results.append((total, path_id))
+                    if len(results) >= MAX_SCORED_MATCHES:
+                        break
+
+            results.sort(key=lambda r: -r[0])
+            return [(score, self.paths[path_id]) for score, path_id in results[:limit]]
+
+    def save(self, cache_file):
+        """Write the index to a cache file"""
+        with self.lock:
+            state = pickle.dumps({
+                "version": CACHE_VERSION,
+                "root": self.root,
+                "paths": self.paths,
+                "removed": self.removed,
+                "postings": self.postings,
+                "dir_mtimes": self.dir_mtimes,
+                "dir_subdirs": self.dir_subdirs,
+            }, protocol=pickle.HIGHEST_PROTOCOL)
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = cache_file + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(state)
+        os.replace(tmp_file, cache_file)
+
+    def restore(self, cache_file):
+        """Replace the contents with a cached index; returns False if unusable"""
+        try:
+            with open(cache_file, 'rb') as f:
+                state = pickle.load(f)
+        except Exception:
+            return False
+        if state.get("version") != CACHE_VERSION or state.get("root") != self.root:
+            return False
+
+        removed = state["removed"]
+        paths = state["paths"]
+        if len(removed) > len(paths) // 2:
+            # Mostly tombstones; rebuild the postings from the live paths
+            live = [p for i, p in enumerate(paths) if i not in removed]
+            with self.lock:
+                for rel_path in live:
+                    self.add(rel_path)
+                self.dir_mtimes = state["dir_mtimes"]
+                self.dir_subdirs = state["dir_subdirs"]
+            return True
+
+        ids = {p: i for i, p in enumerate(paths) if i not in removed}
+        dir_files = {}
+        for rel_path in ids:
+            rel_dir, _, name = rel_path.rpartition('/')
+            dir_files.setdefault(rel_dir, set()).add(name)
+
+        with self.lock:
+            self.paths = paths
+            self.lower_paths = [p.lower() for p in paths]
+            self.ids = ids
+            self.removed = removed
+            self.postings = state["postings"]
+            self.dir_mtimes = state["dir_mtimes"]
+            self.dir_files = dir_files
+            self.dir_subdirs = state["dir_subdirs"]
+        return True
+
+class FileIndexer(QThread):
+    """Thread that crawls directories and brings the index up to date"""
+    # Number of paths in the index, emitted as the crawl progresses
+    progress = pyqtSignal(int)
+    # Directories that were visited, so they can be watched
+    directoriesListed = pyqtSignal(list)
+
+    def __init__(self, index, directories, deep, cache_file=None, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.directories = directories
+        # Deep scans also visit known subdirectories whose listing is cached
+        self.deep = deep
+        self.cache_file = cache_file
+
+    def run(self):
+        """Relist changed directories and crawl new ones"""
+        index = self.index
+        if self.cache_file and index.restore(self.cache_file):
+            index.rebuildScanOrder()
+            self.progress.emit(len(index))
+
+        root = index.root
+        rules_cache = {}
+        listed = []
+        added = []
+        stack = list(self.directories)
+        while stack and not self.isInterruptionRequested():
+            rel_dir = stack.pop()
+            prefix = rel_dir + '/' if rel_dir else ''
+            full_dir = os.path.join(root, rel_dir)
+            try:
+                mtime = os.stat(full_dir).st_mtime_ns
+            except OSError:
+                with index.lock:
+                    index.removeDirectory(rel_dir)
+                continue
+            listed.append(full_dir)
+
+            if index.dir_mtimes.get(rel_dir) == mtime:
+                # Unchanged listing; its subdirectories may still have changed
+                if self.deep:
+                    stack.extend(prefix + name for name in index.dir_subdirs.get(rel_dir, ()))
+                continue
+
+            rules = rulesForDirectory(root, rel_dir, rules_cache)
+            files = set()
+            subdirs = set()
+            try:
+                with os.scandir(full_dir) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if not rules.isIgnored(prefix + entry.name, is_dir):
+                            (subdirs if is_dir else files).add(entry.name)
+            except OSError:
+                continue
+
+            old_files = index.dir_files.get(rel_dir, set())
+            old_subdirs = index.dir_subdirs.get(rel_dir, set())
+            with index.lock:
+                for name in old_files - files:
+                    index.remove(prefix + name)
+                for name in old_subdirs - subdirs:
+                    index.removeDirectory(prefix + name)
+                index.dir_mtimes[rel_dir] = mtime
+                index.dir_subdirs[rel_dir] = subdirs
+            added.extend(prefix + name for name in files - old_files)
+            for name in subdirs:
+                if self.deep or prefix + name not in index.dir_mtimes:
+                    stack.append(prefix + name)
+
+            if len(added) >= CRAWL_BATCH:
+                self.flush(added)
+                added = []
+        self.flush(added)
+        index.rebuildScanOrder()
+        self.directoriesListed.emit(listed)
+
+    def flush(self, added):
+        """Add a batch of crawled paths to the index"""
+        with self.index.lock:
+            for rel_path in added:
+                self.index.add(rel_path)
+        self.progress.emit(len(self.index))
+
+class ProjectFileIndex(QObject):
+    """Keeps a FileIndex of the open folder current and cached on disk"""
+    # Number of indexed paths, emitted as indexing progresses
+    progress = pyqtSignal(int)
+    # Emitted when a crawl or rescan has finished
+    indexed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index = None
+        self.indexer = None
+        self.pending_dirs = set()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.onDirectoryChanged)
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(RESCAN_DELAY)
+        self.rescan_timer.timeout.connect(self.rescanPending)
+        # Catches changes in directories beyond the watch limit
+        self.periodic_timer = QTimer(self)
+        self.periodic_timer.setInterval(PERIODIC_RESCAN_INTERVAL)
+        self.periodic_timer.timeout.connect(self.rescanAll)
+
+    def cacheFile(self, root):
+        """Return the cache file used for a project root"""
+        digest = hashlib.sha1(root.encode('utf-8')).hexdigest()
+        return os.path.join(cacheDirectory(), f"{digest}.files")
+
+    def open(self, root):
+        """Index a project folder, starting from the cache when there is one"""
+        root = os.path.abspath(root)
+        self.close()
+        self.index = FileIndex(root)
+        # Every directory is stat'ed, but only changed ones are listed again
+        self.startIndexer([''], deep=True, cache_file=self.cacheFile(root))
+
+    def close(self):
+        """Stop indexing and save the current project's index"""
+        if self.index is None:
+            return
+        self.rescan_timer.stop()
+        self.periodic_timer.stop()
+        self.pending_dirs.clear()
+        if self.indexer is not None:
+            self.indexer.requestInterruption()
+            self.indexer.wait()
+            self.indexer = None
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.save()
+        self.index = None
+
+    def save(self):
+        """Write the current index to its cache file"""
+        if self.index is not None:
+            try:
+                self.index.save(self.cacheFile(self.index.root))
+            except OSError as e:
+                print(f"Error saving file index: {str(e)}")
+
+    def query(self, text, limit=50):
+        """Return ranked (score, absolute path) matches for a query"""
+        if self.index is None:
+            return []
+        root = self.index.root
+        return [(score, os.path.join(root, rel_path)) for score, rel_path in self.index.query(text, limit)]
+
+    def startIndexer(self, directories, deep=False, cache_file=None):
+        """Crawl directories on a background thread"""
+        indexer = FileIndexer(self.index, directories, deep, cache_file, self)
+        indexer.progress.connect(self.progress)
+        indexer.directoriesListed.connect(self.watchDirectories)
+        indexer.finished.connect(self.onIndexerFinished)
+        self.indexer = indexer
+        indexer.start()
+
+    def watchDirectories(self, directories):
+        """Watch listed directories for changes, falling back to periodic rescans past the limit"""
+        watched = set(self.watcher.directories())
+        new = [d for d in directories if d not in watched]
+        if not new:
+            return
+        new.sort(key=lambda d: d.count(os.sep))
+        room = max(MAX_WATCHED_DIRECTORIES - len(watched), 0)
+        # addPaths returns the paths it couldn't watch, e.g. when inotify runs out
+        failed = self.watcher.addPaths(new[:room]) if room else []
+        if (len(new) > room or failed) and not self.periodic_timer.isActive():
+            self.periodic_timer.start()
+
+    def onIndexerFinished(self):
+        """Run any rescans that were requested while indexing"""
+        if self.sender() is not self.indexer:
+            return
+        self.indexer.deleteLater()
+        self.indexer = None
+        self.indexed.emit()
+        if self.pending_dirs:
+            self.rescan_timer.start()
+
+    def onDirectoryChanged(self, path):
+        """Queue a rescan of a directory that changed on disk"""
+        if self.index is None:
+            return
+        rel_dir = os.path.relpath(path, self.index.root).replace(os.sep, '/')
+        self.pending_dirs.add('' if rel_dir == '.' else rel_dir)
+        self.rescan_timer.start()
+
+    def rescanAll(self):
+        """Stat every directory and relist the ones that changed"""
+        if self.index is None or self.indexer is not None:
+            return
+        self.startIndexer([''], deep=True)
+
+    def rescanPending(self):
+        """Rescan the directories that changed, once no crawl is running"""
+        if self.indexer is not None or not self.pending_dirs:
+            return
+        directories = list(self.pending_dirs)
+        self.pending_dirs.clear()
+        self.startIndexer(directories)
@@ -0,0 +1,392 @@
+"""
+Background file operations for PyIDE
+"""
+
+import errno
+import os
+import shutil
+import time
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from ..instrumentation import tracer
+
+# Bytes copied per read, so cancellation and progress stay responsive on large files
+COPY_CHUNK = 1024 * 1024
+# Seconds between progress reports from a running operation
+PROGRESS_INTERVAL = 0.1
+
+# Operation states
+QUEUED, SCANNING, RUNNING, DONE, FAILED, CANCELLED = "Queued", "Scanning", "Running", "Done", "Failed", "Cancelled"
+
+class OperationCancelled(Exception):
+    """Raised inside a worker when its operation is cancelled"""
+
+class FileOperation:
+    """A queued delete, move or copy and its progress, updated on the GUI thread"""
+    def __init__(self, kind, sources, target=None):
+        self.kind = kind
+        self.sources = list(sources)
+        self.target = target
+        self.state = QUEUED
+        self.error = None
+        self.total_items = 0
+        self.total_bytes = 0
+        self.done_items = 0
+        self.done_bytes = 0
+        self.started = None
+        self.ended = None
+
+    def description(self):
+        """Return a short description such as 'Copy 3 items to src'"""
+        if len(self.sources) == 1:
+            what = os.path.basename(self.sources[0])
+        else:
+            what = f"{len(self.sources)} items"
+        if self.target is None:
+            return f"{self.kind.capitalize()} {what}"
+        return f"{self.kind.capitalize()} {what} to {os.path.basename(self.target) or self.target}"
+
+    def isFinished(self):
+        """Return whether the operation has stopped, whatever the outcome"""
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def fraction(self):
+        """Return how much of the work is done, from 0 to 1"""
+        if self.state == DONE:
+            return 1.0
+        # Copies are measured in bytes, deletes in entries
+        if self.total_bytes and self.kind != "delete":
+            return self.done_bytes / self.total_bytes
+        if self.total_items:
+            return self.done_items / self.total_items
+        return 0.0
+
+    def throughput(self):
+        """Return (rate, unit) of the work done so far"""
+        end = self.ended or time.monotonic()
+        elapsed = end - self.started if self.started else 0
+        if elapsed <= 0:
+            return 0.0, ""
+        if self.kind == "delete" or not self.done_bytes:
+            return self.done_items / elapsed, "items/s"
+        return self.done_bytes / elapsed / (1024 * 1024), "MB/s"
+
+    def affectedDirectories(self):
+        """Return the folders whose listings the operation changes"""
+        directories = {os.path.dirname(source) for source in self.sources}
+        if self.target is not None:
+            directories.add(self.target)
+        return directories
+
+def uniqueDestination(target, name):
+    """Return a path in target for name that doesn't exist yet, like 'name copy 2.py'"""
+    destination = os.path.join(target, name)
+    if not os.path.lexists(destination):
+        return destination
+    stem, ext = os.path.splitext(name)
+    if name.startswith('.') and not ext:
+        stem, ext = name, ''
+    number = 1
+    while True:
+        suffix = " copy" if number == 1 else f" copy {number}"
+        destination = os.path.join(target, f"{stem}{suffix}{ext}")
+        if not os.path.lexists(destination):
+            return destination
+        number += 1
+
+def isInside(path, folder):
+    """Return whether path is folder itself or lies below it, following links"""
+    real_path = os.path.realpath(path)
+    real_folder = os.path.realpath(folder)
+    return real_path == real_folder or real_path.startswith(os.path.join(real_folder, ''))
+
+class FileOperationWorker(QThread):
+    """Thread that runs one file operation"""
+    # Phase, entries done, bytes done, total entries, total bytes
+    progress = pyqtSignal(str, int, int, int, int)
+    # Error message when the operation failed
+    failed = pyqtSignal(str)
+
+    def __init__(self, operation, parent=None):
+        super().__init__(parent)
+        self.kind = operation.kind
+        self.sources = list(operation.sources)
+        self.target = operation.target
+        self.done_items = 0
+        self.done_bytes = 0
+        self.total_items = 0
+        self.total_bytes = 0
+        self.last_report = 0.0
+
+    def run(self):
+        """Measure the work, then do it"""
+        try:
+            with tracer.span(f"fileops.{self.kind}", sources=len(self.sources)):
+                if self.kind == "move":
+                    # Renames within a file system are instant; only the rest needs measuring
+                    remaining = [source for source in self.sources if not self.renameInto(source)]
+                    self.done_items = self.total_items = len(self.sources) - len(remaining)
+                    self.sources = remaining
+                    if not self.sources:
+                        self.report(force=True)
+                        return
+                self.progress.emit(SCANNING, 0, 0, 0, 0)
+                for source in self.sources:
+                    self.measure(source)
+                self.report(force=True)
+                for source in self.sources:
+                    if self.kind == "delete":
+                        self.delete(source)
+                    elif self.kind == "copy":
+                        self.copy(source, uniqueDestination(self.target, os.path.basename(source)))
+                    else:
+                        destination = os.path.join(self.target, os.path.basename(source))
+                        self.copy(source, destination)
+                        self.delete(source)
+                self.report(force=True)
+        except OperationCancelled:
+            self.report(force=True)
+        except Exception as e:
+            self.report(force=True)
+            self.failed.emit(str(e))
+
+    def checkCancelled(self):
+        """Stop the operation if it has been cancelled"""
+        if self.isInterruptionRequested():
+            raise OperationCancelled()
+
+    def report(self, force=False):
+        """Emit progress, at most every PROGRESS_INTERVAL seconds unless forced"""
+        now = time.monotonic()
+        if force or now - self.last_report >= PROGRESS_INTERVAL:
+            self.last_report = now
+            self.progress.emit(RUNNING, self.done_items, self.done_bytes, self.total_items, self.total_bytes)
+
+    def measure(self, path):
+        """Add the entries and bytes below path to the totals"""
+        stack = [path]
+        while stack:
+            self.checkCancelled()
+            current = stack.pop()
+            self.total_items += 1
+            try:
+                if os.path.isdir(current) and not os.path.islink(current):
+                    with os.scandir(current) as entries:
+                        stack.extend(entry.path for entry in entries)
+                else:
+                    self.total_bytes += os.lstat(current).st_size
+            except FileNotFoundError:
+                continue
+
+    def renameInto(self, source):
+        """Move source into the target with a rename; returns False if it needs a copy"""
+        destination = os.path.join(self.target, os.path.basename(source))
+        if os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, "Destination already exists", destination)
+        if isInside(self.target, source):
+            raise OSError(errno.EINVAL, "Cannot move a folder into itself", source)
+        try:
+            os.rename(source, destination)
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                return False
+            raise
+        return True
+
+    def delete(self, path):
+        """Delete a file or folder tree, children before their folders"""
+        # Each entry is (path, listed); folders are removed on their second visit
+        stack = [(path, False)]
+        while stack:
+            self.checkCancelled()
+            current, listed = stack.pop()
+            try:
+                if listed:
+                    os.rmdir(current)
+                elif os.path.isdir(current) and not os.path.islink(current):
+                    stack.append((current, True))
+                    with os.scandir(current) as entries:
+                        stack.extend((entry.path, False) for entry in entries)
+                    continue
+                else:
+                    size = os.lstat(current).st_size
+                    os.unlink(current)
+                    if self.kind == "delete":
+                        self.done_bytes += size
+            except FileNotFoundError:
+                pass
+            if self.kind == "delete":
+                self.done_items += 1
+                self.report()
+
+    def copy(self, source, destination):
+        """Copy a file or folder tree, reporting progress per chunk"""
+        if isInside(os.path.dirname(destination), source):
+            raise OSError(errno.EINVAL, "Cannot copy a folder into itself", source)
+        if self.kind == "move" and os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, "Destination already exists", destination)
+        stack = [(source, destination)]
+        directories = []
+        while stack:
+            self.checkCancelled()
+            current, target = stack.pop()
+            if os.path.islink(current):
+                os.symlink(os.readlink(current), target)
+            elif os.path.isdir(current):
+                os.mkdir(target)
+                directories.append((current, target))
+                with os.scandir(current) as entries:
+                    stack.extend((entry.path, os.path.join(target, entry.name)) for entry in entries)
+            else:
+                self.copyFile(current, target)
+            self.done_items += 1
+            self.report()
+        # Folder times change as their contents are written, so copy them last
+        for current, target in reversed(directories):
+            shutil.copystat(current, target)
+
+    def copyFile(self, source, destination):
+        """Copy one file in chunks"""
+        with open(source, 'rb') as src, open(destination, 'xb') as dst:
+            while True:
+                self.checkCancelled()
+                chunk = src.read(COPY_CHUNK)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                self.done_bytes += len(chunk)
+                self.report()
+        shutil.copystat(source, destination)
+
+class FileOperationQueue(QObject):
+    """Runs file operations one after another on worker threads"""
+    # An operation that was queued
+    operationAdded = pyqtSignal(object)
+    # An operation whose state or progress changed
+    operationChanged = pyqtSignal(object)
+    # An operation that stopped; its affected folders can be refreshed
+    operationFinished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.operations = []
+        self.current = None
+        self.worker = None
+
+    def delete(self, paths):
+        """Queue paths to be deleted"""
+        return self.enqueue(FileOperation("delete", paths))
+
+    def copy(self, paths, target):
+        """Queue paths to be copied into the target folder"""
+        operation = FileOperation("copy", paths, target)
+        if any(isInside(target, path) for path in paths):
+            return self.reject(operation, "Cannot copy a folder into itself")
+        return self.enqueue(operation)
+
+    def move(self, paths, target):
+        """Queue paths to be moved into the target folder"""
+        # Moving an item into the folder it is already in does nothing
+        paths = [path for path in paths if os.path.dirname(path) != target]
+        if not paths:
+            return None
+        operation = FileOperation("move", paths, target)
+        if any(isInside(target, path) for path in paths):
+            return self.reject(operation, "Cannot move a folder into itself")
+        return self.enqueue(operation)
+
+    def reject(self, operation, message):
+        """Report an operation as failed without running any of it"""
+        operation.state = FAILED
+        operation.error = message
+        operation.started = operation.ended = time.monotonic()
+        self.operations.append(operation)
+        self.operationAdded.emit(operation)
+        self.operationChanged.emit(operation)
+        self.operationFinished.emit(operation)
+        return operation
+
+    def enqueue(self, operation):
+        """Add an operation and start it if nothing is running"""
+        self.operations.append(operation)
+        self.operationAdded.emit(operation)
+        self.startNext()
+        return operation
+
+    def startNext(self):
+        """Start the oldest queued operation"""
+        if self.worker is not None:
+            return
+        operation = next((op for op in self.operations if op.state == QUEUED), None)
+        if operation is None:
+            return
+        operation.state = SCANNING
+        operation.started = time.monotonic()
+        worker = FileOperationWorker(operation, self)
+        worker.progress.connect(self.onProgress)
+        worker.failed.connect(self.onFailed)
+        worker.finished.connect(self.onWorkerFinished)
+        self.current = operation
+        self.worker = worker
+        self.operationChanged.emit(operation)
+        worker.start()
+
+    def onProgress(self, phase, done_items, done_bytes, total_items, total_bytes):
+        """Copy a worker's progress into its operation"""
+        operation = self.current
+        if operation is None or operation.state == CANCELLED:
+            return
+        operation.state = phase
+        operation.done_items = done_items
+        operation.done_bytes = done_bytes
+        operation.total_items = total_items
+        operation.total_bytes = total_bytes
+        self.operationChanged.emit(operation)
+
+    def onFailed(self, message):
+        """Record why the running operation failed"""
+        if self.current is not None:
+            self.current.state = FAILED
+            self.current.error = message
+
+    def onWorkerFinished(self):
+        """Finish the running operation and start the next one"""
+        operation = self.current
+        self.worker.deleteLater()
+        self.worker = None
+        self.current = None
+        if operation.state not in (FAILED, CANCELLED):
+            operation.state = DONE
+        operation.ended = time.monotonic()
+        self.operationChanged.emit(operation)
+        self.operationFinished.emit(operation)
+        self.startNext()
+
+    def cancel(self, operation):
+        """Cancel a queued or running operation; work already done stays done"""
+        if operation.isFinished():
+            return
+        if operation is self.current:
+            self.worker.requestInterruption()
+        else:
+            operation.ended = time.monotonic()
+        operation.state = CANCELLED
+        self.operationChanged.emit(operation)
+
+    def clearFinished(self):
+        """Forget operations that have stopped"""
+        self.operations = [op for op in self.operations if not op.isFinished()]
+
+    def isBusy(self):
+        """Return whether an operation is running or queued"""
+        return any(not op.isFinished() for op in self.operations)
+
+    def shutdown(self):
+        """Cancel everything and wait for the running operation to stop"""
+        for operation in self.operations:
+            if not operation.isFinished():
+                operation.state = CANCELLED
+        if self.worker is not None:
+            self.worker.requestInterruption()
+            self.worker.wait()
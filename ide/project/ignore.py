@@ -0,0 +1,138 @@
+"""
+Ignore rules for project crawling in PyIDE
+"""
+
+import os
+import re
+
+# Directory and file names that are never worth indexing or showing
+DEFAULT_IGNORED_NAMES = frozenset({'.git', '.hg', '.svn', 'node_modules', '__pycache__'})
+
+def globToRegex(pattern):
+    """Translate a gitignore glob into a regular expression"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            parts.append('[^/]')
+            i += 1
+        elif pattern[i] == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                parts.append(re.escape('['))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end + 1
+        elif pattern[i] == '\\' and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(parts)
+
+class IgnoreRules:
+    """Ordered gitignore-style rules; the last matching rule wins"""
+    def __init__(self, rules=(), ignored_names=DEFAULT_IGNORED_NAMES):
+        # Each rule is (base directory, compiled regex, negated, directories only)
+        self.rules = tuple(rules)
+        self.ignored_names = ignored_names
+
+        # One alternation per base directory rejects most paths in a single match
+        grouped = {}
+        for base, regex, negated, dir_only in self.rules:
+            grouped.setdefault(base, []).append(regex.pattern)
+        self.prefilters = tuple((base, re.compile('|'.join(f"(?:{p})" for p in patterns)))
+                                for base, patterns in grouped.items())
+
+    def extended(self, base, lines):
+        """Return new rules with the patterns of a .gitignore in base appended"""
+        rules = list(self.rules)
+        for line in lines:
+            line = line.rstrip('\n').rstrip('\r')
+            if not line.strip() or line.startswith('#'):
+                continue
+            if not line.endswith('\\ '):
+                line = line.rstrip(' ')
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            elif line.startswith('\\!') or line.startswith('\\#'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.strip('/') if dir_only else line
+            if not line:
+                continue
+
+            if '/' in line:
+                # Anchored to the directory that holds the .gitignore
+                regex = globToRegex(line.lstrip('/'))
+            else:
+                regex = '(?:.*/)?' + globToRegex(line)
+            rules.append((base, re.compile(regex + '$'), negated, dir_only))
+        return IgnoreRules(rules, self.ignored_names)
+
+    def forDirectory(self, root, rel_dir):
+        """Return these rules plus those of rel_dir's .gitignore, if it has one"""
+        try:
+            with open(os.path.join(root, rel_dir, '.gitignore'), 'r', encoding='utf-8', errors='replace') as f:
+                return self.extended(rel_dir, f.readlines())
+        except OSError:
+            return self
+
+    def isIgnored(self, rel_path, is_dir=False):
+        """Return True if a '/'-separated path relative to the root is ignored"""
+        if os.path.basename(rel_path) in self.ignored_names:
+            return True
+        for base, prefilter in self.prefilters:
+            if base:
+                if rel_path.startswith(base + '/') and prefilter.match(rel_path, len(base) + 1):
+                    break
+            elif prefilter.match(rel_path):
+                break
+        else:
+            return False
+
+        ignored = False
+        for base, regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base + '/'):
+                    continue
+                subpath = rel_path[len(base) + 1:]
+            else:
+                subpath = rel_path
+            if regex.match(subpath):
+                ignored = not negated
+        return ignored
+
+    @classmethod
+    def forRoot(cls, root):
+        """Return the rules that apply at the top of a project"""
+        return cls().forDirectory(root, '')
+
+def rulesForDirectory(root, rel_dir, rules_cache):
+    """Return the ignore rules in effect inside a directory, caching them per directory"""
+    rules = rules_cache.get(rel_dir)
+    if rules is None:
+        if rel_dir:
+            parent = rel_dir.rpartition('/')[0]
+            rules = rulesForDirectory(root, parent, rules_cache).forDirectory(root, rel_dir)
+        else:
+            rules = IgnoreRules.forRoot(root)
+        rules_cache[rel_dir] = rules
+    return rules
@@ -0,0 +1,292 @@
+"""
+Parallel find-in-files engine for PyIDE
+"""
+
+import mmap
+import os
+import re
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .ignore import IgnoreRules
+
+# Files handed to a worker process per task
+FILES_PER_TASK = 64
+# Matches reported per file before the rest of it is skipped
+MAX_HITS_PER_FILE = 1000
+# Longest part of a matching line sent back for display
+MAX_LINE_LENGTH = 300
+# Bytes checked for NUL characters to detect binary files
+BINARY_CHECK_SIZE = 8192
+# Seconds between batches of results sent to the GUI thread
+RESULT_INTERVAL = 0.05
+
+REGEX_SPECIAL = set('.^$*+?{}[]()|\\')
+# A {m}, {m,}, {,n} or {m,n} repeat; any other brace is a literal
+QUANTIFIER = re.compile(r'\{\d*,?\d*\}')
+# Inline flags such as (?i) or (?x) change what the literal parts of a pattern match
+INLINE_FLAGS = re.compile(r'\(\?[aiLmsux-]')
+# Escapes followed by a character code or name rather than a literal character
+NUMERIC_ESCAPES = set('xuUN0123456789')
+
+def classEnd(pattern, i):
+    """Return the index of the ] closing the character class that starts at i"""
+    i += 1
+    if i < len(pattern) and pattern[i] == '^':
+        i += 1
+    # A ] straight after the opening bracket is a literal member
+    if i < len(pattern) and pattern[i] == ']':
+        i += 1
+    while i < len(pattern):
+        if pattern[i] == '\\':
+            i += 2
+            continue
+        if pattern[i] == ']':
+            return i
+        i += 1
+    return len(pattern)
+
+def requiredLiteral(pattern):
+    """Return the longest literal every match of a regex must contain, or b''"""
+    if '|' in pattern or INLINE_FLAGS.search(pattern):
+        return b''
+    best = ''
+    current = ''
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped in NUMERIC_ESCAPES:
+                # Hex, octal, Unicode, named and group references aren't literal text
+                return b''
+            if escaped.isalnum():
+                # Character classes such as \d or \w
+                best = max(best, current, key=len)
+                current = ''
+            elif depth == 0:
+                current += escaped
+            continue
+        if char in '*?' or (char == '{' and QUANTIFIER.match(pattern, i)):
+            # The preceding character is optional or repeated
+            current = current[:-1]
+            best = max(best, current, key=len)
+            current = ''
+            if char == '{':
+                # The repeat counts aren't part of the text
+                i = QUANTIFIER.match(pattern, i).end()
+                continue
+        elif char == '+':
+            best = max(best, current, key=len)
+            current = ''
+        elif char in '([':
+            best = max(best, current, key=len)
+            current = ''
+            depth += 1
+            if char == '[':
+                i = classEnd(pattern, i)
+                depth -= 1
+        elif char == ')':
+            depth = max(0, depth - 1)
+            current = ''
+        elif char in REGEX_SPECIAL:
+            best = max(best, current, key=len)
+            current = ''
+        elif depth == 0:
+            current += char
+        i += 1
+    best = max(best, current, key=len)
+    return best.encode('utf-8')
+
+def compileQuery(query, is_regex, case_sensitive):
+    """Return the bytes regex for a query and a literal prefilter, if any"""
+    flags = re.MULTILINE
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    if is_regex:
+        regex = re.compile(query.encode('utf-8'), flags)
+        literal = requiredLiteral(query) if case_sensitive else b''
+    else:
+        regex = re.compile(re.escape(query.encode('utf-8')), flags)
+        literal = query.encode('utf-8') if case_sensitive else b''
+    return regex, literal
+
+def searchFile(path, regex, literal):
+    """Return (line, column, text) hits for one file"""
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return []
+
+    hits = []
+    with mm:
+        if mm.find(b'\0', 0, BINARY_CHECK_SIZE) != -1:
+            return []
+        if literal and mm.find(literal) == -1:
+            return []
+
+        line = 0
+        line_start = 0
+        counted_to = 0
+        for match in regex.finditer(mm):
+            start = match.start()
+            line += countNewlines(mm, counted_to, start)
+            counted_to = start
+            line_start = mm.rfind(b'\n', 0, start) + 1
+            line_end = mm.find(b'\n', start)
+            if line_end == -1:
+                line_end = len(mm)
+            text = mm[line_start:min(line_end, line_start + MAX_LINE_LENGTH)]
+            column = len(mm[line_start:start].decode('utf-8', errors='replace'))
+            hits.append((line + 1, column, text.decode('utf-8', errors='replace').rstrip('\r')))
+            if len(hits) >= MAX_HITS_PER_FILE:
+                break
+    return hits
+
+def countNewlines(mm, start, end):
+    """Count newlines in a large range of a mapping without copying it at once"""
+    count = 0
+    while start < end:
+        chunk_end = min(start + (1 << 20), end)
+        count += mm[start:chunk_end].count(b'\n')
+        start = chunk_end
+    return count
+
+def searchFiles(paths, query, is_regex, case_sensitive):
+    """Worker entry point: search a batch of files"""
+    regex, literal = compileQuery(query, is_regex, case_sensitive)
+    results = []
+    for path in paths:
+        hits = searchFile(path, regex, literal)
+        if hits:
+            results.append((path, hits))
+    return results
+
+def walkProject(root):
+    """Yield the non-ignored files below root"""
+    stack = [('', IgnoreRules.forRoot(root))]
+    while stack:
+        rel_dir, rules = stack.pop()
+        prefix = rel_dir + '/' if rel_dir else ''
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = prefix + entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if rules.isIgnored(rel_path, is_dir):
+                continue
+            if is_dir:
+                stack.append((rel_path, rules.forDirectory(root, rel_path)))
+            else:
+                yield entry.path
+
+_pool = None
+
+def processPool():
+    """Return the shared worker process pool, starting it on first use"""
+    global _pool
+    if _pool is None:
+        # Imported here to keep the pool machinery off the startup path
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # Forking a process that runs Qt threads is unsafe, so spawn workers
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                    mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+def shutdownPool():
+    """Stop the worker processes"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+class SearchRunner(QThread):
+    """Thread that fans a query out to the process pool and streams back hits"""
+    # List of (path, [(line, column, text), ...]) for files with matches
+    hitsFound = pyqtSignal(list)
+    # Files searched so far and total hits
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, files, query, is_regex=False, case_sensitive=False, max_hits=10000, parent=None):
+        super().__init__(parent)
+        # An iterable of absolute paths, consumed on the runner thread
+        self.files = files
+        self.query = query
+        self.is_regex = is_regex
+        self.case_sensitive = case_sensitive
+        self.max_hits = max_hits
+        self.total_hits = 0
+        self.searched = 0
+
+    def run(self):
+        """Submit the files in batches and report results as tasks complete"""
+        from concurrent.futures import FIRST_COMPLETED, wait
+        from concurrent.futures.process import BrokenProcessPool
+        pool = processPool()
+        pending = {}
+        results = []
+        last_emit = time.monotonic()
+        files = iter(self.files)
+        exhausted = False
+        try:
+            while not self.isInterruptionRequested():
+                # Keep a bounded number of tasks queued so cancelling stays cheap
+                while not exhausted and len(pending) < (os.cpu_count() or 1) * 4:
+                    batch = [path for _, path in zip(range(FILES_PER_TASK), files)]
+                    if not batch:
+                        exhausted = True
+                        break
+                    try:
+                        future = pool.submit(searchFiles, batch, self.query, self.is_regex, self.case_sensitive)
+                    except BrokenProcessPool as e:
+                        # Drop the dead pool so the next search starts a fresh one
+                        print(f"Error searching files: {str(e)}")
+                        shutdownPool()
+                        exhausted = True
+                        break
+                    pending[future] = len(batch)
+                if not pending:
+                    break
+
+                done, _ = wait(pending, timeout=RESULT_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.searched += pending.pop(future)
+                    try:
+                        found = future.result()
+                    except Exception:
+                        # A worker died or the pool was shut down
+                        continue
+                    for path, hits in found:
+                        hits = hits[:self.max_hits - self.total_hits]
+                        self.total_hits += len(hits)
+                        results.append((path, hits))
+                        if self.total_hits >= self.max_hits:
+                            break
+
+                now = time.monotonic()
+                if results and (now - last_emit >= RESULT_INTERVAL or self.total_hits >= self.max_hits):
+                    self.hitsFound.emit(results)
+                    self.progress.emit(self.searched, self.total_hits)
+                    results = []
+                    last_emit = now
+                if self.total_hits >= self.max_hits:
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+        if results and not self.isInterruptionRequested():
+            self.hitsFound.emit(results)
+        self.progress.emit(self.searched, self.total_hits)
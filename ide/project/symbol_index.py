@@ -0,0 +1,403 @@
+"""
+Python symbol index component for PyIDE
+"""
+
+import ast
+import hashlib
+import os
+import sqlite3
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from .file_index import cacheDirectory
+from .search import processPool, shutdownPool
+
+# Bumped whenever the database schema or the extracted symbols change
+SCHEMA_VERSION = 1
+# Files handed to a worker process per task
+FILES_PER_TASK = 32
+# Symbol kinds that are not definitions in their own right
+REFERENCE_KINDS = ('import',)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    column INTEGER NOT NULL,
+    container TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbols_by_name ON symbols (name_lower);
+CREATE INDEX IF NOT EXISTS symbols_by_path ON symbols (path);
+"""
+
+class SymbolExtractor(ast.NodeVisitor):
+    """Collects (name, kind, line, column, container) rows from a module's AST"""
+    def __init__(self):
+        self.symbols = []
+        # Qualified names and kinds of the enclosing classes and functions
+        self.scopes = []
+
+    def container(self):
+        """Return the dotted name of the enclosing scopes"""
+        return '.'.join(name for name, kind in self.scopes)
+
+    def add(self, name, kind, node):
+        """Record a symbol defined at node"""
+        self.symbols.append((name, kind, node.lineno, node.col_offset, self.container()))
+
+    def visit_ClassDef(self, node):
+        """Record a class and visit its body"""
+        self.add(node.name, 'class', node)
+        self.scopes.append((node.name, 'class'))
+        self.generic_visit(node)
+        self.scopes.pop()
+
+    def visit_FunctionDef(self, node):
+        """Record a function or method and visit its body"""
+        in_class = bool(self.scopes) and self.scopes[-1][1] == 'class'
+        self.add(node.name, 'method' if in_class else 'function', node)
+        self.scopes.append((node.name, 'function'))
+        self.generic_visit(node)
+        self.scopes.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def generic_visit(self, node):
+        """Visit nested statements only; expressions never define symbols"""
+        for field in ('body', 'orelse', 'finalbody', 'handlers', 'cases'):
+            for child in getattr(node, field, ()):
+                self.visit(child)
+
+    def visit_Assign(self, node):
+        """Record assigned names"""
+        self.addTargets(node.targets)
+
+    def visit_AnnAssign(self, node):
+        """Record an annotated name"""
+        self.addTargets([node.target])
+
+    def addTargets(self, targets):
+        """Record names bound at module or class level"""
+        if self.scopes and self.scopes[-1][1] == 'function':
+            return
+        kind = 'attribute' if self.scopes else 'variable'
+        for target in targets:
+            for node in ast.walk(target):
+                if isinstance(node, ast.Name):
+                    self.add(node.id, kind, node)
+
+    def visit_Import(self, node):
+        """Record the names an import statement binds"""
+        for alias in node.names:
+            self.add(alias.asname or alias.name.split('.')[0], 'import', node)
+
+    def visit_ImportFrom(self, node):
+        """Record the names a from-import binds"""
+        for alias in node.names:
+            if alias.name != '*':
+                self.add(alias.asname or alias.name, 'import', node)
+
+def extractSymbols(source):
+    """Return the symbol rows of Python source; raises SyntaxError if it doesn't parse"""
+    extractor = SymbolExtractor()
+    extractor.visit(ast.parse(source))
+    return extractor.symbols
+
+def parseFiles(root, items):
+    """Worker entry point: parse a batch of (relative path, known hash) files
+
+    Returns (relative path, mtime, size, hash, symbols) per readable file;
+    symbols is None when the content hash matches the known one.
+    """
+    results = []
+    for rel_path, known_hash in items:
+        path = os.path.join(root, rel_path)
+        try:
+            with open(path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            continue
+        digest = hashlib.sha1(data).hexdigest()
+        symbols = None
+        if digest != known_hash:
+            try:
+                symbols = extractSymbols(data)
+            except (SyntaxError, ValueError, RecursionError):
+                symbols = []
+        results.append((rel_path, stat.st_mtime_ns, stat.st_size, digest, symbols))
+    return results
+
+def connectDatabase(db_file):
+    """Open a symbol database, recreating it if its schema is out of date"""
+    os.makedirs(os.path.dirname(db_file), exist_ok=True)
+    db = sqlite3.connect(db_file, timeout=10)
+    if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        db.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS symbols;")
+        db.executescript(SCHEMA)
+        db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        db.commit()
+    # Readers on the GUI thread are not blocked by the indexer's writes
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    return db
+
+class SymbolIndexer(QThread):
+    """Thread that re-parses changed Python files and stores their symbols"""
+    # Files checked so far and files to check
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, root, paths, db_file, full=False, parent=None):
+        super().__init__(parent)
+        self.root = root
+        # Relative '/'-separated paths of the files to bring up to date
+        self.paths = paths
+        self.db_file = db_file
+        # Full syncs also drop files that are no longer in paths
+        self.full = full
+
+    def run(self):
+        """Find changed files, parse them on the process pool and store the results"""
+        try:
+            db = connectDatabase(self.db_file)
+        except sqlite3.Error as e:
+            print(f"Error opening symbol database: {str(e)}")
+            return
+        try:
+            self.update(db)
+        except sqlite3.Error as e:
+            print(f"Error updating symbol database: {str(e)}")
+        finally:
+            db.close()
+
+    def update(self, db):
+        """Compare the files against the database and re-parse those that changed"""
+        # Imported here to keep the pool machinery off the startup path
+        from concurrent.futures import FIRST_COMPLETED, wait
+        from concurrent.futures.process import BrokenProcessPool
+        known = {path: (mtime, size, digest) for path, mtime, size, digest
+                 in db.execute("SELECT path, mtime, size, hash FROM files")}
+        changed = []
+        missing = []
+        for rel_path in self.paths:
+            try:
+                stat = os.stat(os.path.join(self.root, rel_path))
+            except OSError:
+                missing.append(rel_path)
+                continue
+            state = known.get(rel_path)
+            if state is None or state[:2] != (stat.st_mtime_ns, stat.st_size):
+                changed.append((rel_path, state[2] if state else None))
+        if self.full:
+            missing.extend(set(known) - set(self.paths))
+        if missing:
+            self.removeFiles(db, missing)
+            db.commit()
+
+        total = len(changed)
+        done = 0
+        self.progress.emit(done, total)
+        pool = processPool()
+        pending = {}
+        batches = (changed[i:i + FILES_PER_TASK] for i in range(0, total, FILES_PER_TASK))
+        exhausted = False
+        try:
+            while not self.isInterruptionRequested():
+                while not exhausted and len(pending) < (os.cpu_count() or 1) * 2:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    try:
+                        pending[pool.submit(parseFiles, self.root, batch)] = len(batch)
+                    except BrokenProcessPool as e:
+                        print(f"Error indexing symbols: {str(e)}")
+                        shutdownPool()
+                        exhausted = True
+                        break
+                if not pending:
+                    break
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done += pending.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception:
+                        continue
+                    self.storeResults(db, results)
+                db.commit()
+                self.progress.emit(done, total)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def removeFiles(self, db, rel_paths):
+        """Forget files that no longer exist"""
+        rows = [(rel_path,) for rel_path in rel_paths]
+        db.executemany("DELETE FROM symbols WHERE path = ?", rows)
+        db.executemany("DELETE FROM files WHERE path = ?", rows)
+
+    def storeResults(self, db, results):
+        """Write parsed files and their symbols"""
+        for rel_path, mtime, size, digest, symbols in results:
+            db.execute("INSERT OR REPLACE INTO files (path, mtime, size, hash) VALUES (?, ?, ?, ?)",
+                       (rel_path, mtime, size, digest))
+            if symbols is None:
+                # Touched but unchanged; only the mtime needed updating
+                continue
+            db.execute("DELETE FROM symbols WHERE path = ?", (rel_path,))
+            db.executemany(
+                "INSERT INTO symbols (path, name, name_lower, kind, line, column, container) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(rel_path, name, name.lower(), kind, line, column, container)
+                 for name, kind, line, column, container in symbols])
+
+class ProjectSymbolIndex(QObject):
+    """Keeps a SQLite symbol index of the open folder's Python files current"""
+    # Files checked so far and files to check
+    progress = pyqtSignal(int, int)
+    # Emitted when an indexing pass has finished
+    updated = pyqtSignal()
+
+    def __init__(self, project_index, parent=None):
+        super().__init__(parent)
+        self.project_index = project_index
+        self.project_index.indexed.connect(self.syncWithProject)
+        self.root = None
+        self.db = None
+        self.indexer = None
+        # Set when files changed while an indexer was running
+        self.pending_full = False
+        self.pending_paths = set()
+
+    def databaseFile(self, root):
+        """Return the database file used for a project root"""
+        digest = hashlib.sha1(root.encode('utf-8')).hexdigest()
+        return os.path.join(cacheDirectory(), f"{digest}.symbols.db")
+
+    def open(self, root):
+        """Switch to a project folder; symbols are synced once its files are indexed"""
+        self.close()
+        self.root = os.path.abspath(root)
+        try:
+            self.db = connectDatabase(self.databaseFile(self.root))
+        except sqlite3.Error as e:
+            print(f"Error opening symbol database: {str(e)}")
+            self.root = None
+
+    def close(self):
+        """Stop indexing and close the database"""
+        self.pending_full = False
+        self.pending_paths.clear()
+        if self.indexer is not None:
+            self.indexer.requestInterruption()
+            self.indexer.wait()
+            self.indexer = None
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        self.root = None
+
+    def syncWithProject(self):
+        """Bring every Python file of the project index up to date"""
+        index = self.project_index.index
+        if self.root is None or index is None or index.root != self.root:
+            return
+        if self.indexer is not None:
+            self.pending_full = True
+            return
+        with index.lock:
+            paths = [rel_path for rel_path in index.ids if rel_path.endswith('.py')]
+        self.startIndexer(paths, full=True)
+
+    def updateFiles(self, paths):
+        """Re-index absolute file paths, for example after they were saved"""
+        if self.root is None:
+            return
+        rel_paths = {os.path.relpath(path, self.root).replace(os.sep, '/') for path in paths
+                     if path.endswith('.py')}
+        rel_paths = {rel_path for rel_path in rel_paths if not rel_path.startswith('..')}
+        if not rel_paths:
+            return
+        if self.indexer is not None:
+            self.pending_paths.update(rel_paths)
+            return
+        self.startIndexer(sorted(rel_paths))
+
+    def startIndexer(self, paths, full=False):
+        """Parse changed files on a background thread"""
+        indexer = SymbolIndexer(self.root, paths, self.databaseFile(self.root), full, self)
+        indexer.progress.connect(self.progress)
+        indexer.finished.connect(self.onIndexerFinished)
+        self.indexer = indexer
+        indexer.start()
+
+    def onIndexerFinished(self):
+        """Run the passes that were requested while indexing"""
+        if self.sender() is not self.indexer:
+            return
+        self.indexer.deleteLater()
+        self.indexer = None
+        self.updated.emit()
+        if self.pending_full:
+            self.pending_full = False
+            self.pending_paths.clear()
+            self.syncWithProject()
+        elif self.pending_paths:
+            paths = sorted(self.pending_paths)
+            self.pending_paths.clear()
+            self.startIndexer(paths)
+
+    def rows(self, sql, parameters):
+        """Run a query, returning rows with absolute paths"""
+        if self.db is None:
+            return []
+        try:
+            rows = self.db.execute(sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error querying symbols: {str(e)}")
+            return []
+        return [(name, kind, os.path.join(self.root, path), line, column, container)
+                for name, kind, path, line, column, container in rows]
+
+    def definitions(self, name, limit=50):
+        """Return (name, kind, path, line, column, container) for symbols named name
+
+        Definitions come before imports of the name.
+        """
+        placeholders = ', '.join('?' for _ in REFERENCE_KINDS)
+        return self.rows(
+            "SELECT name, kind, path, line, column, container FROM symbols "
+            f"WHERE name_lower = ? AND name = ? ORDER BY kind IN ({placeholders}), path, line LIMIT ?",
+            (name.lower(), name, *REFERENCE_KINDS, limit))
+
+    def search(self, text, limit=100):
+        """Return definitions whose names best match text: exact, prefix, then substring"""
+        text = text.strip().lower()
+        if not text:
+            return []
+        placeholders = ', '.join('?' for _ in REFERENCE_KINDS)
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        # The prefix range uses the name index; substrings need a scan, so run them last
+        matches = self.rows(
+            "SELECT name, kind, path, line, column, container FROM symbols "
+            f"WHERE name_lower >= ? AND name_lower < ? AND kind NOT IN ({placeholders}) "
+            "ORDER BY name_lower != ?, length(name), name, path LIMIT ?",
+            (text, text + '\uffff', *REFERENCE_KINDS, text, limit))
+        if len(matches) < limit:
+            matches += self.rows(
+                "SELECT name, kind, path, line, column, container FROM symbols "
+                f"WHERE name_lower LIKE ? ESCAPE '\\' AND name_lower NOT LIKE ? ESCAPE '\\' "
+                f"AND kind NOT IN ({placeholders}) ORDER BY length(name), name, path LIMIT ?",
+                (f"%{escaped}%", f"{escaped}%", *REFERENCE_KINDS, limit - len(matches)))
+        return matches
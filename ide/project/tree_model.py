@@ -0,0 +1,604 @@
+"""
+Project tree model for PyIDE
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from collections import deque
+
+from PyQt6.QtCore import (Qt, QAbstractItemModel, QModelIndex, QThread, QFileSystemWatcher,
+                          QTimer, QMimeData, QUrl, pyqtSignal)
+from PyQt6.QtGui import QFont, QColor
+from PyQt6.QtWidgets import QFileIconProvider
+
+from .ignore import rulesForDirectory
+from .vcs import ADDED, MODIFIED, DELETED, UNTRACKED, CONFLICT
+from ..instrumentation import tracer
+
+# Entries sent to the model per signal while a directory is listed
+LIST_BATCH = 500
+# Rows shown per directory before a "more items" row is added
+PAGE_SIZE = 2000
+# Milliseconds to wait for a burst of change notifications to settle
+REFRESH_DELAY = 200
+
+# Node listing states
+UNLISTED, LISTING, LISTED = range(3)
+# Looked up once; flags() and data() are called for every row the view lays out
+ROW_FLAGS = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+FILE_FLAGS = ROW_FLAGS | Qt.ItemFlag.ItemIsDragEnabled
+FOLDER_FLAGS = FILE_FLAGS | Qt.ItemFlag.ItemIsDropEnabled
+DISPLAY_ROLE = Qt.ItemDataRole.DisplayRole
+DECORATION_ROLE = Qt.ItemDataRole.DecorationRole
+TOOLTIP_ROLE = Qt.ItemDataRole.ToolTipRole
+FONT_ROLE = Qt.ItemDataRole.FontRole
+FOREGROUND_ROLE = Qt.ItemDataRole.ForegroundRole
+# Name colour of a file by its version control status; folders show that something below changed
+STATUS_COLORS = {
+    MODIFIED: QColor("#E6DB74"),
+    ADDED: QColor("#A6E22E"),
+    UNTRACKED: QColor("#A6E22E"),
+    DELETED: QColor("#F92672"),
+    CONFLICT: QColor("#F92672"),
+}
+
+def sortKey(entry):
+    """Order (name, is_dir) entries folders first, then by name ignoring case"""
+    name, is_dir = entry
+    return (not is_dir, name.lower(), name)
+
+class TreeNode:
+    """A file or folder shown in the tree"""
+    __slots__ = ('name', 'is_dir', 'parent', 'rel_path', 'row', 'children', 'pending',
+                 'state', 'more_shown', 'more_row')
+
+    def __init__(self, name, is_dir, parent=None, row=0):
+        self.name = name
+        self.is_dir = is_dir
+        self.parent = parent
+        if parent is None:
+            self.rel_path = ''
+        elif parent.rel_path:
+            self.rel_path = parent.rel_path + '/' + name
+        else:
+            self.rel_path = name
+        self.row = row
+        self.children = []
+        # Listed (name, is_dir) entries not shown yet, in display order
+        self.pending = []
+        self.state = UNLISTED
+        self.more_shown = False
+        self.more_row = MoreRow(self) if is_dir else None
+
+    def key(self):
+        """Return the sort key of this node"""
+        return sortKey((self.name, self.is_dir))
+
+class MoreRow:
+    """The last row of a directory with entries that aren't shown yet"""
+    __slots__ = ('parent',)
+
+    def __init__(self, parent):
+        self.parent = parent
+
+class DirectoryLister(QThread):
+    """Thread that lists directories, dropping ignored entries before they reach the model"""
+    # Generation, relative directory, a batch of sorted (name, is_dir) entries, last batch
+    batchListed = pyqtSignal(int, str, list, bool)
+    # Generation, relative directory and its complete sorted listing after a change
+    relisted = pyqtSignal(int, str, list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.requests = deque()
+        self.active = False
+        self.generation = 0
+        self.root = None
+        # Ignore rules per directory of rules_root; only touched by the thread
+        self.rules_root = None
+        self.rules_cache = {}
+
+    def setRoot(self, root, generation):
+        """List directories of a new root; requests for the old one are dropped"""
+        with self.lock:
+            self.requests.clear()
+            self.root = root
+            self.generation = generation
+
+    def request(self, rel_dir, refresh=False):
+        """Queue a directory to be listed; the thread runs only while there is work"""
+        with self.lock:
+            self.requests.append((self.generation, self.root, rel_dir, refresh))
+            if self.active:
+                return
+            self.active = True
+        # A previous run may still be returning
+        self.wait()
+        self.start()
+
+    def stop(self):
+        """Drop queued requests and wait for the current listing"""
+        with self.lock:
+            self.requests.clear()
+        self.wait()
+
+    def run(self):
+        """List requested directories until the queue is empty"""
+        while True:
+            with self.lock:
+                if not self.requests:
+                    self.active = False
+                    return
+                generation, root, rel_dir, refresh = self.requests.popleft()
+                if generation != self.generation:
+                    continue
+                if root != self.rules_root:
+                    self.rules_root = root
+                    self.rules_cache = {}
+            if refresh:
+                # The directory's .gitignore may be what changed
+                prefix = rel_dir + '/'
+                for cached in [d for d in self.rules_cache if d == rel_dir or d.startswith(prefix)]:
+                    del self.rules_cache[cached]
+            with tracer.span("explorer.list", path=rel_dir):
+                entries = self.listDirectory(root, rel_dir)
+            if refresh:
+                self.relisted.emit(generation, rel_dir, entries)
+                continue
+            for start in range(0, max(len(entries), 1), LIST_BATCH):
+                self.batchListed.emit(generation, rel_dir, entries[start:start + LIST_BATCH],
+                                      start + LIST_BATCH >= len(entries))
+
+    def listDirectory(self, root, rel_dir):
+        """Return the sorted (name, is_dir) entries of a directory that aren't ignored"""
+        rules = rulesForDirectory(root, rel_dir, self.rules_cache)
+        prefix = rel_dir + '/' if rel_dir else ''
+        entries = []
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not rules.isIgnored(prefix + entry.name, is_dir):
+                        entries.append((entry.name, is_dir))
+        except OSError:
+            pass
+        entries.sort(key=sortKey)
+        return entries
+
+class ProjectTreeModel(QAbstractItemModel):
+    """Tree of a project folder, listed lazily on a background thread and kept current by watching it"""
+    # Dropped paths, the folder they were dropped on and whether they should be copied rather than moved
+    filesDropped = pyqtSignal(list, str, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root_path = None
+        self.root = TreeNode('', True)
+        self.generation = 0
+        # Listed directory nodes by relative path
+        self.directories = {}
+        # Version control status by relative path, of changed files and the folders above them
+        self.statuses = {}
+        icons = QFileIconProvider()
+        self.folder_icon = icons.icon(QFileIconProvider.IconType.Folder)
+        self.file_icon = icons.icon(QFileIconProvider.IconType.File)
+        self.more_font = QFont()
+        self.more_font.setItalic(True)
+
+        self.lister = DirectoryLister(self)
+        self.lister.batchListed.connect(self.onBatchListed)
+        self.lister.relisted.connect(self.onRelisted)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.onDirectoryChanged)
+        self.pending_refresh = set()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_DELAY)
+        self.refresh_timer.timeout.connect(self.refreshPending)
+
+        # Batches that arrive together are inserted together
+        self.filling = {}
+        self.fill_timer = QTimer(self)
+        self.fill_timer.setSingleShot(True)
+        self.fill_timer.setInterval(0)
+        self.fill_timer.timeout.connect(self.fillPending)
+
+    def setRootPath(self, path):
+        """Show a folder; nothing below it is listed until it is needed"""
+        path = os.path.abspath(path)
+        self.beginResetModel()
+        self.generation += 1
+        self.root_path = path
+        self.root = TreeNode('', True)
+        self.directories = {'': self.root}
+        self.statuses = {}
+        self.filling.clear()
+        self.fill_timer.stop()
+        self.refresh_timer.stop()
+        self.pending_refresh.clear()
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.lister.setRoot(path, self.generation)
+        self.endResetModel()
+
+    def rootPath(self):
+        """Return the folder at the top of the tree"""
+        return self.root_path
+
+    def close(self):
+        """Stop listing and watching"""
+        self.refresh_timer.stop()
+        self.fill_timer.stop()
+        self.lister.stop()
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+
+    def nodeFor(self, index):
+        """Return the node or MoreRow behind an index; the root for an invalid one"""
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def indexFor(self, node):
+        """Return the index of a node; invalid for the root"""
+        if node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def indexForPath(self, path):
+        """Return the index of a path if its row has been loaded"""
+        if self.root_path is None:
+            return QModelIndex()
+        rel_path = os.path.relpath(os.path.abspath(path), self.root_path).replace(os.sep, '/')
+        if rel_path == '.':
+            return QModelIndex()
+        if rel_path.startswith('../'):
+            return QModelIndex()
+        node = self.root
+        for name in rel_path.split('/'):
+            for child in node.children:
+                if child.name == name:
+                    node = child
+                    break
+            else:
+                return QModelIndex()
+        return self.indexFor(node)
+
+    def filePath(self, index):
+        """Return the absolute path of an index's file or folder"""
+        node = self.nodeFor(index)
+        if isinstance(node, MoreRow) or self.root_path is None:
+            return ''
+        return os.path.join(self.root_path, *node.rel_path.split('/')) if node.rel_path else self.root_path
+
+    def isDir(self, index):
+        """Return whether an index is a folder"""
+        node = self.nodeFor(index)
+        return isinstance(node, TreeNode) and node.is_dir
+
+    def isMoreRow(self, index):
+        """Return whether an index is a directory's "more items" row"""
+        return isinstance(self.nodeFor(index), MoreRow)
+
+    def index(self, row, column, parent=QModelIndex()):
+        """Return the index of a child row"""
+        node = parent.internalPointer() if parent.isValid() else self.root
+        if column != 0 or node.__class__ is not TreeNode:
+            return QModelIndex()
+        if 0 <= row < len(node.children):
+            return self.createIndex(row, 0, node.children[row])
+        if row == len(node.children) and node.more_shown:
+            return self.createIndex(row, 0, node.more_row)
+        return QModelIndex()
+
+    def parent(self, index):
+        """Return the index of a row's folder"""
+        if not index.isValid():
+            return QModelIndex()
+        return self.indexFor(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        """Return the number of rows shown in a folder"""
+        if parent.column() > 0:
+            return 0
+        node = self.nodeFor(parent)
+        if not isinstance(node, TreeNode):
+            return 0
+        return len(node.children) + node.more_shown
+
+    def columnCount(self, parent=QModelIndex()):
+        """Only names are shown"""
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        """Folders that haven't been listed yet are assumed to have children"""
+        node = parent.internalPointer() if parent.isValid() else self.root
+        if node.__class__ is not TreeNode or not node.is_dir:
+            return False
+        return node.state != LISTED or bool(node.children) or node.more_shown
+
+    def canFetchMore(self, parent):
+        """A folder can be fetched until it has been listed"""
+        node = self.nodeFor(parent)
+        return isinstance(node, TreeNode) and node.is_dir and node.state == UNLISTED
+
+    def fetchMore(self, parent):
+        """Start listing a folder"""
+        node = self.nodeFor(parent)
+        if isinstance(node, TreeNode) and node.state == UNLISTED:
+            node.state = LISTING
+            self.directories[node.rel_path] = node
+            self.lister.request(node.rel_path)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        """Label the single column"""
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return "Name"
+        return None
+
+    def flags(self, index):
+        """Rows can be selected and dragged, and folders accept drops"""
+        if not index.isValid():
+            # Drops on the empty area go to the root folder
+            return Qt.ItemFlag.ItemIsDropEnabled
+        node = index.internalPointer()
+        if node.__class__ is MoreRow:
+            return ROW_FLAGS
+        return FOLDER_FLAGS if node.is_dir else FILE_FLAGS
+
+    def supportedDropActions(self):
+        """Drops copy or move files"""
+        return Qt.DropAction.CopyAction | Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        """Rows are dragged as file URLs"""
+        return ["text/uri-list"]
+
+    def mimeData(self, indexes):
+        """Return the dragged rows as file URLs"""
+        data = QMimeData()
+        paths = {self.filePath(index) for index in indexes if not self.isMoreRow(index)}
+        data.setUrls([QUrl.fromLocalFile(path) for path in sorted(paths) if path])
+        return data
+
+    def dropMimeData(self, data, action, row, column, parent):
+        """Hand dropped files to whoever performs file operations"""
+        if not data.hasUrls() or action not in (Qt.DropAction.CopyAction, Qt.DropAction.MoveAction):
+            return False
+        node = self.nodeFor(parent)
+        if not isinstance(node, TreeNode) or not node.is_dir or self.root_path is None:
+            return False
+        paths = [url.toLocalFile() for url in data.urls() if url.isLocalFile()]
+        if not paths:
+            return False
+        self.filesDropped.emit(paths, self.filePath(parent), action == Qt.DropAction.CopyAction)
+        return True
+
+    def data(self, index, role=DISPLAY_ROLE):
+        """Return a row's name, icon, tooltip or status colour"""
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if isinstance(node, MoreRow):
+            if role == DISPLAY_ROLE:
+                return f"{len(node.parent.pending)} more items..."
+            if role == FONT_ROLE:
+                return self.more_font
+            if role == TOOLTIP_ROLE:
+                return "Double-click to show more"
+            return None
+        if role == DISPLAY_ROLE:
+            return node.name
+        if role == DECORATION_ROLE:
+            return self.folder_icon if node.is_dir else self.file_icon
+        if role == TOOLTIP_ROLE:
+            return self.filePath(index)
+        if role == FOREGROUND_ROLE:
+            status = self.statuses.get(node.rel_path)
+            return STATUS_COLORS[status] if status else None
+        return None
+
+    def setStatuses(self, statuses):
+        """Colour rows by the status of changed files, given by absolute path"""
+        if self.root_path is None:
+            return
+        prefix = os.path.join(self.root_path, '')
+        new = {}
+        for path, status in statuses.items():
+            if not path.startswith(prefix):
+                continue
+            rel_path = path[len(prefix):].replace(os.sep, '/')
+            new[rel_path] = status
+            parent = rel_path.rpartition('/')[0]
+            while parent and parent not in new:
+                new[parent] = MODIFIED
+                parent = parent.rpartition('/')[0]
+        old = self.statuses
+        self.statuses = new
+        changed = {}
+        for rel_path in old.keys() | new.keys():
+            if old.get(rel_path) != new.get(rel_path):
+                rel_dir, _, name = rel_path.rpartition('/')
+                changed.setdefault(rel_dir, set()).add(name)
+        # One signal per listed folder spanning its changed rows, rather than one per row
+        for rel_dir, names in changed.items():
+            node = self.directories.get(rel_dir)
+            if node is None:
+                continue
+            rows = [child.row for child in node.children if child.name in names]
+            if rows:
+                first, last = min(rows), max(rows)
+                self.dataChanged.emit(self.createIndex(first, 0, node.children[first]),
+                                      self.createIndex(last, 0, node.children[last]), [FOREGROUND_ROLE])
+
+    def showMore(self, index):
+        """Show the next page of a folder's entries"""
+        node = self.nodeFor(index)
+        if isinstance(node, MoreRow):
+            node = node.parent
+        if isinstance(node, TreeNode) and node.pending:
+            self.revealPending(node, PAGE_SIZE)
+
+    def revealPending(self, node, limit):
+        """Move up to limit pending entries of a folder into its rows"""
+        taken = node.pending[:limit]
+        if not taken:
+            return
+        remaining = node.pending[limit:]
+        parent_index = self.indexFor(node)
+        start = len(node.children)
+        show_more = bool(remaining)
+        if node.more_shown and not show_more:
+            self.beginRemoveRows(parent_index, start, start)
+            node.more_shown = False
+            self.endRemoveRows()
+        # The "more items" row moves down if it stays, or is added with the page if it is new
+        added_more = show_more and not node.more_shown
+        self.beginInsertRows(parent_index, start, start + len(taken) - 1 + added_more)
+        node.children.extend(TreeNode(name, is_dir, node, start + i) for i, (name, is_dir) in enumerate(taken))
+        node.pending = remaining
+        node.more_shown = show_more
+        self.endInsertRows()
+        if node.more_shown and not added_more:
+            more_index = self.createIndex(len(node.children), 0, node.more_row)
+            self.dataChanged.emit(more_index, more_index)
+
+    def onBatchListed(self, generation, rel_dir, entries, done):
+        """Collect a batch of a folder's entries; they are inserted once the queued batches are in"""
+        node = self.directories.get(rel_dir)
+        if generation != self.generation or node is None or node.state != LISTING:
+            return
+        node.pending.extend(entries)
+        if done:
+            node.state = LISTED
+        self.filling[rel_dir] = node
+        self.fill_timer.start()
+
+    def fillPending(self):
+        """Insert the collected entries of each folder, up to a page of rows
+        
+        Every insert makes the view lay out all expanded rows again, so each
+        folder gets one insert per event loop turn rather than one per batch.
+        """
+        filling = self.filling
+        self.filling = {}
+        for rel_dir, node in filling.items():
+            if self.directories.get(rel_dir) is not node:
+                continue
+            room = PAGE_SIZE - len(node.children)
+            if room > 0:
+                self.revealPending(node, room)
+            elif node.pending and not node.more_shown:
+                start = len(node.children)
+                self.beginInsertRows(self.indexFor(node), start, start)
+                node.more_shown = True
+                self.endInsertRows()
+            elif node.more_shown:
+                more_index = self.createIndex(len(node.children), 0, node.more_row)
+                self.dataChanged.emit(more_index, more_index)
+            if node.state == LISTED:
+                self.watcher.addPath(self.filePath(self.indexFor(node)))
+                if not node.children and node is not self.root:
+                    # Let the view drop the expand arrow of an empty folder
+                    index = self.indexFor(node)
+                    self.dataChanged.emit(index, index)
+
+    def onDirectoryChanged(self, path):
+        """Queue a folder that changed on disk to be listed again"""
+        if self.root_path is None:
+            return
+        rel_dir = os.path.relpath(path, self.root_path).replace(os.sep, '/')
+        rel_dir = '' if rel_dir == '.' else rel_dir
+        if rel_dir in self.directories:
+            self.pending_refresh.add(rel_dir)
+            self.refresh_timer.start()
+
+    def refreshDirectories(self, paths):
+        """List folders again as if a change had been reported for each"""
+        for path in paths:
+            self.onDirectoryChanged(path)
+
+    def refreshPending(self):
+        """List the changed folders again"""
+        for rel_dir in self.pending_refresh:
+            node = self.directories.get(rel_dir)
+            if node is not None and node.state == LISTED:
+                self.lister.request(rel_dir, refresh=True)
+        self.pending_refresh.clear()
+
+    def onRelisted(self, generation, rel_dir, entries):
+        """Apply the difference between a folder's rows and its new listing"""
+        node = self.directories.get(rel_dir)
+        if generation != self.generation or node is None or node.state != LISTED:
+            return
+        listing = dict(entries)
+        parent_index = self.indexFor(node)
+
+        # Rows that are gone, or changed between file and folder
+        for row in range(len(node.children) - 1, -1, -1):
+            child = node.children[row]
+            if listing.get(child.name) != child.is_dir:
+                self.beginRemoveRows(parent_index, row, row)
+                del node.children[row]
+                self.forgetDirectory(child)
+                self.renumber(node, row)
+                self.endRemoveRows()
+        node.pending = [entry for entry in node.pending if listing.get(entry[0]) == entry[1]]
+
+        # New entries go in order among the rows, or into the pending page after them
+        known = {child.name for child in node.children}
+        known.update(name for name, is_dir in node.pending)
+        for entry in entries:
+            if entry[0] in known:
+                continue
+            key = sortKey(entry)
+            if node.pending and node.children and key > node.children[-1].key():
+                node.pending.insert(bisect_left(node.pending, key, key=sortKey), entry)
+                continue
+            row = bisect_left(node.children, key, key=TreeNode.key)
+            self.beginInsertRows(parent_index, row, row)
+            node.children.insert(row, TreeNode(entry[0], entry[1], node, row))
+            self.renumber(node, row + 1)
+            self.endInsertRows()
+
+        start = len(node.children)
+        if node.more_shown and not node.pending:
+            self.beginRemoveRows(parent_index, start, start)
+            node.more_shown = False
+            self.endRemoveRows()
+        elif node.pending and not node.more_shown:
+            self.beginInsertRows(parent_index, start, start)
+            node.more_shown = True
+            self.endInsertRows()
+        elif node.more_shown:
+            more_index = self.createIndex(start, 0, node.more_row)
+            self.dataChanged.emit(more_index, more_index)
+
+    def renumber(self, node, start):
+        """Update the stored row of a folder's children from start on"""
+        children = node.children
+        for row in range(start, len(children)):
+            children[row].row = row
+
+    def forgetDirectory(self, node):
+        """Stop tracking a removed folder and everything listed below it"""
+        if not node.is_dir:
+            return
+        prefix = node.rel_path + '/'
+        removed = [rel_dir for rel_dir in self.directories
+                   if rel_dir == node.rel_path or rel_dir.startswith(prefix)]
+        paths = []
+        for rel_dir in removed:
+            del self.directories[rel_dir]
+            self.pending_refresh.discard(rel_dir)
+            paths.append(os.path.join(self.root_path, *rel_dir.split('/')))
+        watched = set(self.watcher.directories())
+        paths = [path for path in paths if path in watched]
+        if paths:
+            self.watcher.removePaths(paths)
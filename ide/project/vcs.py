@@ -0,0 +1,515 @@
+"""
+Version control component for PyIDE
+"""
+
+import os
+import subprocess
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+from difflib import SequenceMatcher
+
+from PyQt6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+
+from ..editors.file_watcher import MAX_DIFF_WORK
+from ..instrumentation import tracer
+
+# Milliseconds without edits before a buffer is compared with HEAD again
+DIFF_DELAY = 300
+# Milliseconds for saves and repository changes to settle before the status is read again
+STATUS_DELAY = 1000
+# Seconds a git command may run before it is given up on
+GIT_TIMEOUT = 30
+# Regions longer than this many lines are snapshot from the whole text rather than block by block
+SNAPSHOT_BLOCKS = 2000
+
+# Status of a changed file, and kind of a changed line
+ADDED = "added"
+MODIFIED = "modified"
+DELETED = "deleted"
+UNTRACKED = "untracked"
+CONFLICT = "conflict"
+
+def runGit(directory, *args):
+    """Return the output of a git command run in directory, or None if it fails"""
+    try:
+        result = subprocess.run(['git', '-C', directory, *args], stdin=subprocess.DEVNULL,
+                                capture_output=True, timeout=GIT_TIMEOUT)
+    except (OSError, subprocess.SubprocessError):
+        # git isn't installed, the folder is gone or the command hung
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+def repositoryPaths(directory):
+    """Return the work tree and git directory of the repository holding directory, or None"""
+    output = runGit(directory, 'rev-parse', '--show-toplevel', '--absolute-git-dir')
+    if output is None:
+        return None
+    paths = os.fsdecode(output).splitlines()
+    if len(paths) != 2:
+        return None
+    return paths[0], paths[1]
+
+def splitText(text):
+    """Split text into lines the way the editor splits a loaded file into blocks"""
+    return text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+
+def headLines(root, rel_path, encoding):
+    """Return a file's lines as committed in HEAD, [] if it was added since, or None if it isn't tracked"""
+    data = runGit(root, 'cat-file', 'blob', f'HEAD:{rel_path}')
+    if data is not None:
+        return splitText(data.decode(encoding, errors='replace'))
+    # A file staged since the last commit is all new; an untracked one has nothing to compare
+    if runGit(root, 'ls-files', '--error-unmatch', '--', rel_path) is None:
+        return None
+    return []
+
+def fileStatus(code):
+    """Return the status of a file from its two letter porcelain code"""
+    if code == '??':
+        return UNTRACKED
+    if 'U' in code or code in ('AA', 'DD'):
+        return CONFLICT
+    if 'D' in code:
+        return DELETED
+    if code[0] in 'ARC':
+        return ADDED
+    return MODIFIED
+
+def repositoryStatus(directory):
+    """Return the work tree, git directory, HEAD commit and changed files below a folder, or None
+
+    Changed files are a dict of absolute path under directory to status.
+    """
+    paths = repositoryPaths(directory)
+    if paths is None:
+        return None
+    root, git_dir = paths
+    head = runGit(root, 'rev-parse', '--verify', '--quiet', 'HEAD')
+    head = head.decode().strip() if head else ''
+    # Reading the status mustn't refresh the index, or the git directory watcher would fire again
+    output = runGit(root, '--no-optional-locks', 'status', '--porcelain', '-z')
+    statuses = {}
+    if output:
+        prefix = os.path.relpath(os.path.realpath(directory), root).replace(os.sep, '/')
+        prefix = '' if prefix == '.' else prefix + '/'
+        entries = os.fsdecode(output).split('\0')
+        index = 0
+        while index < len(entries):
+            entry = entries[index]
+            index += 1
+            if len(entry) < 4:
+                continue
+            code, rel_path = entry[:2], entry[3:].rstrip('/')
+            if code[0] in 'RC':
+                # The path a file was renamed or copied from follows it
+                index += 1
+            if rel_path.startswith(prefix):
+                path = os.path.join(directory, *rel_path[len(prefix):].split('/'))
+                statuses[path] = fileStatus(code)
+    return root, git_dir, head, statuses
+
+def diffLines(base, lines, base_offset=0, offset=0):
+    """Return the (base start, base end, start, end) hunks where lines differ from base
+
+    Line numbers are counted from base_offset and offset, for comparing a
+    region of a file.
+    """
+    # Only the lines between the common head and tail can differ
+    limit = min(len(base), len(lines))
+    prefix = 0
+    while prefix < limit and base[prefix] == lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and base[-1 - suffix] == lines[-1 - suffix]:
+        suffix += 1
+    base_middle = base[prefix:len(base) - suffix]
+    middle = lines[prefix:len(lines) - suffix]
+    base_offset += prefix
+    offset += prefix
+    if not base_middle and not middle:
+        return []
+    if len(base_middle) * len(middle) > MAX_DIFF_WORK:
+        # Too large for difflib: line up the lines found once on each side and compare between them
+        anchors = uniqueAnchors(base_middle, middle)
+        if not anchors:
+            return [(base_offset, base_offset + len(base_middle), offset, offset + len(middle))]
+        hunks = []
+        base_start = start = 0
+        anchors.append((len(base_middle), len(middle)))
+        for base_end, end in anchors:
+            if base_end > base_start or end > start:
+                hunks.extend(diffLines(base_middle[base_start:base_end], middle[start:end],
+                                       base_offset + base_start, offset + start))
+            base_start, start = base_end + 1, end + 1
+        return hunks
+    matcher = SequenceMatcher(None, base_middle, middle, autojunk=False)
+    return [(base_offset + i1, base_offset + i2, offset + j1, offset + j2)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+def uniqueAnchors(base, lines):
+    """Return the longest run of (base index, index) pairs of lines found once in each, in order on both sides"""
+    base_counts = Counter(base)
+    counts = Counter(lines)
+    positions = {line: i for i, line in enumerate(base) if base_counts[line] == 1}
+    pairs = [(positions[line], j) for j, line in enumerate(lines) if counts[line] == 1 and line in positions]
+    # Patience sorting: the pairs are in order of index, so take the longest increasing run of base indexes
+    tails = []
+    tail_pairs = []
+    previous = []
+    for k, (i, j) in enumerate(pairs):
+        length = bisect_left(tails, i)
+        if length == len(tails):
+            tails.append(i)
+            tail_pairs.append(k)
+        else:
+            tails[length] = i
+            tail_pairs[length] = k
+        previous.append(tail_pairs[length - 1] if length else -1)
+    anchors = []
+    k = tail_pairs[-1] if tail_pairs else -1
+    while k != -1:
+        anchors.append(pairs[k])
+        k = previous[k]
+    anchors.reverse()
+    return anchors
+
+def shiftLine(line, first, old_end, new_end):
+    """Return where a line boundary moves when lines first to old_end are replaced by first to new_end"""
+    if line <= first:
+        return line
+    if line >= old_end:
+        return line + new_end - old_end
+    return new_end
+
+def lineChanges(hunks, line_count):
+    """Return the (start, end, kind) changed lines of hunks; a deletion marks the line after it"""
+    changes = []
+    for base_start, base_end, start, end in hunks:
+        if base_start == base_end:
+            changes.append((start, end, ADDED))
+        elif start == end:
+            start = min(start, line_count - 1)
+            changes.append((start, start, DELETED))
+        else:
+            changes.append((start, end, MODIFIED))
+    return changes
+
+def hunkStart(hunk):
+    """Return the first buffer line of a hunk"""
+    return hunk[2]
+
+def hunkEnd(hunk):
+    """Return the buffer line after a hunk"""
+    return hunk[3]
+
+class VcsWorker(QThread):
+    """Thread that runs git and compares edited regions with their committed lines"""
+    # File path and its committed lines, [] if it was added since or None if it isn't tracked
+    baseRead = pyqtSignal(str, object)
+    # File path, generation, and the compared region as (start, end, hunks)
+    regionDiffed = pyqtSignal(str, int, object)
+    # Generation and the result of repositoryStatus
+    statusRead = pyqtSignal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.jobs = deque()
+        self.active = False
+        # Work tree of each folder a file was read from; only touched by the thread
+        self.roots = {}
+
+    def request(self, job, *args):
+        """Queue a method to run on the thread; the thread runs only while there is work"""
+        with self.lock:
+            self.jobs.append((job, args))
+            if self.active:
+                return
+            self.active = True
+        # A previous run may still be returning
+        self.wait()
+        self.start()
+
+    def stop(self):
+        """Drop queued jobs and wait for the current one"""
+        with self.lock:
+            self.jobs.clear()
+        self.wait()
+
+    def run(self):
+        """Run queued jobs until the queue is empty"""
+        while True:
+            with self.lock:
+                if not self.jobs:
+                    self.active = False
+                    return
+                job, args = self.jobs.popleft()
+            try:
+                job(*args)
+            except Exception as e:
+                print(f"Error in version control job: {str(e)}")
+
+    def forgetRoots(self):
+        """Look up the repository of each folder again"""
+        self.roots.clear()
+
+    def readBase(self, file_path, encoding):
+        """Read a file's committed lines from its repository"""
+        real_path = os.path.realpath(file_path)
+        directory = os.path.dirname(real_path)
+        if directory not in self.roots:
+            paths = repositoryPaths(directory)
+            self.roots[directory] = paths[0] if paths else None
+        root = self.roots[directory]
+        lines = None
+        if root is not None:
+            rel_path = os.path.relpath(real_path, root).replace(os.sep, '/')
+            with tracer.span("vcs.base", path=file_path):
+                lines = headLines(root, rel_path, encoding)
+        self.baseRead.emit(file_path, lines)
+
+    def diffRegion(self, file_path, generation, base, base_start, base_end, lines, start):
+        """Compare a region of a buffer with the committed lines it lines up with"""
+        with tracer.span("vcs.diff", path=file_path, lines=len(lines)):
+            hunks = diffLines(base[base_start:base_end], lines, base_start, start)
+        self.regionDiffed.emit(file_path, generation, (start, start + len(lines), hunks))
+
+    def readStatus(self, generation, directory):
+        """Read which files below a folder have changed"""
+        with tracer.span("vcs.status", path=directory):
+            status = repositoryStatus(directory)
+        self.statusRead.emit(generation, status)
+
+class TrackedFile:
+    """An open editor compared with its file as committed in HEAD"""
+    __slots__ = ('editor', 'connection', 'base', 'hunks', 'dirty', 'line_count', 'generation')
+
+    def __init__(self, editor):
+        self.editor = editor
+        self.connection = None
+        # Committed lines once read; None until then, or if the file isn't tracked
+        self.base = None
+        # Sorted (base start, base end, start, end) regions that differ, all outside dirty
+        self.hunks = []
+        # (start, end) lines edited since they were last compared, or None
+        self.dirty = None
+        self.line_count = editor.document().blockCount()
+        # Bumped on every edit, so comparisons of older text are dropped
+        self.generation = 0
+
+class VcsEngine(QObject):
+    """Compares watched editors with HEAD once their edits pause, and reads the project's file status"""
+    # File path and its (start, end, kind) changed lines
+    lineChangesChanged = pyqtSignal(str, list)
+    # Status of each changed file below the project folder, by absolute path
+    statusChanged = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.files = {}
+        self.pending = set()
+        self.worker = VcsWorker(self)
+        self.worker.baseRead.connect(self.onBaseRead)
+        self.worker.regionDiffed.connect(self.onRegionDiffed)
+        self.worker.statusRead.connect(self.onStatusRead)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DIFF_DELAY)
+        self.timer.timeout.connect(self.diffPending)
+
+        self.folder = None
+        self.git_dir = None
+        self.head = None
+        self.status_generation = 0
+        self.status_timer = QTimer(self)
+        self.status_timer.setSingleShot(True)
+        self.status_timer.setInterval(STATUS_DELAY)
+        self.status_timer.timeout.connect(self.refreshStatus)
+        # Commits, checkouts and staging all rewrite files directly in the git directory
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.scheduleStatus)
+
+    def watch(self, file_path, editor):
+        """Compare an editor with its committed file once it is read, and again whenever edits pause"""
+        self.forget(file_path)
+        tracked = TrackedFile(editor)
+        tracked.connection = editor.document().contentsChange.connect(
+            lambda position, removed, added: self.onContentsChange(file_path, position, added))
+        self.files[file_path] = tracked
+        self.worker.request(self.worker.readBase, file_path, editor.encoding)
+
+    def forget(self, file_path):
+        """Stop comparing a file"""
+        tracked = self.files.pop(file_path, None)
+        if tracked is None:
+            return
+        try:
+            tracked.editor.document().contentsChange.disconnect(tracked.connection)
+        except (TypeError, RuntimeError):
+            # The editor has already been deleted
+            pass
+        self.pending.discard(file_path)
+
+    def onBaseRead(self, file_path, lines):
+        """Compare the whole buffer with the committed lines just read"""
+        tracked = self.files.get(file_path)
+        if tracked is None:
+            return
+        tracked.base = lines
+        tracked.hunks = []
+        tracked.generation += 1
+        if lines is None:
+            tracked.dirty = None
+            self.lineChangesChanged.emit(file_path, [])
+            return
+        tracked.dirty = (0, tracked.line_count)
+        self.diff(file_path)
+
+    def onContentsChange(self, file_path, position, added):
+        """Widen the region to compare again over an edit, and move the changes below it"""
+        tracked = self.files.get(file_path)
+        if tracked is None:
+            return
+        tracked.generation += 1
+        document = tracked.editor.document()
+        line_count = document.blockCount()
+        first = document.findBlock(position).blockNumber()
+        last = document.findBlock(position + added)
+        new_end = (last if last.isValid() else document.lastBlock()).blockNumber() + 1
+        old_end = max(first, new_end - (line_count - tracked.line_count))
+        tracked.line_count = line_count
+        if tracked.base is None:
+            return
+
+        start, end = first, new_end
+        if tracked.dirty is not None:
+            start = min(start, shiftLine(tracked.dirty[0], first, old_end, new_end))
+            end = max(end, shiftLine(tracked.dirty[1], first, old_end, new_end))
+        hunks = [(base_start, base_end, shiftLine(hunk_start, first, old_end, new_end),
+                  shiftLine(hunk_end, first, old_end, new_end))
+                 for base_start, base_end, hunk_start, hunk_end in tracked.hunks]
+        # Hunks the region overlaps or touches are compared again with it
+        low = bisect_left(hunks, start, key=hunkEnd)
+        high = bisect_right(hunks, end, key=hunkStart)
+        if low < high:
+            start = min(start, hunks[low][2])
+            end = max(end, hunks[high - 1][3])
+        tracked.hunks = hunks[:low] + hunks[high:]
+        tracked.dirty = (start, end)
+        if new_end != old_end:
+            # Markers below the edit move with their lines until the region is compared again
+            self.lineChangesChanged.emit(file_path, lineChanges(hunks, line_count))
+        self.pending.add(file_path)
+        self.timer.start()
+
+    def diffPending(self):
+        """Compare every file edited since the last comparison"""
+        pending = self.pending
+        self.pending = set()
+        for file_path in pending:
+            self.diff(file_path)
+
+    def diff(self, file_path):
+        """Snapshot a file's edited region and compare it with HEAD on the worker thread"""
+        tracked = self.files.get(file_path)
+        if tracked is None or tracked.base is None or tracked.dirty is None:
+            return
+        base = tracked.base
+        line_count = tracked.line_count
+        end = min(tracked.dirty[1], line_count)
+        start = min(tracked.dirty[0], end)
+        # Outside the region and the hunks, lines are unchanged and line up with the committed ones
+        hunks = tracked.hunks
+        index = bisect_left(hunks, start, key=hunkStart)
+        base_start = hunks[index - 1][1] + start - hunks[index - 1][3] if index else start
+        if index < len(hunks):
+            base_end = hunks[index][0] - (hunks[index][2] - end)
+        else:
+            base_end = len(base) - (line_count - end)
+        if not 0 <= base_start <= base_end <= len(base):
+            # The hunks are out of step with the buffer; compare all of it
+            start, end, base_start, base_end = 0, line_count, 0, len(base)
+            tracked.hunks = []
+            tracked.dirty = (start, end)
+
+        editor = tracked.editor
+        with tracer.span("vcs.snapshot", path=file_path, lines=end - start):
+            if end - start > SNAPSHOT_BLOCKS:
+                lines = editor.toPlainText().split('\n')[start:end]
+            else:
+                lines = []
+                block = editor.document().findBlockByNumber(start)
+                for _ in range(end - start):
+                    lines.append(block.text())
+                    block = block.next()
+        self.worker.request(self.worker.diffRegion, file_path, tracked.generation,
+                            base, base_start, base_end, lines, start)
+
+    def onRegionDiffed(self, file_path, generation, result):
+        """Put the hunks of a compared region among the others, unless it has been edited since"""
+        tracked = self.files.get(file_path)
+        if tracked is None or generation != tracked.generation:
+            return
+        start, end, region = result
+        index = bisect_left(tracked.hunks, start, key=hunkStart)
+        tracked.hunks[index:index] = region
+        tracked.dirty = None
+        self.lineChangesChanged.emit(file_path, lineChanges(tracked.hunks, tracked.line_count))
+
+    def setFolder(self, folder):
+        """Read the status of the files below a folder, now and whenever its repository changes"""
+        self.folder = folder
+        self.head = None
+        self.git_dir = None
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.refreshStatus()
+
+    def scheduleStatus(self):
+        """Read the status again once saves and repository changes settle"""
+        if self.folder is not None:
+            self.status_timer.start()
+
+    def refreshStatus(self):
+        """Read the status of the project folder on the worker thread"""
+        self.status_timer.stop()
+        if self.folder is None:
+            return
+        self.status_generation += 1
+        self.worker.request(self.worker.readStatus, self.status_generation, self.folder)
+
+    def onStatusRead(self, generation, status):
+        """Publish the project's file status, and compare with HEAD again if it has moved"""
+        if generation != self.status_generation:
+            return
+        if status is None:
+            self.statusChanged.emit({})
+            return
+        root, git_dir, head, statuses = status
+        if git_dir != self.git_dir:
+            if self.watcher.directories():
+                self.watcher.removePaths(self.watcher.directories())
+            self.git_dir = git_dir
+            self.watcher.addPath(git_dir)
+        if self.head is not None and head != self.head:
+            self.reloadBases()
+        self.head = head
+        self.statusChanged.emit(statuses)
+
+    def reloadBases(self):
+        """Read the committed lines of every watched file again"""
+        self.worker.request(self.worker.forgetRoots)
+        for file_path, tracked in self.files.items():
+            self.worker.request(self.worker.readBase, file_path, tracked.editor.encoding)
+
+    def shutdown(self):
+        """Stop comparing and reading status; queued git commands are dropped"""
+        self.timer.stop()
+        self.status_timer.stop()
+        self.pending.clear()
+        self.worker.stop()
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
@@ -5,15 +5,41 @@ PyIDE Main Window Class
 import os
 import json
 import sys
+import threading
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QSplitter,
-                           QDockWidget, QStatusBar, QFileDialog, QMessageBox)
-from PyQt6.QtGui import QAction, QKeySequence
-from PyQt6.QtCore import Qt
+                           QDockWidget, QStatusBar, QFileDialog, QMessageBox,
+                           QInputDialog, QLabel)
+from PyQt6.QtGui import QAction, QKeySequence, QTextCursor
+from PyQt6.QtCore import Qt, QTimer
 
 from .editors.code_editor import CodeEditor
-from .editors.tab_widget import TabWidget
+from .editors.tab_widget import TabWidget, formatMemory
+from .editors.diagnostics import DiagnosticsEngine
+from .editors.completion import CompletionEngine
 from .views.file_system_view import FileSystemView
+from .views.quick_open import QuickOpenDialog
+from .views.find_in_files import FindInFilesPanel
+from .views.find_bar import FindBar
+from .views.outline_view import OutlineView
+from .views.symbol_search import SymbolSearchDialog
+from .views.file_operations_panel import FileOperationsPanel
+from .views.problems_panel import ProblemsPanel
+from .project.file_index import ProjectFileIndex
+from .project.search import shutdownPool
+from .project.symbol_index import ProjectSymbolIndex
+from .project.file_operations import FileOperationQueue, FAILED
+from .project.vcs import VcsEngine
 from .terminal.terminal import Terminal
+from .terminal.run_engine import RunEngine
+from .instrumentation import tracer, EventLoopWatchdog
+
+def preloadHighlighting():
+    """Import Pygments and the Python lexer off the GUI thread"""
+    try:
+        from .editors.syntax_highlighter import preloadLexers
+        preloadLexers()
+    except Exception as e:
+        print(f"Error preloading lexers: {str(e)}")
 
 class PyIDE(QMainWindow):
     """Main IDE window class"""
@@ -22,8 +48,32 @@ class PyIDE(QMainWindow):
         self.setWindowTitle("PyIDE")
         self.setMinimumSize(1000, 600)
         self.settings_file = os.path.join(os.path.expanduser("~"), ".pyide", "settings.json")
+        self.project_root = None
+        self.run_after_save = None
+        self.project_index = ProjectFileIndex(self)
+        self.project_index.progress.connect(self.onIndexProgress)
+        self.symbol_index = ProjectSymbolIndex(self.project_index, self)
+        self.symbol_index.progress.connect(self.onSymbolProgress)
+        self.symbol_index.updated.connect(self.onSymbolsUpdated)
+        self.file_operations = FileOperationQueue(self)
+        self.file_operations.operationAdded.connect(self.onFileOperationAdded)
+        self.file_operations.operationFinished.connect(self.onFileOperationFinished)
+        self.diagnostics = DiagnosticsEngine(self)
+        self.diagnostics.diagnosticsChanged.connect(self.onDiagnosticsChanged)
+        self.completion = CompletionEngine(self)
+        self.vcs = VcsEngine(self)
+        self.vcs.lineChangesChanged.connect(self.onLineChangesChanged)
+        self.run_engine = RunEngine(self)
+        self.run_engine.runFinished.connect(self.onRunFinished)
         self.setupUi()
         self.loadSettings()
+        self.background_started = False
+        
+        # Instrumentation costs nothing until tracing is switched on
+        self.watchdog = EventLoopWatchdog(parent=self)
+        self.trace_timer = QTimer(self)
+        self.trace_timer.setInterval(1000)
+        self.trace_timer.timeout.connect(self.showTraceStats)
         
     def setupUi(self):
         """Set up the user interface"""
@@ -40,23 +90,69 @@ class PyIDE(QMainWindow):
         
         # Create file system view
         self.file_system_dock = QDockWidget("Explorer", self)
-        self.file_system_view = FileSystemView(self)
+        self.file_system_view = FileSystemView(self, self.file_operations)
+        self.vcs.statusChanged.connect(self.file_system_view.setStatuses)
         self.file_system_dock.setWidget(self.file_system_view)
         self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.file_system_dock)
         
         # Create editor area
         self.editor_tabs = TabWidget(self)
+        self.editor_tabs.loadProgress.connect(self.onLoadProgress)
+        self.editor_tabs.fileLoaded.connect(self.onFileLoaded)
+        self.editor_tabs.fileSaved.connect(self.onFileSaved)
+        self.editor_tabs.saveFailed.connect(self.onSaveFailed)
+        self.editor_tabs.fileClosed.connect(self.diagnostics.forget)
+        self.editor_tabs.fileClosed.connect(self.vcs.forget)
+        self.editor_tabs.fileHibernated.connect(self.onFileHibernated)
+        self.editor_tabs.watcher.conflict.connect(self.onFileConflict)
+        self.editor_tabs.currentChanged.connect(self.onCurrentTabChanged)
         self.main_splitter.addWidget(self.editor_tabs)
         
+        # Create outline view
+        self.outline_dock = QDockWidget("Outline", self)
+        self.outline_view = OutlineView(self)
+        self.outline_view.lineActivated.connect(self.goToOutlineLine)
+        self.outline_dock.setWidget(self.outline_view)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.outline_dock)
+        
         # Create terminal
         self.terminal_dock = QDockWidget("Terminal", self)
         self.terminal = Terminal(self)
         self.terminal_dock.setWidget(self.terminal)
         self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.terminal_dock)
         
+        # Create find in files panel
+        self.find_dock = QDockWidget("Find in Files", self)
+        self.find_panel = FindInFilesPanel(self.project_index, self)
+        self.find_panel.locationActivated.connect(self.openFile)
+        self.find_dock.setWidget(self.find_panel)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.find_dock)
+        self.tabifyDockWidget(self.terminal_dock, self.find_dock)
+        
+        # Create file operations panel
+        self.file_operations_dock = QDockWidget("File Operations", self)
+        self.file_operations_panel = FileOperationsPanel(self.file_operations, self)
+        self.file_operations_dock.setWidget(self.file_operations_panel)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.file_operations_dock)
+        self.tabifyDockWidget(self.terminal_dock, self.file_operations_dock)
+        
+        # Create problems panel
+        self.problems_dock = QDockWidget("Problems", self)
+        self.problems_panel = ProblemsPanel(self)
+        self.problems_panel.locationActivated.connect(self.openFile)
+        self.problems_dock.setWidget(self.problems_panel)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.problems_dock)
+        self.tabifyDockWidget(self.terminal_dock, self.problems_dock)
+        self.terminal_dock.raise_()
+        
         # Set up main layout
         main_layout.addWidget(self.main_splitter)
         
+        # Create find bar, shown below the editors on demand
+        self.find_bar = FindBar(self)
+        self.find_bar.hide()
+        main_layout.addWidget(self.find_bar)
+        
         # Create menu bar
         self.setupMenuBar()
         
@@ -65,6 +161,14 @@ class PyIDE(QMainWindow):
         self.setStatusBar(self.statusBar)
         self.statusBar.showMessage("Ready")
         
+        # Memory of the current tab and of all tabs, refreshed while the window is open
+        self.memory_label = QLabel()
+        self.statusBar.addPermanentWidget(self.memory_label)
+        self.memory_timer = QTimer(self)
+        self.memory_timer.setInterval(2000)
+        self.memory_timer.timeout.connect(self.updateMemoryStatus)
+        self.memory_timer.start()
+        
     def setupMenuBar(self):
         """Set up the menu bar and actions"""
         # Menu bar
@@ -90,6 +194,12 @@ class PyIDE(QMainWindow):
         open_folder_action.triggered.connect(self.openFolder)
         file_menu.addAction(open_folder_action)
         
+        # Go to file action
+        go_to_file_action = QAction("Go to File", self)
+        go_to_file_action.setShortcut(QKeySequence("Ctrl+P"))
+        go_to_file_action.triggered.connect(self.goToFile)
+        file_menu.addAction(go_to_file_action)
+        
         file_menu.addSeparator()
         
         # Save action
@@ -162,6 +272,56 @@ class PyIDE(QMainWindow):
         select_all_action.triggered.connect(self.selectAll)
         edit_menu.addAction(select_all_action)
         
+        edit_menu.addSeparator()
+        
+        # Go to line action
+        go_to_line_action = QAction("Go to Line", self)
+        go_to_line_action.setShortcut(QKeySequence("Ctrl+G"))
+        go_to_line_action.triggered.connect(self.goToLine)
+        edit_menu.addAction(go_to_line_action)
+        
+        # Find action
+        find_action = QAction("Find", self)
+        find_action.setShortcut(QKeySequence.StandardKey.Find)
+        find_action.triggered.connect(self.find)
+        edit_menu.addAction(find_action)
+        
+        # Replace action
+        replace_action = QAction("Replace", self)
+        replace_action.setShortcut(QKeySequence("Ctrl+H"))
+        replace_action.triggered.connect(self.replace)
+        edit_menu.addAction(replace_action)
+        
+        # Find next and previous actions
+        find_next_action = QAction("Find Next", self)
+        find_next_action.setShortcut(QKeySequence.StandardKey.FindNext)
+        find_next_action.triggered.connect(self.find_bar.findNext)
+        edit_menu.addAction(find_next_action)
+        find_previous_action = QAction("Find Previous", self)
+        find_previous_action.setShortcut(QKeySequence.StandardKey.FindPrevious)
+        find_previous_action.triggered.connect(self.find_bar.findPrevious)
+        edit_menu.addAction(find_previous_action)
+        
+        # Find in files action
+        find_in_files_action = QAction("Find in Files", self)
+        find_in_files_action.setShortcut(QKeySequence("Ctrl+Shift+F"))
+        find_in_files_action.triggered.connect(self.findInFiles)
+        edit_menu.addAction(find_in_files_action)
+        
+        edit_menu.addSeparator()
+        
+        # Go to definition action
+        go_to_definition_action = QAction("Go to Definition", self)
+        go_to_definition_action.setShortcut(QKeySequence("F12"))
+        go_to_definition_action.triggered.connect(self.goToDefinition)
+        edit_menu.addAction(go_to_definition_action)
+        
+        # Go to symbol action
+        go_to_symbol_action = QAction("Go to Symbol in Workspace", self)
+        go_to_symbol_action.setShortcut(QKeySequence("Ctrl+T"))
+        go_to_symbol_action.triggered.connect(self.goToSymbol)
+        edit_menu.addAction(go_to_symbol_action)
+        
         # View menu
         view_menu = menu_bar.addMenu("View")
         
@@ -177,6 +337,35 @@ class PyIDE(QMainWindow):
         toggle_terminal_action.triggered.connect(self.toggleTerminal)
         view_menu.addAction(toggle_terminal_action)
         
+        # Toggle outline action
+        toggle_outline_action = QAction("Toggle Outline", self)
+        toggle_outline_action.triggered.connect(self.toggleOutline)
+        view_menu.addAction(toggle_outline_action)
+        
+        # Show problems action
+        show_problems_action = QAction("Problems", self)
+        show_problems_action.setShortcut(QKeySequence("Ctrl+Shift+M"))
+        show_problems_action.triggered.connect(self.showProblems)
+        view_menu.addAction(show_problems_action)
+        
+        # Follow the end of a growing file, as tail -f does
+        self.follow_action = QAction("Follow File End", self)
+        self.follow_action.setCheckable(True)
+        self.follow_action.toggled.connect(self.setFollowing)
+        view_menu.addAction(self.follow_action)
+        
+        view_menu.addSeparator()
+        
+        # Instrumentation actions
+        self.tracing_action = QAction("Record Performance Trace", self)
+        self.tracing_action.setCheckable(True)
+        self.tracing_action.toggled.connect(self.setTracing)
+        view_menu.addAction(self.tracing_action)
+        
+        export_trace_action = QAction("Export Performance Trace...", self)
+        export_trace_action.triggered.connect(self.exportTrace)
+        view_menu.addAction(export_trace_action)
+        
         # Run menu
         run_menu = menu_bar.addMenu("Run")
         
@@ -186,6 +375,20 @@ class PyIDE(QMainWindow):
         run_file_action.triggered.connect(self.runCurrentFile)
         run_menu.addAction(run_file_action)
         
+        # Stop action
+        stop_run_action = QAction("Stop", self)
+        stop_run_action.setShortcut(QKeySequence("Shift+F5"))
+        stop_run_action.triggered.connect(self.run_engine.stop)
+        run_menu.addAction(stop_run_action)
+        
+        run_menu.addSeparator()
+        
+        # Warm interpreter action
+        self.warm_run_action = QAction("Use Warm Interpreter", self)
+        self.warm_run_action.setCheckable(True)
+        self.warm_run_action.toggled.connect(self.run_engine.setWarm)
+        run_menu.addAction(self.warm_run_action)
+        
         # Help menu
         help_menu = menu_bar.addMenu("Help")
         
@@ -197,26 +400,231 @@ class PyIDE(QMainWindow):
     def newFile(self):
         """Create a new empty file"""
         editor = CodeEditor()
+        self.editor_tabs.trackEdits(editor)
+        self.completion.attach(editor)
         index = self.editor_tabs.addTab(editor, "Untitled")
         self.editor_tabs.setCurrentIndex(index)
         self.statusBar.showMessage("New file created")
     
-    def openFile(self, path=None):
+    def openFile(self, path=None, line=None, column=None):
         """Open a file from disk"""
         if not path:
             path, _ = QFileDialog.getOpenFileName(self, "Open File", "", "All Files (*)")
         
         if path:
-            self.editor_tabs.openFile(path)
-            self.statusBar.showMessage(f"Opened {path}")
+            self.statusBar.showMessage(f"Opening {path}")
+            self.editor_tabs.openFile(path, line, column)
+    
+    def openLocations(self, locations):
+        """Open the (path, line, column) locations named on a command line; folders open in the explorer"""
+        files = []
+        for path, line, column in locations:
+            if os.path.isdir(path):
+                self.openFolder(path)
+            elif os.path.isfile(path):
+                files.append((path, line, column))
+            else:
+                self.statusBar.showMessage(f"No such file: {path}")
+        if len(files) == 1:
+            self.openFile(*files[0])
+        elif files:
+            self.editor_tabs.openFiles(files)
+            self.statusBar.showMessage(f"Opened {len(files)} files")
     
-    def openFolder(self):
+    def onInstanceRequest(self, locations):
+        """Open what another launch asked for and bring the window to the front"""
+        self.openLocations(locations)
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
+    
+    def onLoadProgress(self, path, percent):
+        """Show how much of a file has been loaded"""
+        self.statusBar.showMessage(f"Loading {path}... {percent}%")
+    
+    def onFileLoaded(self, path):
+        """Report that a file has finished loading"""
+        self.statusBar.showMessage(f"Opened {path}")
+        editor = self.editor_tabs.open_files.get(path)
+        if isinstance(editor, CodeEditor):
+            self.completion.attach(editor)
+        self.watchDiagnostics(path)
+        self.watchChanges(path)
+        self.updateMemoryStatus()
+    
+    def watchDiagnostics(self, path):
+        """Check a Python file's editor as it is edited"""
+        editor = self.editor_tabs.open_files.get(path)
+        if path.endswith('.py') and isinstance(editor, CodeEditor):
+            self.diagnostics.watch(path, editor)
+    
+    def watchChanges(self, path):
+        """Mark the lines of a file's editor that differ from the last commit"""
+        editor = self.editor_tabs.open_files.get(path)
+        if isinstance(editor, CodeEditor):
+            self.vcs.watch(path, editor)
+    
+    def onFileHibernated(self, path):
+        """Stop checking a hibernated file; its problems stay listed until it is rebuilt"""
+        self.diagnostics.forget(path, clear=False)
+        self.vcs.forget(path)
+        self.updateMemoryStatus()
+    
+    def onFileConflict(self, path):
+        """Report a file that changed on disk while its editor has unsaved changes"""
+        self.statusBar.showMessage(f"{path} changed on disk; keeping the unsaved changes in the editor")
+    
+    def setFollowing(self, follow):
+        """Keep the end of the current file in view as it grows"""
+        file_path = self.editor_tabs.tabToolTip(self.editor_tabs.currentIndex())
+        if not file_path:
+            self.follow_action.blockSignals(True)
+            self.follow_action.setChecked(False)
+            self.follow_action.blockSignals(False)
+            return
+        self.editor_tabs.watcher.setFollowing(file_path, follow)
+    
+    def updateMemoryStatus(self):
+        """Show the estimated memory of the current tab and of all tabs"""
+        total, live = self.editor_tabs.memoryUsage()
+        index = self.editor_tabs.currentIndex()
+        current = self.editor_tabs.tabMemory(index) if index != -1 else 0
+        self.memory_label.setText(f"Tab {formatMemory(current)} | All tabs {formatMemory(total)} "
+                                  f"({live} of {self.editor_tabs.count()} loaded)")
+    
+    def onDiagnosticsChanged(self, path, diagnostics):
+        """Show a file's diagnostics in its editor and the problems panel"""
+        editor = self.editor_tabs.open_files.get(path)
+        if isinstance(editor, CodeEditor):
+            editor.setDiagnostics(diagnostics)
+        self.problems_panel.setDiagnostics(path, diagnostics)
+    
+    def onLineChangesChanged(self, path, changes):
+        """Show the lines a file's editor has changed since the last commit"""
+        editor = self.editor_tabs.open_files.get(path)
+        if isinstance(editor, CodeEditor):
+            editor.setLineChanges(changes)
+    
+    def openFolder(self, folder_path=None):
         """Open a folder in the file explorer"""
-        folder_path = QFileDialog.getExistingDirectory(self, "Open Folder", "")
+        if not folder_path:
+            folder_path = QFileDialog.getExistingDirectory(self, "Open Folder", "")
         if folder_path:
-            self.file_system_view.setRootIndex(self.file_system_view.model.index(folder_path))
+            self.project_root = folder_path
+            self.file_system_view.setRootPath(folder_path)
+            self.vcs.setFolder(folder_path)
+            self.symbol_index.open(folder_path)
+            self.completion.clearProject()
+            self.project_index.open(folder_path)
+            self.find_panel.setRoot(folder_path)
             self.statusBar.showMessage(f"Opened folder: {folder_path}")
     
+    def onIndexProgress(self, count):
+        """Show how many project files have been indexed"""
+        self.statusBar.showMessage(f"Indexed {count} files")
+    
+    def onSymbolProgress(self, done, total):
+        """Show how many changed Python files have been parsed"""
+        if total:
+            self.statusBar.showMessage(f"Indexing symbols... {done}/{total} files")
+    
+    def onSymbolsUpdated(self):
+        """Reload the project's names for completion"""
+        if self.symbol_index.root is not None:
+            self.completion.loadProject(self.symbol_index.databaseFile(self.symbol_index.root))
+    
+    def onFileOperationAdded(self, operation):
+        """Bring up the operations panel if an operation is still going after a moment"""
+        self.statusBar.showMessage(f"{operation.description()}...")
+        QTimer.singleShot(500, lambda: self.showFileOperations(operation))
+    
+    def showFileOperations(self, operation):
+        """Raise the operations panel while an operation is unfinished"""
+        if not operation.isFinished():
+            self.file_operations_dock.setVisible(True)
+            self.file_operations_dock.raise_()
+    
+    def onFileOperationFinished(self, operation):
+        """Report how a file operation ended"""
+        if operation.state == FAILED:
+            self.statusBar.showMessage(f"{operation.description()} failed: {operation.error}")
+        else:
+            self.statusBar.showMessage(f"{operation.description()}: {operation.state.lower()}")
+        self.vcs.scheduleStatus()
+    
+    def onCurrentTabChanged(self, index):
+        """Show the outline of the newly selected tab"""
+        editor = self.editor_tabs.widget(index)
+        if not isinstance(editor, CodeEditor):
+            editor = None
+        self.outline_view.setEditor(editor, self.editor_tabs.tabToolTip(index))
+        self.find_bar.setEditor(editor)
+        self.follow_action.blockSignals(True)
+        self.follow_action.setChecked(self.editor_tabs.watcher.isFollowing(self.editor_tabs.tabToolTip(index)))
+        self.follow_action.blockSignals(False)
+        self.updateMemoryStatus()
+    
+    def goToOutlineLine(self, line):
+        """Move the current editor to a line picked in the outline"""
+        editor = self.editor_tabs.currentWidget()
+        if editor:
+            editor.goToLine(line)
+            editor.setFocus()
+    
+    def goToDefinition(self):
+        """Jump to the definition of the name under the cursor"""
+        editor = self.editor_tabs.currentWidget()
+        if not isinstance(editor, CodeEditor):
+            return
+        cursor = editor.textCursor()
+        cursor.select(QTextCursor.SelectionType.WordUnderCursor)
+        name = cursor.selectedText()
+        if not name.isidentifier():
+            return
+        
+        # Definitions in the current file win, using its unsaved text
+        file_path = self.editor_tabs.tabToolTip(self.editor_tabs.currentIndex())
+        if file_path.endswith('.py') or not file_path:
+            # None when the text is too large to parse here; the index is used instead
+            symbols = self.outline_view.currentSymbols(editor) or []
+            local = [line for symbol, kind, line, column, container in symbols
+                     if symbol == name and kind != 'import']
+            if local:
+                editor.goToLine(local[0])
+                return
+        
+        definitions = self.symbol_index.definitions(name)
+        if not definitions:
+            self.statusBar.showMessage(f"No definition found for {name}")
+        elif len(definitions) == 1 or definitions[1][1] == 'import':
+            self.openFile(definitions[0][2], definitions[0][3])
+        else:
+            dialog = SymbolSearchDialog(self.symbol_index, self)
+            dialog.locationSelected.connect(self.openFile)
+            dialog.showDefinitions([d for d in definitions if d[1] != 'import'])
+            dialog.exec()
+    
+    def goToSymbol(self):
+        """Search the project's classes, functions and assignments by name"""
+        if self.symbol_index.root is None:
+            self.statusBar.showMessage("Open a folder to search its symbols")
+            return
+        
+        dialog = SymbolSearchDialog(self.symbol_index, self)
+        dialog.locationSelected.connect(self.openFile)
+        dialog.exec()
+    
+    def goToFile(self):
+        """Quickly open a project file by fuzzy name matching"""
+        if self.project_index.index is None:
+            self.statusBar.showMessage("Open a folder to search its files")
+            return
+        
+        dialog = QuickOpenDialog(self.project_index, self)
+        dialog.fileSelected.connect(self.openFile)
+        dialog.exec()
+    
     def saveFile(self):
         """Save the current file"""
         current_tab = self.editor_tabs.currentIndex()
@@ -229,12 +637,15 @@ class PyIDE(QMainWindow):
             return
         
         editor = self.editor_tabs.widget(current_tab)
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(editor.toPlainText())
-            self.statusBar.showMessage(f"Saved {file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not save file: {str(e)}")
+        if editor.isReadOnly():
+            return
+        
+        with tracer.span("ide.saveFile", path=file_path):
+            pending = self.editor_tabs.saveEditor(editor, file_path)
+        if pending:
+            self.statusBar.showMessage(f"Saving {file_path}...")
+        else:
+            self.statusBar.showMessage(f"No changes to save in {file_path}")
     
     def saveFileAs(self):
         """Save the current file with a new name"""
@@ -243,21 +654,44 @@ class PyIDE(QMainWindow):
             return
         
         editor = self.editor_tabs.widget(current_tab)
+        if editor.isReadOnly():
+            return
+        
         file_path, _ = QFileDialog.getSaveFileName(self, "Save File As", "", "All Files (*)")
         
         if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(editor.toPlainText())
-                
-                # Update tab information
-                self.editor_tabs.setTabText(current_tab, os.path.basename(file_path))
-                self.editor_tabs.setTabToolTip(current_tab, file_path)
-                self.editor_tabs.open_files[file_path] = editor
-                
-                self.statusBar.showMessage(f"Saved as {file_path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Could not save file: {str(e)}")
+            # Update tab information
+            old_path = self.editor_tabs.tabToolTip(current_tab)
+            if self.editor_tabs.open_files.get(old_path) is editor:
+                del self.editor_tabs.open_files[old_path]
+            self.editor_tabs.setTabToolTip(current_tab, file_path)
+            self.editor_tabs.open_files[file_path] = editor
+            self.editor_tabs.updateTabTitle(editor)
+            self.onCurrentTabChanged(current_tab)
+            if old_path:
+                self.diagnostics.forget(old_path)
+                self.vcs.forget(old_path)
+            self.watchDiagnostics(file_path)
+            self.watchChanges(file_path)
+            
+            with tracer.span("ide.saveFileAs", path=file_path):
+                self.editor_tabs.saveEditor(editor, file_path, force=True)
+            self.statusBar.showMessage(f"Saving as {file_path}...")
+    
+    def onFileSaved(self, path):
+        """Report a finished save and run the file if that was waiting on it"""
+        self.symbol_index.updateFiles([path])
+        self.vcs.scheduleStatus()
+        self.statusBar.showMessage(f"Saved {path}")
+        if path == self.run_after_save:
+            self.run_after_save = None
+            self.runFile(path)
+    
+    def onSaveFailed(self, path, message):
+        """Report a save that didn't reach the disk"""
+        if path == self.run_after_save:
+            self.run_after_save = None
+        QMessageBox.critical(self, "Error", f"Could not save file: {message}")
     
     def undo(self):
         """Undo the last action"""
@@ -289,10 +723,80 @@ class PyIDE(QMainWindow):
         if self.editor_tabs.currentWidget():
             self.editor_tabs.currentWidget().selectAll()
     
+    def goToLine(self):
+        """Jump to a line in the current editor"""
+        editor = self.editor_tabs.currentWidget()
+        if not editor:
+            return
+        
+        line, ok = QInputDialog.getInt(self, "Go to Line", "Line:", 1, 1, 2**31 - 1)
+        if ok:
+            editor.goToLine(line)
+    
+    def find(self, replace=False):
+        """Show the find bar for the current editor, seeded with the selected text"""
+        editor = self.editor_tabs.currentWidget()
+        if not isinstance(editor, CodeEditor):
+            return
+        selected = editor.textCursor().selectedText()
+        self.find_bar.open(replace, selected if '\u2029' not in selected else "")
+    
+    def replace(self):
+        """Show the find bar with its replace row"""
+        self.find(replace=True)
+    
+    def findInFiles(self):
+        """Show the find in files panel, seeded with the selected text"""
+        self.find_dock.setVisible(True)
+        self.find_dock.raise_()
+        editor = self.editor_tabs.currentWidget()
+        selected = editor.textCursor().selectedText() if isinstance(editor, CodeEditor) else ""
+        self.find_panel.focusQuery(selected if '\u2029' not in selected else "")
+    
+    def setTracing(self, enabled):
+        """Start or stop recording spans, counters and event loop stalls"""
+        if enabled:
+            tracer.clear()
+            tracer.enable()
+            self.watchdog.start()
+            self.trace_timer.start()
+            self.statusBar.showMessage("Recording performance trace")
+        else:
+            tracer.disable()
+            self.watchdog.stop()
+            self.trace_timer.stop()
+            self.statusBar.showMessage("Stopped recording performance trace")
+    
+    def showTraceStats(self):
+        """Show the last second's spans in the status bar"""
+        summary = tracer.summary()
+        self.statusBar.showMessage(f"Trace: {summary}" if summary else "Trace: idle")
+    
+    def exportTrace(self, file_path=None):
+        """Write the recorded trace as Chrome Trace Event JSON, for Perfetto or chrome://tracing"""
+        if not file_path:
+            file_path, _ = QFileDialog.getSaveFileName(self, "Export Performance Trace", "pyide-trace.json",
+                                                       "Trace Files (*.json)")
+        if file_path:
+            try:
+                count = tracer.export(file_path)
+                self.statusBar.showMessage(f"Exported {count} trace events to {file_path}")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Could not export trace: {str(e)}")
+    
     def toggleExplorer(self):
         """Toggle the visibility of the file explorer panel"""
         self.file_system_dock.setVisible(not self.file_system_dock.isVisible())
     
+    def toggleOutline(self):
+        """Toggle the visibility of the outline panel"""
+        self.outline_dock.setVisible(not self.outline_dock.isVisible())
+    
+    def showProblems(self):
+        """Show the problems panel"""
+        self.problems_dock.setVisible(True)
+        self.problems_dock.raise_()
+    
     def toggleTerminal(self):
         """Toggle the visibility of the terminal panel"""
         self.terminal_dock.setVisible(not self.terminal_dock.isVisible())
@@ -308,14 +812,39 @@ class PyIDE(QMainWindow):
             QMessageBox.warning(self, "Warning", "Only Python files can be executed.")
             return
         
-        # Save file before running
-        self.saveFile()
-        
+        # Save file before running; the run waits for the write if there is one
+        editor = self.editor_tabs.widget(current_tab)
+        if self.editor_tabs.saveEditor(editor, file_path):
+            self.run_after_save = file_path
+            self.statusBar.showMessage(f"Saving {file_path}...")
+        else:
+            self.runFile(file_path)
+    
+    def runFile(self, file_path):
+        """Run a Python file in the terminal"""
         # Make terminal visible
         self.terminal_dock.setVisible(True)
         
-        # Execute in terminal
-        self.terminal.execute(f"python {file_path}")
+        if not self.terminal.use_pty:
+            # Without PTYs, run through the terminal's command prompt
+            self.terminal.execute(f"python {file_path}")
+            return
+        
+        # Runs get their own terminal, so they can be interrupted and timed
+        cwd = self.project_root or os.path.dirname(file_path)
+        session = self.run_engine.run(file_path, cwd, *self.terminal.terminalSize())
+        self.terminal.attachRun(session)
+        self.terminal.setFocus()
+        self.statusBar.showMessage(f"Running {file_path}...")
+    
+    def onRunFinished(self, session):
+        """Report a run's exit code and how long it took to show output"""
+        latency = session.firstOutputLatency()
+        message = f"{os.path.basename(session.file_path)} exited with code {session.exit_code}"
+        if latency is not None:
+            mode = "warm" if session.warm else "cold"
+            message += f"; first output after {latency * 1000:.0f} ms ({mode})"
+        self.statusBar.showMessage(message)
     
     def showAbout(self):
         """Show the about dialog"""
@@ -327,6 +856,18 @@ class PyIDE(QMainWindow):
         # TODO: Implement settings dialog
         pass
     
+    def showEvent(self, event):
+        """Start deferred work once the window is on screen"""
+        super().showEvent(event)
+        if not self.background_started:
+            self.background_started = True
+            QTimer.singleShot(0, self.startBackgroundWork)
+    
+    def startBackgroundWork(self):
+        """Warm up what the first file open needs without blocking the window"""
+        threading.Thread(target=preloadHighlighting, name="preload-lexers", daemon=True).start()
+        self.run_engine.prewarm()
+    
     def loadSettings(self):
         """Load settings from config file"""
         # Create settings directory if it doesn't exist
@@ -338,10 +879,39 @@ class PyIDE(QMainWindow):
                     settings = json.load(f)
                     
                 # Apply settings
-                # TODO: Apply loaded settings
+                self.editor_tabs.large_file_threshold = settings.get(
+                    "large_file_threshold", self.editor_tabs.large_file_threshold)
+                self.terminal.setScrollback(settings.get(
+                    "terminal_scrollback", self.terminal.output.scrollback))
+                self.editor_tabs.max_live_tabs = settings.get("max_live_tabs", self.editor_tabs.max_live_tabs)
+                self.editor_tabs.max_live_memory = settings.get("max_live_memory", self.editor_tabs.max_live_memory)
+                self.editor_tabs.setAutosave(settings.get("autosave", False),
+                                             settings.get("autosave_delay", self.editor_tabs.autosave_timer.interval()))
+                self.run_engine.configure(settings.get("run_interpreter"), settings.get("warm_run", False),
+                                          settings.get("warm_run_modules", []))
+                self.warm_run_action.blockSignals(True)
+                self.warm_run_action.setChecked(self.run_engine.warm)
+                self.warm_run_action.blockSignals(False)
+                
+                window = settings.get("window")
+                if window:
+                    self.resize(window["width"], window["height"])
+                    self.move(window["x"], window["y"])
+                self.file_system_dock.setVisible(settings.get("explorer_visible", True))
+                self.terminal_dock.setVisible(settings.get("terminal_visible", True))
+                
+                self.restoreSession(settings.get("session", {}))
         except Exception as e:
             print(f"Error loading settings: {str(e)}")
     
+    def restoreSession(self, session):
+        """Reopen the folder and tabs of the last session"""
+        root = session.get("root")
+        if root and os.path.isdir(root):
+            self.openFolder(root)
+        # Tabs come back as stubs that read their file when first activated
+        self.editor_tabs.restoreSession(session.get("tabs", []))
+    
     def saveSettings(self):
         """Save settings to config file"""
         try:
@@ -354,6 +924,19 @@ class PyIDE(QMainWindow):
                 },
                 "explorer_visible": self.file_system_dock.isVisible(),
                 "terminal_visible": self.terminal_dock.isVisible(),
+                "large_file_threshold": self.editor_tabs.large_file_threshold,
+                "terminal_scrollback": self.terminal.output.scrollback,
+                "max_live_tabs": self.editor_tabs.max_live_tabs,
+                "max_live_memory": self.editor_tabs.max_live_memory,
+                "autosave": self.editor_tabs.autosave_enabled,
+                "autosave_delay": self.editor_tabs.autosave_timer.interval(),
+                "run_interpreter": self.run_engine.interpreter,
+                "warm_run": self.run_engine.warm,
+                "warm_run_modules": self.run_engine.warm_modules,
+                "session": {
+                    "root": self.project_root,
+                    "tabs": self.editor_tabs.sessionState()
+                },
                 # Add more settings here
             }
             
@@ -367,4 +950,21 @@ class PyIDE(QMainWindow):
         """Handle window close event"""
         # Save settings before closing
         self.saveSettings()
+        self.editor_tabs.cancelAllLoads()
+        self.editor_tabs.finishSaves()
+        self.editor_tabs.watcher.shutdown()
+        self.watchdog.stop()
+        self.find_panel.shutdown()
+        self.find_bar.shutdown()
+        self.file_system_view.shutdown()
+        self.file_operations.shutdown()
+        self.symbol_index.close()
+        self.diagnostics.shutdown()
+        self.outline_view.shutdown()
+        self.vcs.shutdown()
+        self.completion.shutdown()
+        shutdownPool()
+        self.project_index.close()
+        self.run_engine.shutdown()
+        self.terminal.close()
         event.accept()
@@ -0,0 +1,91 @@
+"""
+Startup profiling for PyIDE
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from PyQt6.QtCore import QObject, QEvent, QTimer, pyqtSignal
+
+# Slowest imports listed in the import time report
+IMPORT_REPORT_SIZE = 25
+
+class StartupProfile(QObject):
+    """Records the time of each startup phase until the window is interactive"""
+    # Emitted once the report has been written
+    finished = pyqtSignal()
+
+    def __init__(self, start_time, parent=None):
+        super().__init__(parent)
+        self.start_time = start_time
+        self.phases = []
+        self.window = None
+
+    def mark(self, phase):
+        """Record that a phase has just finished"""
+        self.phases.append((phase, time.perf_counter()))
+
+    def watch(self, window):
+        """Wait for the window's first paint"""
+        self.window = window
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        """Mark the first paint, then mark interactive once the event loop is idle"""
+        if obj is self.window and event.type() == QEvent.Type.Paint:
+            self.window.removeEventFilter(self)
+            self.mark("first paint")
+            # Queued behind the work deferred from showEvent, like a user's first input
+            QTimer.singleShot(0, self.onInteractive)
+        return False
+
+    def onInteractive(self):
+        """Write the report now that input would be handled"""
+        self.mark("interactive")
+        self.report()
+        self.finished.emit()
+
+    def report(self, stream=None):
+        """Print per-phase and cumulative times"""
+        stream = stream or sys.stdout
+        print("Startup profile (ms)", file=stream)
+        print(f"  {'phase':<24}{'phase':>10}{'total':>10}", file=stream)
+        previous = self.start_time
+        for phase, timestamp in self.phases:
+            print(f"  {phase:<24}{(timestamp - previous) * 1000:>10.1f}"
+                  f"{(timestamp - self.start_time) * 1000:>10.1f}", file=stream)
+            previous = timestamp
+        stream.flush()
+
+def parseImportTimes(text):
+    """Return (cumulative us, self us, module) rows from -X importtime output"""
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The header line
+            continue
+        rows.append((int(fields[1]), int(fields[0]), fields[2].strip()))
+    return rows
+
+def runWithImportTime(script, argv):
+    """Run a profiled startup in a child interpreter with -X importtime and summarize it"""
+    command = [sys.executable, "-X", "importtime", script] + list(argv)
+    result = subprocess.run(command, stdout=sys.stdout, stderr=subprocess.PIPE, text=True,
+                            env=dict(os.environ, PYTHONUNBUFFERED="1"))
+
+    rows = parseImportTimes(result.stderr)
+    other = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+    if other:
+        print("\n".join(other), file=sys.stderr)
+
+    total = sum(self_us for cumulative, self_us, module in rows)
+    print(f"\nImports: {len(rows)} modules, {total / 1000:.1f} ms")
+    print(f"  {'cumulative':>10}{'self':>10}  module")
+    for cumulative, self_us, module in sorted(rows, reverse=True)[:IMPORT_REPORT_SIZE]:
+        print(f"  {cumulative / 1000:>10.1f}{self_us / 1000:>10.1f}  {module}")
+    return result.returncode
@@ -0,0 +1,173 @@
+"""
+Incremental ANSI escape sequence parser for the PyIDE terminal
+"""
+
+import re
+
+# Operations produced by the parser
+TEXT, CARRIAGE_RETURN, BACKSPACE, ERASE_LINE, ERASE_DISPLAY, CURSOR_UP, CURSOR_DOWN, \
+    CURSOR_FORWARD, CURSOR_BACK, CURSOR_COLUMN = range(10)
+
+# Control sequences, OSC strings, other escapes (intermediate bytes, then a final
+# byte, as in the charset designation ESC ( B), stray escape characters and the
+# C0 controls the terminal acts on
+CONTROL = re.compile(r'\x1b\[([0-?]*)[ -/]*([@-~])|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)'
+                     r'|\x1b(?:[ -/]*[0-Z\\^-~])?|[\r\b\x07]')
+# A sequence cut off at the end of a chunk
+INCOMPLETE = re.compile(r'\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[ -/]+)?\Z')
+# Cut-off sequences longer than this are dropped rather than held back
+MAX_PENDING = 4096
+
+# Styles are (foreground, background, bold, italic, underline, inverse); colours
+# are None for the default, a 0-255 palette index or an (r, g, b) tuple
+DEFAULT_STYLE = (None, None, False, False, False, False)
+
+# Final characters of the cursor movements the terminal follows
+CURSOR_MOVES = {'A': CURSOR_UP, 'B': CURSOR_DOWN, 'C': CURSOR_FORWARD, 'D': CURSOR_BACK, 'G': CURSOR_COLUMN}
+
+def parameters(text, default=0):
+    """Parse the ';'-separated numbers of a control sequence"""
+    values = []
+    for part in text.split(';'):
+        values.append(int(part) if part.isdigit() else default)
+    return values
+
+def extendedColor(values, index):
+    """Parse a 38/48 colour starting at values[index]; returns (colour, next index)"""
+    if index < len(values) and values[index] == 5 and index + 1 < len(values):
+        return values[index + 1] & 0xFF, index + 2
+    if index < len(values) and values[index] == 2 and index + 3 < len(values):
+        return tuple(min(value, 255) for value in values[index + 1:index + 4]), index + 4
+    return None, len(values)
+
+def applySgr(style, values):
+    """Return the style after a Select Graphic Rendition sequence"""
+    foreground, background, bold, italic, underline, inverse = style
+    index = 0
+    while index < len(values):
+        value = values[index]
+        index += 1
+        if value == 0:
+            foreground, background, bold, italic, underline, inverse = DEFAULT_STYLE
+        elif value == 1:
+            bold = True
+        elif value == 3:
+            italic = True
+        elif value == 4:
+            underline = True
+        elif value == 7:
+            inverse = True
+        elif value == 22:
+            bold = False
+        elif value == 23:
+            italic = False
+        elif value == 24:
+            underline = False
+        elif value == 27:
+            inverse = False
+        elif 30 <= value <= 37:
+            foreground = value - 30
+        elif value == 38:
+            foreground, index = extendedColor(values, index)
+        elif value == 39:
+            foreground = None
+        elif 40 <= value <= 47:
+            background = value - 40
+        elif value == 48:
+            background, index = extendedColor(values, index)
+        elif value == 49:
+            background = None
+        elif 90 <= value <= 97:
+            foreground = value - 90 + 8
+        elif 100 <= value <= 107:
+            background = value - 100 + 8
+    return (foreground, background, bold, italic, underline, inverse)
+
+class AnsiParser:
+    """Turns terminal output into styled text runs and editing operations
+
+    State carries over between chunks: the current style, and a sequence
+    cut off at the end of one chunk is completed by the next.
+    """
+    def __init__(self):
+        self.style = DEFAULT_STYLE
+        self.pending = ''
+
+    def feed(self, text):
+        """Parse a chunk; returns a list of operations
+
+        Text comes as (TEXT, text, style) runs; the others are (operation,
+        argument) pairs.
+        """
+        if self.pending:
+            text = self.pending + text
+            self.pending = ''
+        escape = text.rfind('\x1b')
+        if escape != -1 and INCOMPLETE.match(text, escape):
+            if len(text) - escape <= MAX_PENDING:
+                self.pending = text[escape:]
+            text = text[:escape]
+
+        operations = []
+        position = 0
+        for match in CONTROL.finditer(text):
+            start = match.start()
+            if start > position:
+                self.addText(operations, text[position:start])
+            position = match.end()
+            sequence = match.group()
+            char = sequence[0]
+            if char == '\r':
+                operations.append((CARRIAGE_RETURN, None))
+            elif char == '\b':
+                operations.append((BACKSPACE, None))
+            elif match.group(2) is not None:
+                self.controlSequence(operations, match.group(1), match.group(2))
+        if position < len(text):
+            self.addText(operations, text[position:])
+        return operations
+
+    def addText(self, operations, text):
+        """Append a text run, merging it with the previous run of the same style"""
+        if operations and operations[-1][0] == TEXT and operations[-1][2] == self.style:
+            operations[-1] = (TEXT, operations[-1][1] + text, self.style)
+        else:
+            operations.append((TEXT, text, self.style))
+
+    def controlSequence(self, operations, parameter_text, final):
+        """Handle a CSI sequence; the ones the terminal can't show are dropped"""
+        if parameter_text[:1] in ('?', '>', '<', '='):
+            # Private modes such as bracketed paste
+            return
+        if final == 'm':
+            self.style = applySgr(self.style, parameters(parameter_text))
+        elif final == 'K':
+            operations.append((ERASE_LINE, parameters(parameter_text)[0]))
+        elif final == 'J':
+            operations.append((ERASE_DISPLAY, parameters(parameter_text)[0]))
+        elif final in CURSOR_MOVES:
+            operations.append((CURSOR_MOVES[final], max(1, parameters(parameter_text, 1)[0])))
+
+def overlay(text, update):
+    """Return text after update is written over its start"""
+    first, newline, rest = update.partition('\n')
+    return first + text[len(first):] + newline + rest
+
+def collapseRewrites(operations):
+    """Merge lines rewritten after carriage returns into the text they leave behind
+
+    Progress bars rewrite one line thousands of times; only the final text
+    of each run of same-style rewrites needs to reach the document.
+    """
+    result = []
+    for operation in operations:
+        if (operation[0] == TEXT and len(result) >= 3 and result[-1][0] == CARRIAGE_RETURN
+                and result[-2][0] == TEXT and result[-3][0] == CARRIAGE_RETURN
+                and result[-2][2] == operation[2] and '\n' not in result[-2][1]):
+            # Both texts start at the beginning of the same line
+            result.pop()
+            previous = result.pop()
+            result.append((TEXT, overlay(previous[1], operation[1]), operation[2]))
+        else:
+            result.append(operation)
+    return result
@@ -0,0 +1,244 @@
+"""
+Buffered output pipeline for the PyIDE terminal
+"""
+
+import codecs
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtGui import QTextCursor, QTextCharFormat, QColor, QFont
+
+from .ansi import (AnsiParser, collapseRewrites, DEFAULT_STYLE, TEXT, CARRIAGE_RETURN, BACKSPACE, ERASE_LINE,
+                   ERASE_DISPLAY, CURSOR_UP, CURSOR_DOWN, CURSOR_FORWARD, CURSOR_BACK, CURSOR_COLUMN)
+from ..instrumentation import tracer
+
+# Milliseconds between flushes of buffered output to the widget
+FLUSH_INTERVAL = 30
+# Buffered characters that trigger an immediate flush
+FLUSH_THRESHOLD = 256 * 1024
+# Default number of lines kept in the terminal
+DEFAULT_SCROLLBACK = 10000
+# The 16 basic ANSI colours, tuned for the dark background
+BASIC_COLORS = [
+    "#272822", "#F92672", "#A6E22E", "#E6DB74", "#66D9EF", "#AE81FF", "#2AA198", "#EEEEEE",
+    "#75715E", "#FF5F87", "#B8F35A", "#FFF08A", "#8BE9FD", "#C9A8FF", "#5FD7D7", "#FFFFFF",
+]
+DEFAULT_FOREGROUND = "#EEEEEE"
+DEFAULT_BACKGROUND = "#1E1E1E"
+
+def paletteColor(color):
+    """Return the QColor of a palette index or (r, g, b) tuple"""
+    if isinstance(color, tuple):
+        return QColor(*color)
+    if color < 16:
+        return QColor(BASIC_COLORS[color])
+    if color < 232:
+        # 6x6x6 colour cube
+        levels = (0, 95, 135, 175, 215, 255)
+        color -= 16
+        return QColor(levels[color // 36], levels[color // 6 % 6], levels[color % 6])
+    gray = 8 + (color - 232) * 10
+    return QColor(gray, gray, gray)
+
+def dropLines(text, count):
+    """Return text without its first count lines"""
+    keep = text.count('\n') - count
+    pos = len(text)
+    # The kept lines start after the newline that precedes them
+    for _ in range(keep + 1):
+        pos = text.rfind('\n', 0, pos)
+    return text[pos + 1:]
+
+class OutputBuffer(QObject):
+    """Coalesces process output and appends it to a text widget in batches"""
+    def __init__(self, widget, scrollback=DEFAULT_SCROLLBACK):
+        super().__init__(widget)
+        self.widget = widget
+        self.decoders = {}
+        self.pending = deque()
+        self.pending_chars = 0
+        self.pending_lines = 0
+        # Escape sequence state carries over from one flush to the next
+        self.parser = AnsiParser()
+        self.formats = {}
+        # Where output is written; carriage returns and cursor movement put it before the end
+        self.cursor = QTextCursor(widget.document())
+        self.cursor.movePosition(QTextCursor.MoveOperation.End)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(FLUSH_INTERVAL)
+        self.timer.timeout.connect(self.flush)
+        self.setScrollback(scrollback)
+
+    def setScrollback(self, lines):
+        """Limit how many lines the widget keeps; older lines are dropped"""
+        self.scrollback = lines
+        self.widget.document().setMaximumBlockCount(lines)
+
+    def write(self, stream, data):
+        """Decode a chunk of raw output from a stream and queue it"""
+        if tracer.enabled:
+            tracer.count("terminal.bytes", len(data))
+        decoder = self.decoders.get(stream)
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            self.decoders[stream] = decoder
+        self.queue(decoder.decode(data))
+
+    def finish(self, *streams):
+        """Flush the buffer, first ending the streams that closed; other streams keep partial characters"""
+        for stream in streams:
+            decoder = self.decoders.pop(stream, None)
+            if decoder is not None:
+                self.queue(decoder.decode(b'', final=True))
+        self.flush()
+
+    def queue(self, text):
+        """Buffer decoded text, dropping lines that could never be shown"""
+        if not text:
+            return
+        self.pending.append(text)
+        self.pending_chars += len(text)
+        self.pending_lines += text.count('\n')
+
+        # Whole chunks beyond the scrollback would be trimmed right away anyway
+        while len(self.pending) > 1 and self.pending_lines - self.pending[0].count('\n') >= self.scrollback:
+            dropped = self.pending.popleft()
+            self.pending_chars -= len(dropped)
+            self.pending_lines -= dropped.count('\n')
+        if self.pending_lines > self.scrollback:
+            head = self.pending[0]
+            trimmed = dropLines(head, self.pending_lines - self.scrollback)
+            self.pending[0] = trimmed
+            self.pending_chars -= len(head) - len(trimmed)
+            self.pending_lines = self.scrollback
+
+        if self.pending_chars >= FLUSH_THRESHOLD:
+            self.flush()
+        elif not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """Write all buffered output to the widget in a single edit"""
+        self.timer.stop()
+        if not self.pending:
+            return
+        text = "".join(self.pending)
+        self.pending.clear()
+        self.pending_chars = 0
+        self.pending_lines = 0
+
+        with tracer.span("terminal.flush", chars=len(text)):
+            operations = collapseRewrites(self.parser.feed(text))
+            scrollbar = self.widget.verticalScrollBar()
+            at_bottom = scrollbar.value() >= scrollbar.maximum()
+            cursor = self.cursor
+            # One edit block, so the document is laid out once per flush
+            cursor.beginEditBlock()
+            for operation in operations:
+                self.apply(cursor, operation)
+            cursor.endEditBlock()
+            if at_bottom:
+                scrollbar.setValue(scrollbar.maximum())
+
+    def textFormat(self, style):
+        """Return the character format of a parser style"""
+        text_format = self.formats.get(style)
+        if text_format is None:
+            text_format = QTextCharFormat()
+            if style != DEFAULT_STYLE:
+                foreground, background, bold, italic, underline, inverse = style
+                if inverse:
+                    foreground, background = (DEFAULT_BACKGROUND if background is None else background,
+                                              DEFAULT_FOREGROUND if foreground is None else foreground)
+                for color, setter in ((foreground, text_format.setForeground),
+                                      (background, text_format.setBackground)):
+                    if isinstance(color, str):
+                        setter(QColor(color))
+                    elif color is not None:
+                        setter(paletteColor(color))
+                if bold:
+                    text_format.setFontWeight(QFont.Weight.Bold)
+                text_format.setFontItalic(italic)
+                text_format.setFontUnderline(underline)
+            self.formats[style] = text_format
+        return text_format
+
+    def apply(self, cursor, operation):
+        """Apply one parser operation at the write cursor"""
+        kind, argument = operation[0], operation[1]
+        if kind == TEXT:
+            self.writeText(cursor, argument, self.textFormat(operation[2]))
+        elif kind == CARRIAGE_RETURN:
+            cursor.movePosition(QTextCursor.MoveOperation.StartOfBlock)
+        elif kind == BACKSPACE:
+            if not cursor.atBlockStart():
+                cursor.movePosition(QTextCursor.MoveOperation.Left)
+        elif kind == ERASE_LINE:
+            column = cursor.positionInBlock()
+            if argument == 0:
+                cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock, QTextCursor.MoveMode.KeepAnchor)
+                cursor.removeSelectedText()
+            elif argument == 1:
+                # Blank the line up to and including the cursor
+                end = min(column + 1, cursor.block().length() - 1)
+                cursor.movePosition(QTextCursor.MoveOperation.StartOfBlock)
+                cursor.movePosition(QTextCursor.MoveOperation.Right, QTextCursor.MoveMode.KeepAnchor, end)
+                cursor.insertText(" " * end, self.textFormat(DEFAULT_STYLE))
+                self.moveToColumn(cursor, column)
+            else:
+                # Empty the whole line, leaving the cursor in its column
+                cursor.movePosition(QTextCursor.MoveOperation.StartOfBlock)
+                cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock, QTextCursor.MoveMode.KeepAnchor)
+                cursor.removeSelectedText()
+                self.moveToColumn(cursor, column)
+        elif kind == ERASE_DISPLAY:
+            if argument == 0:
+                cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+                cursor.removeSelectedText()
+            elif argument >= 2:
+                # Clearing the screen, as "clear" does, empties the terminal
+                cursor.movePosition(QTextCursor.MoveOperation.Start)
+                cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+                cursor.removeSelectedText()
+        elif kind in (CURSOR_UP, CURSOR_DOWN):
+            column = cursor.positionInBlock()
+            move = QTextCursor.MoveOperation.PreviousBlock if kind == CURSOR_UP else QTextCursor.MoveOperation.NextBlock
+            for _ in range(argument):
+                if not cursor.movePosition(move):
+                    break
+            self.moveToColumn(cursor, column)
+        elif kind == CURSOR_FORWARD:
+            self.moveToColumn(cursor, cursor.positionInBlock() + argument)
+        elif kind == CURSOR_BACK:
+            self.moveToColumn(cursor, max(0, cursor.positionInBlock() - argument))
+        elif kind == CURSOR_COLUMN:
+            self.moveToColumn(cursor, argument - 1)
+
+    def writeText(self, cursor, text, text_format):
+        """Write text at the cursor, overwriting what is already on the line like a terminal"""
+        while text:
+            if cursor.atEnd():
+                # The usual case: everything goes in with one insert
+                cursor.insertText(text, text_format)
+                return
+            line, newline, text = text.partition('\n')
+            if line:
+                remaining = cursor.block().length() - 1 - cursor.positionInBlock()
+                if remaining:
+                    cursor.movePosition(QTextCursor.MoveOperation.Right, QTextCursor.MoveMode.KeepAnchor,
+                                        min(remaining, len(line)))
+                cursor.insertText(line, text_format)
+            if newline and not cursor.movePosition(QTextCursor.MoveOperation.NextBlock):
+                cursor.movePosition(QTextCursor.MoveOperation.End)
+                cursor.insertText('\n', text_format)
+
+    def moveToColumn(self, cursor, column):
+        """Put the cursor in a column of its line, padding the line with spaces if it is shorter"""
+        cursor.movePosition(QTextCursor.MoveOperation.StartOfBlock)
+        length = cursor.block().length() - 1
+        if column <= length:
+            cursor.movePosition(QTextCursor.MoveOperation.Right, QTextCursor.MoveMode.MoveAnchor, column)
+        else:
+            cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock)
+            cursor.insertText(" " * (column - length), self.textFormat(DEFAULT_STYLE))
@@ -0,0 +1,189 @@
+"""
+Persistent pseudo-terminal shell session for PyIDE
+"""
+
+import errno
+import fcntl
+import os
+import pty
+import signal
+import struct
+import termios
+
+from PyQt6.QtCore import QObject, QSocketNotifier, QTimer, pyqtSignal
+
+# Bytes read from the PTY per read call
+READ_SIZE = 64 * 1024
+# Bytes read before yielding back to the event loop
+MAX_READ_PER_EVENT = 1024 * 1024
+# Milliseconds between checks for a closed shell's exit, and checks before it is killed
+REAP_INTERVAL = 50
+REAP_ATTEMPTS = 40
+# Options that turn off a shell's own line editor; the kernel's canonical mode does the editing
+NO_EDITING_OPTIONS = {"bash": ["--noediting"], "zsh": ["+Z"]}
+
+def defaultShell():
+    """Return the user's shell, or bash if it isn't set"""
+    return os.environ.get("SHELL") or "/bin/bash"
+
+def shellEnvironment():
+    """Return the environment for programs run on the terminal"""
+    env = dict(os.environ)
+    # Colours, line erasing and simple cursor movement are rendered, but the
+    # terminal is not a full-screen VT emulator, so nothing should page
+    env.update(TERM="xterm-256color", PAGER="cat", GIT_PAGER="cat")
+    return env
+
+class PtyShell(QObject):
+    """Long-lived shell attached to a pseudo-terminal"""
+    # Raw bytes written by the shell or its children
+    output = pyqtSignal(bytes)
+    # Exit code once the shell has terminated and been reaped
+    exited = pyqtSignal(int)
+
+    def __init__(self, parent=None, shell=None):
+        super().__init__(parent)
+        self.shell = shell or defaultShell()
+        self.pid = None
+        self.fd = None
+        self.read_notifier = None
+        self.write_notifier = None
+        self.write_buffer = bytearray()
+        # Polls for the exit of a shell whose terminal has been closed
+        self.reap_timer = None
+        self.reap_attempts = 0
+
+    def start(self, cwd=None, rows=24, cols=80):
+        """Spawn the shell on a new PTY"""
+        env = shellEnvironment()
+
+        pid, fd = pty.fork()
+        if pid == 0:
+            try:
+                # Plain "\n" line endings, so output needs no translation
+                attrs = termios.tcgetattr(0)
+                attrs[1] &= ~termios.ONLCR
+                termios.tcsetattr(0, termios.TCSANOW, attrs)
+                if cwd:
+                    os.chdir(cwd)
+                # Line editing is left to the kernel's canonical mode
+                options = NO_EDITING_OPTIONS.get(os.path.basename(self.shell), [])
+                os.execvpe(self.shell, [self.shell, *options, "-i"], env)
+            finally:
+                os._exit(127)
+
+        self.attach(pid, fd, rows, cols)
+
+    def attach(self, pid, fd, rows=24, cols=80):
+        """Start reading and writing the master side of a PTY"""
+        self.pid = pid
+        self.fd = fd
+        os.set_blocking(fd, False)
+        self.resize(rows, cols)
+        self.read_notifier = QSocketNotifier(fd, QSocketNotifier.Type.Read, self)
+        self.read_notifier.activated.connect(self.onReadable)
+        self.write_notifier = QSocketNotifier(fd, QSocketNotifier.Type.Write, self)
+        self.write_notifier.setEnabled(False)
+        self.write_notifier.activated.connect(self.onWritable)
+
+    def isRunning(self):
+        """Return True while the shell is alive"""
+        return self.fd is not None
+
+    def write(self, data):
+        """Send bytes to the shell as if typed"""
+        if self.fd is None:
+            return
+        self.write_buffer += data
+        self.onWritable()
+
+    def onWritable(self):
+        """Write as much buffered input as the PTY accepts"""
+        while self.write_buffer:
+            try:
+                written = os.write(self.fd, self.write_buffer)
+            except BlockingIOError:
+                break
+            except OSError:
+                self.write_buffer.clear()
+                break
+            del self.write_buffer[:written]
+        self.write_notifier.setEnabled(bool(self.write_buffer))
+
+    def onReadable(self):
+        """Read whatever the shell has written without blocking"""
+        chunks = []
+        total = 0
+        closed = False
+        while total < MAX_READ_PER_EVENT:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                # Linux reports EIO once the slave side has been closed
+                if e.errno != errno.EIO:
+                    raise
+                data = b''
+            if not data:
+                closed = True
+                break
+            chunks.append(data)
+            total += len(data)
+
+        if chunks:
+            self.output.emit(b''.join(chunks))
+        if closed:
+            self.close()
+
+    def resize(self, rows, cols):
+        """Tell the PTY, and so the foreground program, its new size"""
+        if self.fd is not None:
+            fcntl.ioctl(self.fd, termios.TIOCSWINSZ, struct.pack('HHHH', rows, cols, 0, 0))
+
+    def interrupt(self):
+        """Send the interrupt character, as Ctrl+C would"""
+        self.write(b'\x03')
+
+    def close(self):
+        """Shut down the PTY; exited is emitted once the shell has been reaped"""
+        if self.fd is None:
+            return
+        self.read_notifier.setEnabled(False)
+        self.write_notifier.setEnabled(False)
+        os.close(self.fd)
+        self.fd = None
+        if not self.reap():
+            # Hang the shell up and collect it from the event loop rather than waiting here
+            try:
+                os.kill(self.pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+            self.reap_attempts = 0
+            self.reap_timer = QTimer(self)
+            self.reap_timer.setInterval(REAP_INTERVAL)
+            self.reap_timer.timeout.connect(self.onReapTimer)
+            self.reap_timer.start()
+
+    def reap(self):
+        """Emit the shell's exit code if it has exited; returns whether it has"""
+        try:
+            pid, status = os.waitpid(self.pid, os.WNOHANG)
+        except ChildProcessError:
+            pid, status = self.pid, 0
+        if pid == 0:
+            return False
+        self.exited.emit(os.waitstatus_to_exitcode(status))
+        return True
+
+    def onReapTimer(self):
+        """Check again for the shell's exit, killing it if a hangup wasn't enough"""
+        if self.reap():
+            self.reap_timer.stop()
+            return
+        self.reap_attempts += 1
+        if self.reap_attempts == REAP_ATTEMPTS:
+            try:
+                os.kill(self.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
@@ -0,0 +1,359 @@
+"""
+Run engine component for PyIDE
+"""
+
+import fcntl
+import json
+import os
+import pty
+import shutil
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import termios
+import time
+
+from PyQt6.QtCore import QObject, QSocketNotifier, pyqtSignal
+
+from .pty_shell import PtyShell, shellEnvironment
+from ..instrumentation import tracer
+
+# Script run by the warm interpreter; it only needs the standard library
+WARM_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "warm_server.py")
+# Bytes read from the warm server's control socket per read call
+CONTROL_READ_SIZE = 64 * 1024
+# Seconds to wait for the warm server to exit before killing it
+SERVER_EXIT_TIMEOUT = 2
+
+def defaultInterpreter():
+    """Return the Python that "python" on the PATH would start"""
+    return shutil.which("python") or shutil.which("python3") or sys.executable
+
+def configureTerminal(fd, rows, cols):
+    """Give a PTY plain "\\n" line endings, like the shell's, and a size"""
+    attrs = termios.tcgetattr(fd)
+    attrs[1] &= ~termios.ONLCR
+    termios.tcsetattr(fd, termios.TCSANOW, attrs)
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack('HHHH', rows, cols, 0, 0))
+
+class RunSession(PtyShell):
+    """One run of a script on its own pseudo-terminal"""
+    # Exit code; negative when the script was killed by a signal
+    finished = pyqtSignal(int)
+
+    def __init__(self, file_path, cwd, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.cwd = cwd
+        self.warm = False
+        self.exit_code = None
+        self.started = None
+        self.first_output = None
+        self.ended = None
+        self.output.connect(self.onOutput)
+        self.exited.connect(self.onTerminalClosed)
+
+    def startCold(self, interpreter, rows=24, cols=80):
+        """Start a fresh interpreter for the script"""
+        env = shellEnvironment()
+        self.started = time.perf_counter()
+        pid, fd = pty.fork()
+        if pid == 0:
+            try:
+                configureTerminal(0, rows, cols)
+                os.chdir(self.cwd)
+                os.execvpe(interpreter, [interpreter, self.file_path], env)
+            finally:
+                os._exit(127)
+
+        self.attach(pid, fd, rows, cols)
+
+    def startWarm(self, pool, rows=24, cols=80):
+        """Have the warm server fork a child for the script; returns False if it can't"""
+        master, slave = pty.openpty()
+        try:
+            configureTerminal(slave, rows, cols)
+            self.started = time.perf_counter()
+            if not pool.submit(self, slave, shellEnvironment()):
+                os.close(master)
+                return False
+        finally:
+            # The child has its own copy; the master sees EOF once the child is gone
+            os.close(slave)
+        self.warm = True
+        self.attach(None, master, rows, cols)
+        return True
+
+    def isFinished(self):
+        """Return whether the script has exited"""
+        return self.ended is not None
+
+    def onOutput(self, data):
+        """Note when the script first wrote something"""
+        if self.first_output is None:
+            self.first_output = time.perf_counter()
+            tracer.record("run.firstOutput", self.started, self.first_output,
+                          {"path": self.file_path, "warm": self.warm})
+
+    def firstOutputLatency(self):
+        """Return seconds from the start of the run to its first output, or None"""
+        if self.first_output is None:
+            return None
+        return self.first_output - self.started
+
+    def onTerminalClosed(self, exit_code):
+        """Finish once the script's side of the terminal has closed"""
+        if not self.warm:
+            self.finish(exit_code)
+        elif self.exit_code is not None:
+            self.finish(self.exit_code)
+
+    def setPid(self, pid):
+        """Record the pid the warm server forked for the script"""
+        self.pid = pid
+
+    def onServerExit(self, exit_code):
+        """Finish a warm run when the server reports its exit code"""
+        self.exit_code = exit_code
+        if self.fd is not None:
+            # Collect output still in the terminal; this finishes the run if it hits EOF
+            self.onReadable()
+        if self.fd is not None:
+            # Something the script started still has the terminal open
+            self.close()
+        self.finish(exit_code)
+
+    def finish(self, exit_code):
+        """Report the exit code, once"""
+        if self.ended is not None:
+            return
+        self.exit_code = exit_code
+        self.ended = time.perf_counter()
+        self.finished.emit(exit_code)
+
+    def close(self):
+        """Close the terminal; cold runs are reaped, warm ones are reaped by the server"""
+        if not self.warm:
+            super().close()
+        elif self.fd is not None:
+            self.read_notifier.setEnabled(False)
+            self.write_notifier.setEnabled(False)
+            os.close(self.fd)
+            self.fd = None
+            self.exited.emit(self.exit_code if self.exit_code is not None else 0)
+
+    def stop(self):
+        """Kill the script and anything it started in its session"""
+        if self.isFinished():
+            return
+        if self.pid is not None:
+            try:
+                os.killpg(self.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        else:
+            # Not started yet; closing the terminal hangs the script up
+            self.close()
+            self.finish(-signal.SIGHUP)
+
+class WarmPool(QObject):
+    """A warm interpreter that has imported the configured modules and forks runs"""
+    def __init__(self, interpreter, modules, parent=None):
+        super().__init__(parent)
+        self.interpreter = interpreter
+        self.modules = list(modules)
+        self.process = None
+        self.control = None
+        self.notifier = None
+        self.buffer = b''
+        self.sessions = {}
+        self.next_id = 0
+        self.started = None
+        self.ready = None
+
+    def start(self):
+        """Start the server; it imports the modules in the background"""
+        control, server_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.process = subprocess.Popen(
+                [self.interpreter, WARM_SERVER, str(server_end.fileno()), *self.modules],
+                pass_fds=[server_end.fileno()], env=shellEnvironment(),
+                stdin=subprocess.DEVNULL, start_new_session=True)
+        except OSError as e:
+            print(f"Error starting warm interpreter: {str(e)}")
+            control.close()
+            return False
+        finally:
+            server_end.close()
+        self.started = time.perf_counter()
+        control.setblocking(False)
+        self.control = control
+        self.notifier = QSocketNotifier(control.fileno(), QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self.onReadable)
+        return True
+
+    def isAlive(self):
+        """Return whether the server is running"""
+        return self.control is not None and self.process is not None and self.process.poll() is None
+
+    def matches(self, interpreter, modules):
+        """Return whether the server was started with this configuration"""
+        return (self.interpreter, self.modules) == (interpreter, list(modules))
+
+    def submit(self, session, tty_fd, env):
+        """Ask the server to run a session's script on a terminal"""
+        if not self.isAlive():
+            return False
+        self.next_id += 1
+        request = {"id": self.next_id, "path": session.file_path, "cwd": session.cwd, "env": env}
+        try:
+            self.control.setblocking(True)
+            socket.send_fds(self.control, [json.dumps(request).encode('utf-8') + b'\n'], [tty_fd])
+        except OSError as e:
+            print(f"Error starting warm run: {str(e)}")
+            return False
+        finally:
+            if self.control is not None:
+                self.control.setblocking(False)
+        self.sessions[self.next_id] = session
+        return True
+
+    def onReadable(self):
+        """Handle the server's messages"""
+        try:
+            data = self.control.recv(CONTROL_READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            # The server has died; the next run starts a new one
+            self.close()
+            return
+        self.buffer += data
+        while b'\n' in self.buffer:
+            line, self.buffer = self.buffer.split(b'\n', 1)
+            message = json.loads(line)
+            event = message["event"]
+            if event == "ready":
+                self.ready = time.perf_counter()
+                tracer.record("run.warmStart", self.started, self.ready, {"modules": len(self.modules)})
+            elif event == "started":
+                session = self.sessions.get(message["id"])
+                if session is not None:
+                    session.setPid(message["pid"])
+            elif event == "exited":
+                session = self.sessions.pop(message["id"], None)
+                if session is not None:
+                    session.onServerExit(message["code"])
+
+    def close(self):
+        """Stop the server; runs it forked keep going until their terminal closes"""
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+            self.notifier = None
+        if self.control is not None:
+            # The server exits when its control socket closes
+            self.control.close()
+            self.control = None
+        if self.process is not None:
+            try:
+                self.process.wait(SERVER_EXIT_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+        # Runs the server can no longer report on end when their terminal closes
+        sessions = list(self.sessions.values())
+        self.sessions.clear()
+        for session in sessions:
+            session.exit_code = -signal.SIGHUP
+            if session.fd is None:
+                session.finish(session.exit_code)
+
+class RunEngine(QObject):
+    """Runs Python files on their own terminals, cold or forked from a warm interpreter"""
+    # The RunSession of a run that has started
+    runStarted = pyqtSignal(object)
+    # The RunSession of a run that has exited
+    runFinished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.interpreter = defaultInterpreter()
+        # The warm pool is opt-in
+        self.warm = False
+        self.warm_modules = []
+        self.pool = None
+        self.session = None
+
+    def configure(self, interpreter=None, warm=False, modules=()):
+        """Set the interpreter, whether runs use the warm pool and what it imports
+
+        A warm interpreter is started by prewarm() or the next run.
+        """
+        self.interpreter = interpreter or defaultInterpreter()
+        self.warm = warm
+        self.warm_modules = list(modules)
+        if self.pool is not None and (not warm or not self.pool.matches(self.interpreter, self.warm_modules)):
+            self.pool.close()
+            self.pool = None
+
+    def setWarm(self, warm):
+        """Switch the warm pool on or off"""
+        self.configure(self.interpreter, warm, self.warm_modules)
+        self.prewarm()
+
+    def prewarm(self):
+        """Start the warm interpreter ahead of the first run"""
+        if not self.warm or (self.pool is not None and self.pool.isAlive()):
+            return
+        if self.pool is not None:
+            self.pool.close()
+        self.pool = WarmPool(self.interpreter, self.warm_modules, self)
+        if not self.pool.start():
+            self.pool = None
+
+    def run(self, file_path, cwd, rows=24, cols=80):
+        """Run a file, stopping the previous run if it is still going; returns the RunSession"""
+        self.stop()
+        session = RunSession(file_path, cwd, self)
+        session.finished.connect(lambda exit_code: self.onRunFinished(session))
+        self.session = session
+        if self.warm:
+            self.prewarm()
+        if self.pool is None or not session.startWarm(self.pool, rows, cols):
+            session.startCold(self.interpreter, rows, cols)
+        self.runStarted.emit(session)
+        return session
+
+    def onRunFinished(self, session):
+        """Report a run that has exited"""
+        if session is self.session:
+            self.session = None
+        self.runFinished.emit(session)
+
+    def isRunning(self):
+        """Return whether a run is going"""
+        return self.session is not None and not self.session.isFinished()
+
+    def interrupt(self):
+        """Send Ctrl+C to the running script"""
+        if self.isRunning():
+            self.session.interrupt()
+
+    def stop(self):
+        """Kill the running script"""
+        if self.isRunning():
+            self.session.stop()
+
+    def shutdown(self):
+        """Kill the running script and stop the warm interpreter"""
+        self.stop()
+        if self.session is not None:
+            self.session.close()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
@@ -4,23 +4,65 @@ Terminal component for PyIDE
 
 import os
 import sys
-from PyQt6.QtWidgets import QTextEdit
-from PyQt6.QtCore import Qt, QProcess
-from PyQt6.QtGui import QFont
+import time
+from PyQt6.QtWidgets import QTextEdit, QApplication
+from PyQt6.QtCore import Qt, QProcess, QTimer
+from PyQt6.QtGui import QFont, QKeySequence, QTextCursor
+
+from .output_buffer import OutputBuffer
+
+# Byte sequences sent to the shell for keys without printable text
+KEY_SEQUENCES = {
+    Qt.Key.Key_Return: b'\r',
+    Qt.Key.Key_Enter: b'\r',
+    Qt.Key.Key_Backspace: b'\x7f',
+    Qt.Key.Key_Tab: b'\t',
+    Qt.Key.Key_Escape: b'\x1b',
+    Qt.Key.Key_Up: b'\x1b[A',
+    Qt.Key.Key_Down: b'\x1b[B',
+    Qt.Key.Key_Right: b'\x1b[C',
+    Qt.Key.Key_Left: b'\x1b[D',
+    Qt.Key.Key_Home: b'\x1b[H',
+    Qt.Key.Key_End: b'\x1b[F',
+    Qt.Key.Key_Delete: b'\x1b[3~',
+}
+# Seconds a shell must run for its exit to count as ordinary rather than a failure to start
+FAST_EXIT_TIME = 1.0
+# Fast exits in a row before the terminal stops restarting the shell by itself
+MAX_FAST_EXITS = 3
+# Milliseconds before restarting a shell that exited fast, doubled each time
+RESTART_DELAY = 500
 
 class Terminal(QTextEdit):
     """Terminal for executing commands and displaying output"""
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setReadOnly(False)
-        self.process = QProcess(self)
-        self.process.readyReadStandardOutput.connect(self.onReadyReadStandardOutput)
-        self.process.readyReadStandardError.connect(self.onReadyReadStandardError)
+        self.setUndoRedoEnabled(False)
+        self.output = OutputBuffer(self)
         self.setStyleSheet("QTextEdit { background-color: #1E1E1E; color: #EEEEEE; }")
         self.setupFont()
         self.current_dir = os.getcwd()
-        self.prompt = f"{self.current_dir}> "
-        self.appendPlainText(self.prompt)
+        self.shell = None
+        self.shell_started = 0.0
+        self.fast_exits = 0
+        self.restart_timer = QTimer(self)
+        self.restart_timer.setSingleShot(True)
+        self.restart_timer.timeout.connect(self.ensureShell)
+        self.process = None
+        # The RunSession of a script being run; it gets the keyboard while it runs
+        self.run = None
+        # PTYs are only available on POSIX
+        self.use_pty = sys.platform != "win32"
+        
+        if not self.use_pty:
+            # No PTY support; run each command in its own process
+            self.process = QProcess(self)
+            self.process.readyReadStandardOutput.connect(self.onReadyReadStandardOutput)
+            self.process.readyReadStandardError.connect(self.onReadyReadStandardError)
+            self.process.finished.connect(self.onFinished)
+            self.prompt = f"{self.current_dir}> "
+            self.appendPlainText(self.prompt)
         
     def setupFont(self):
         """Set up terminal font"""
@@ -28,9 +70,70 @@ class Terminal(QTextEdit):
         font.setFixedPitch(True)
         self.setFont(font)
         
+    def showEvent(self, event):
+        """Start the shell once the terminal has been shown"""
+        super().showEvent(event)
+        if self.use_pty and self.shell is None:
+            # Deferred so forking the shell doesn't delay the first paint
+            QTimer.singleShot(0, self.ensureShell)
+        
+    def ensureShell(self):
+        """Start the shell if it isn't running yet"""
+        if self.shell is None:
+            self.startShell()
+        
+    def startShell(self):
+        """Start the persistent shell session"""
+        # Imported here because pty and termios are POSIX only
+        from .pty_shell import PtyShell
+        self.shell = PtyShell(self)
+        self.shell.output.connect(lambda data: self.output.write('pty', data))
+        self.shell.exited.connect(self.onShellExited)
+        rows, cols = self.terminalSize()
+        self.shell_started = time.monotonic()
+        self.shell.start(self.current_dir, rows, cols)
+        
+    def onShellExited(self, exit_code):
+        """Report the shell exiting and start a fresh one, backing off if it keeps exiting at once"""
+        self.output.queue(f"\n[shell exited with code {exit_code}]\n")
+        shell = self.shell
+        self.shell = None
+        shell.deleteLater()
+        if time.monotonic() - self.shell_started >= FAST_EXIT_TIME:
+            self.fast_exits = 0
+            self.output.finish('pty')
+            self.startShell()
+            return
+        self.fast_exits += 1
+        if self.fast_exits >= MAX_FAST_EXITS:
+            # Typing starts it again
+            self.fast_exits = 0
+            self.output.queue(f"[{shell.shell} keeps exiting; type to start it again]\n")
+            self.output.finish('pty')
+            return
+        self.output.finish('pty')
+        self.restart_timer.start(RESTART_DELAY * 2 ** (self.fast_exits - 1))
+        
+    def terminalSize(self):
+        """Return the number of rows and columns that fit in the viewport"""
+        metrics = self.fontMetrics()
+        rows = max(1, self.viewport().height() // max(1, metrics.height()))
+        cols = max(1, self.viewport().width() // max(1, metrics.horizontalAdvance(' ')))
+        return rows, cols
+        
+    def resizeEvent(self, event):
+        """Propagate the new size to the shell"""
+        super().resizeEvent(event)
+        if self.shell:
+            self.shell.resize(*self.terminalSize())
+        if self.run:
+            self.run.resize(*self.terminalSize())
+        
     def keyPressEvent(self, event):
         """Handle key presses in the terminal"""
-        if event.key() == Qt.Key.Key_Return:
+        if self.use_pty:
+            self.sendKey(event)
+        elif event.key() == Qt.Key.Key_Return:
             command = self.toPlainText().split(self.prompt)[-1].strip()
             if command:
                 self.execute(command)
@@ -38,14 +141,79 @@ class Terminal(QTextEdit):
                 self.appendPlainText(self.prompt)
         else:
             super().keyPressEvent(event)
-            
+        
+    def inputTarget(self):
+        """Return the running script, or else the shell, that typed input goes to"""
+        if self.run is not None:
+            return self.run
+        self.ensureShell()
+        return self.shell
+        
+    def sendKey(self, event):
+        """Forward a key press to the shell or running script; echo comes back from the PTY"""
+        if event.matches(QKeySequence.StandardKey.Copy) and self.textCursor().hasSelection():
+            self.copy()
+            return
+        target = self.inputTarget()
+        if event.matches(QKeySequence.StandardKey.Paste):
+            target.write(QApplication.clipboard().text().encode('utf-8'))
+            return
+        
+        modifiers = event.modifiers()
+        key = event.key()
+        if modifiers & Qt.KeyboardModifier.ControlModifier and Qt.Key.Key_A <= key <= Qt.Key.Key_Z:
+            # Control characters such as Ctrl+C (interrupt) and Ctrl+D (EOF)
+            data = bytes([key - Qt.Key.Key_A + 1])
+        elif key in KEY_SEQUENCES:
+            data = KEY_SEQUENCES[key]
+        else:
+            data = event.text().encode('utf-8')
+        
+        if data:
+            self.moveCursor(QTextCursor.MoveOperation.End)
+            target.write(data)
+        
+    def insertFromMimeData(self, source):
+        """Send dropped or pasted text to the shell instead of the document"""
+        if self.use_pty:
+            self.inputTarget().write(source.text().encode('utf-8'))
+        else:
+            super().insertFromMimeData(source)
+        
+    def attachRun(self, session):
+        """Show a script's output and send it the keyboard until it exits"""
+        self.run = session
+        mode = " (warm)" if session.warm else ""
+        self.output.queue(f"\n[running {os.path.basename(session.file_path)}{mode}]\n")
+        session.output.connect(lambda data: self.output.write('run', data))
+        session.finished.connect(lambda exit_code: self.onRunFinished(session, exit_code))
+        
+    def onRunFinished(self, session, exit_code):
+        """Report how a script ended and give the keyboard back to the shell"""
+        self.output.finish('run')
+        latency = session.firstOutputLatency()
+        first_output = f"first output after {latency * 1000:.0f} ms" if latency is not None else "no output"
+        self.output.queue(f"\n[exited with code {exit_code} after {session.ended - session.started:.2f} s, "
+                          f"{first_output}]\n")
+        self.output.flush()
+        if self.run is session:
+            self.run = None
+        
     def appendPlainText(self, text):
         """Append text to the terminal"""
         self.append(text)
-            
+        
+    def setScrollback(self, lines):
+        """Set how many lines of output the terminal keeps"""
+        self.output.setScrollback(lines)
+        
     def execute(self, command):
         """Execute a command in the terminal"""
-        if command.startswith("cd "):
+        if self.use_pty:
+            self.ensureShell()
+            # The shell keeps its own directory, environment and aliases
+            self.shell.write(f"{command}\n".encode('utf-8'))
+        elif command.startswith("cd "):
             # Handle cd command internally
             path = command[3:].strip()
             try:
@@ -59,19 +227,25 @@ class Terminal(QTextEdit):
         else:
             # Execute other commands using QProcess
             self.process.setWorkingDirectory(self.current_dir)
-            if sys.platform == "win32":
-                self.process.start("cmd.exe", ["/c", command])
-            else:
-                self.process.start("/bin/bash", ["-c", command])
-            
+            self.process.start("cmd.exe", ["/c", command])
+        
     def onReadyReadStandardOutput(self):
         """Handle standard output from the process"""
-        output = self.process.readAllStandardOutput().data().decode('utf-8')
-        self.appendPlainText(output)
-        self.appendPlainText(self.prompt)
+        self.output.write('stdout', self.process.readAllStandardOutput().data())
         
     def onReadyReadStandardError(self):
         """Handle standard error from the process"""
-        error = self.process.readAllStandardError().data().decode('utf-8')
-        self.appendPlainText(error)
+        self.output.write('stderr', self.process.readAllStandardError().data())
+        
+    def onFinished(self, exit_code, exit_status):
+        """Flush remaining output and show the prompt again"""
+        self.output.finish('stdout', 'stderr')
         self.appendPlainText(self.prompt)
+        
+    def closeEvent(self, event):
+        """Shut down the shell session"""
+        self.restart_timer.stop()
+        if self.shell:
+            self.shell.exited.disconnect()
+            self.shell.close()
+        super().closeEvent(event)
@@ -0,0 +1,202 @@
+"""
+Warm interpreter server for PyIDE runs
+
+Started by the run engine with the interpreter scripts should run under:
+    python warm_server.py CONTROL_FD [MODULE ...]
+
+The server imports the given modules once, then forks a fresh child for
+every run request that arrives on the control socket, so runs skip the
+interpreter's startup and those imports. It only uses the standard
+library, since the interpreter it runs under may not have PyQt.
+
+Requests are JSON lines on a Unix stream socket, each sent together with
+the run's terminal as an attached file descriptor. The server answers
+with "ready", "started" and "exited" lines.
+"""
+
+import atexit
+import fcntl
+import json
+import os
+import runpy
+import selectors
+import signal
+import socket
+import sys
+import termios
+import threading
+import traceback
+
+# Bytes and file descriptors read from the control socket at once
+READ_SIZE = 64 * 1024
+MAX_FDS = 16
+
+def send(control, message):
+    """Send a message line to the run engine, ignoring a closed socket"""
+    try:
+        control.sendall(json.dumps(message).encode('utf-8') + b'\n')
+    except OSError:
+        pass
+
+def importModules(names):
+    """Import the modules to keep warm, reporting those that fail"""
+    for name in names:
+        try:
+            __import__(name)
+        except BaseException as e:
+            print(f"warm_server: cannot import {name}: {e}", file=sys.stderr)
+
+def exitCode(error):
+    """Return the exit code the interpreter would use for a SystemExit"""
+    code = error.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+def printException(path):
+    """Print the exception being handled from the script's frames on, as the interpreter would"""
+    error_type, error, tb = sys.exc_info()
+    script_tb = tb
+    # Leave out the frames of runpy and this server
+    while script_tb is not None and script_tb.tb_frame.f_code.co_filename != path:
+        script_tb = script_tb.tb_next
+    traceback.print_exception(error_type, error, script_tb or tb)
+
+def finishInterpreter(code):
+    """Join non-daemon threads and run atexit handlers, as an exiting interpreter does
+
+    Returns the exit code, which a SystemExit raised on the way replaces.
+    """
+    try:
+        threading._shutdown()
+        atexit._run_exitfuncs()
+    except SystemExit as e:
+        code = exitCode(e)
+    return code
+
+def runChild(request, tty_fd):
+    """Run a script in a forked child, with the terminal as its stdio; never returns"""
+    code = 1
+    try:
+        # Take the terminal as the controlling one, so Ctrl+C interrupts the script
+        os.setsid()
+        fcntl.ioctl(tty_fd, termios.TIOCSCTTY, 0)
+        for fd in (0, 1, 2):
+            os.dup2(tty_fd, fd)
+        if tty_fd > 2:
+            os.close(tty_fd)
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        # Streams as a fresh interpreter on a terminal would have them
+        sys.stdin = open(0, 'r', closefd=False)
+        sys.stdout = open(1, 'w', buffering=1, closefd=False)
+        sys.stderr = open(2, 'w', buffering=1, closefd=False)
+        os.environ.update(request.get("env", {}))
+        os.chdir(request["cwd"])
+        path = request["path"]
+        sys.argv = [path] + request.get("args", [])
+        sys.path[0] = os.path.dirname(os.path.abspath(path))
+        interrupted = False
+        try:
+            runpy.run_path(path, run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            code = exitCode(e)
+        except KeyboardInterrupt:
+            printException(path)
+            interrupted = True
+        except BaseException:
+            printException(path)
+            code = 1
+        try:
+            code = finishInterpreter(code)
+        except KeyboardInterrupt:
+            # Interrupted while waiting for the script's threads
+            interrupted = True
+        if interrupted:
+            # Exit the way an interrupted interpreter does, killed by SIGINT
+            sys.stdout.flush()
+            sys.stderr.flush()
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            os.kill(os.getpid(), signal.SIGINT)
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+def serve(control):
+    """Fork a child per run request and report when each exits"""
+    children = {}
+    buffer = b''
+    # Terminals received for requests whose line hasn't been read in full yet
+    terminals = []
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_write, False)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    signal.set_wakeup_fd(wakeup_write)
+    selector = selectors.DefaultSelector()
+    selector.register(control, selectors.EVENT_READ)
+    selector.register(wakeup_read, selectors.EVENT_READ)
+    send(control, {"event": "ready", "pid": os.getpid()})
+
+    while True:
+        for key, events in selector.select():
+            if key.fileobj == wakeup_read:
+                os.read(wakeup_read, 512)
+                continue
+            data, fds, flags, address = socket.recv_fds(control, READ_SIZE, MAX_FDS)
+            if not data:
+                # The run engine has gone away
+                return
+            terminals.extend(fds)
+            buffer += data
+            while b'\n' in buffer and terminals:
+                line, buffer = buffer.split(b'\n', 1)
+                request = json.loads(line)
+                tty_fd = terminals.pop(0)
+                pid = os.fork()
+                if pid == 0:
+                    selector.close()
+                    control.close()
+                    os.close(wakeup_read)
+                    os.close(wakeup_write)
+                    for fd in terminals:
+                        os.close(fd)
+                    runChild(request, tty_fd)
+                os.close(tty_fd)
+                children[pid] = request["id"]
+                send(control, {"event": "started", "id": request["id"], "pid": pid})
+
+        # Reap every child that has exited
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            run_id = children.pop(pid, None)
+            if run_id is not None:
+                send(control, {"event": "exited", "id": run_id, "code": os.waitstatus_to_exitcode(status)})
+
+def main():
+    """Import the warm modules and serve run requests"""
+    control = socket.socket(fileno=int(sys.argv[1]))
+    # Interrupts are meant for the runs, not the server
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Imports resolve from the working directory, as they would for a script run from it
+    sys.path[0] = os.getcwd()
+    importModules(sys.argv[2:])
+    # The engine's socket is the only thing keeping the server alive
+    sys.stdin.close()
+    serve(control)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+File operations panel for PyIDE
+"""
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTreeWidget,
+                             QTreeWidgetItem)
+from PyQt6.QtCore import Qt
+
+from ..project.file_operations import SCANNING, FAILED
+
+class FileOperationsPanel(QWidget):
+    """Lists queued and running file operations with their progress and speed"""
+    def __init__(self, operations, parent=None):
+        super().__init__(parent)
+        self.operations = operations
+        self.items = {}
+        operations.operationAdded.connect(self.onOperationAdded)
+        operations.operationChanged.connect(self.updateItem)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.tree = QTreeWidget()
+        self.tree.setRootIsDecorated(False)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setHeaderLabels(["Operation", "Progress", "Speed", "Status"])
+        self.tree.setColumnWidth(0, 320)
+        self.tree.itemSelectionChanged.connect(self.updateButtons)
+        layout.addWidget(self.tree)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancelSelected)
+        buttons.addWidget(self.cancel_button)
+        self.clear_button = QPushButton("Clear Finished")
+        self.clear_button.clicked.connect(self.clearFinished)
+        buttons.addWidget(self.clear_button)
+        layout.addLayout(buttons)
+        self.updateButtons()
+
+    def onOperationAdded(self, operation):
+        """Add a row for a new operation"""
+        item = QTreeWidgetItem([operation.description(), "", "", operation.state])
+        item.setData(0, Qt.ItemDataRole.UserRole, operation)
+        item.setToolTip(0, "\n".join(operation.sources))
+        self.tree.addTopLevelItem(item)
+        self.items[id(operation)] = item
+        self.updateButtons()
+
+    def updateItem(self, operation):
+        """Show an operation's latest progress"""
+        item = self.items.get(id(operation))
+        if item is None:
+            return
+        if operation.state == SCANNING:
+            item.setText(1, f"{operation.total_items} items found")
+        elif operation.total_items:
+            item.setText(1, f"{operation.fraction():.0%} ({operation.done_items}/{operation.total_items} items)")
+        else:
+            item.setText(1, "")
+        rate, unit = operation.throughput()
+        item.setText(2, f"{rate:.1f} {unit}" if unit else "")
+        if operation.state == FAILED:
+            item.setText(3, f"{FAILED}: {operation.error}")
+            item.setToolTip(3, operation.error)
+        else:
+            item.setText(3, operation.state)
+        self.updateButtons()
+
+    def selectedOperations(self):
+        """Return the operations of the selected rows"""
+        return [item.data(0, Qt.ItemDataRole.UserRole) for item in self.tree.selectedItems()]
+
+    def cancelSelected(self):
+        """Cancel the selected operations, or all unfinished ones if none are selected"""
+        operations = self.selectedOperations() or self.operations.operations
+        for operation in operations:
+            self.operations.cancel(operation)
+
+    def clearFinished(self):
+        """Remove the rows of operations that have stopped"""
+        for index in range(self.tree.topLevelItemCount() - 1, -1, -1):
+            operation = self.tree.topLevelItem(index).data(0, Qt.ItemDataRole.UserRole)
+            if operation.isFinished():
+                self.tree.takeTopLevelItem(index)
+                del self.items[id(operation)]
+        self.operations.clearFinished()
+        self.updateButtons()
+
+    def updateButtons(self):
+        """Enable the buttons that have something to act on"""
+        self.cancel_button.setEnabled(self.operations.isBusy())
+        self.clear_button.setEnabled(any(op.isFinished() for op in self.operations.operations))
@@ -2,32 +2,92 @@
 File system explorer component for PyIDE
 """
 
-import os
-import shutil
-from PyQt6.QtWidgets import QTreeView, QMenu, QMessageBox
-from PyQt6.QtCore import Qt, QDir, QFileSystemModel
+from PyQt6.QtWidgets import QTreeView, QMenu, QMessageBox, QAbstractItemView
+from PyQt6.QtCore import Qt, QDir, QTimer, QModelIndex
+
+from ..project.tree_model import ProjectTreeModel
+from ..project.file_operations import FileOperationQueue
 
 class FileSystemView(QTreeView):
     """File system tree view for exploring directories and files"""
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, operations=None):
         super().__init__(parent)
-        self.model = QFileSystemModel()
-        self.model.setRootPath(QDir.rootPath())
-        self.setModel(self.model)
-        self.setRootIndex(self.model.index(QDir.homePath()))
+        # The model is created once the view is first shown
+        self.model = None
+        self.root_path = QDir.homePath()
+        # Version control status of changed files, kept until the model exists
+        self.statuses = {}
+        # Deletes, moves and copies run in the background
+        self.operations = operations or FileOperationQueue(self)
+        self.operations.operationFinished.connect(self.onOperationFinished)
         self.setDragEnabled(True)
         self.setAcceptDrops(True)
         self.setDropIndicatorShown(True)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.DragDrop)
+        self.setDefaultDropAction(Qt.DropAction.MoveAction)
         self.setIndentation(20)
         self.setAnimated(True)
-        self.setSortingEnabled(True)
+        # The model keeps folders first and names in order itself
+        self.setUniformRowHeights(True)
         self.setEditTriggers(QTreeView.EditTrigger.NoEditTriggers)
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self.showContextMenu)
+        self.activated.connect(self.onActivated)
+        
+    def showEvent(self, event):
+        """Create the model after the window has painted"""
+        super().showEvent(event)
+        if self.model is None:
+            QTimer.singleShot(0, self.ensureModel)
+        
+    def ensureModel(self):
+        """Create the file system model on first use"""
+        if self.model is None:
+            self.model = ProjectTreeModel(self)
+            # Only the shown folder is listed, a directory at a time as it is expanded
+            self.model.setRootPath(self.root_path)
+            self.model.setStatuses(self.statuses)
+            self.model.filesDropped.connect(self.onFilesDropped)
+            self.setModel(self.model)
+        return self.model
         
-        # Hide unnecessary columns
-        for i in range(1, self.model.columnCount()):
-            self.hideColumn(i)
+    def setRootPath(self, path):
+        """Show a folder as the root of the tree"""
+        self.root_path = path
+        self.statuses = {}
+        if self.model is not None:
+            self.model.setRootPath(path)
+            self.setRootIndex(QModelIndex())
+    
+    def setStatuses(self, statuses):
+        """Colour changed files, given as a dict of absolute path to version control status"""
+        self.statuses = statuses
+        if self.model is not None:
+            self.model.setStatuses(statuses)
+    
+    def onActivated(self, index):
+        """Show the next page of a large folder when its "more items" row is activated"""
+        if self.model.isMoreRow(index):
+            self.model.showMore(index)
+    
+    def onFilesDropped(self, paths, target, copy):
+        """Queue a copy or move of files dropped on a folder"""
+        if copy:
+            self.operations.copy(paths, target)
+        else:
+            self.operations.move(paths, target)
+    
+    def onOperationFinished(self, operation):
+        """Relist the folders an operation changed, once, rather than per file"""
+        if self.model is not None:
+            self.model.refreshDirectories(operation.affectedDirectories())
+    
+    def shutdown(self):
+        """Stop listing and watching folders"""
+        if self.model is not None:
+            self.model.close()
+        if self.operations.parent() is self:
+            self.operations.shutdown()
     
     def showContextMenu(self, position):
         """Show context menu for the selected item"""
@@ -35,11 +95,11 @@ class FileSystemView(QTreeView):
         
         # Get the index at the position
         index = self.indexAt(position)
-        if index.isValid():
+        if index.isValid() and not self.model.isMoreRow(index):
             file_path = self.model.filePath(index)
             
             # Add actions based on the file type
-            if os.path.isdir(file_path):
+            if self.model.isDir(index):
                 menu.addAction("Open Folder", lambda: self.openFolder(file_path))
             else:
                 menu.addAction("Open File", lambda: self.openFile(file_path))
@@ -53,7 +113,7 @@ class FileSystemView(QTreeView):
     
     def openFolder(self, path):
         """Set the root of the tree view to the selected folder"""
-        self.setRootIndex(self.model.index(path))
+        self.setRootPath(path)
         
     def openFile(self, path):
         """Open the selected file in the editor"""
@@ -74,7 +134,4 @@ class FileSystemView(QTreeView):
         msg_box.setDefaultButton(QMessageBox.StandardButton.No)
         
         if msg_box.exec() == QMessageBox.StandardButton.Yes:
-            if os.path.isdir(file_path):
-                shutil.rmtree(file_path)
-            else:
-                os.remove(file_path)
+            self.operations.delete([file_path])
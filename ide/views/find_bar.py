@@ -0,0 +1,168 @@
+"""
+Find and replace bar for PyIDE
+"""
+
+import re
+from PyQt6.QtWidgets import QWidget, QGridLayout, QLineEdit, QCheckBox, QLabel, QPushButton
+from PyQt6.QtCore import Qt, QTimer
+
+from ..editors.buffer_search import BufferSearch, compileSearch
+
+# Milliseconds typing must pause before the query is searched
+QUERY_DELAY = 150
+
+class FindBar(QWidget):
+    """Bar below the editors that finds and replaces in the current editor"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search = BufferSearch(self)
+        self.search.countChanged.connect(self.onCountChanged)
+        self.editor = None
+        self.error = None
+
+        layout = QGridLayout(self)
+        layout.setContentsMargins(4, 2, 4, 2)
+
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Find")
+        self.query_edit.textChanged.connect(self.onQueryChanged)
+        self.query_edit.returnPressed.connect(self.findNext)
+        layout.addWidget(self.query_edit, 0, 0)
+        self.regex_check = QCheckBox("Regex")
+        self.regex_check.toggled.connect(self.updatePattern)
+        layout.addWidget(self.regex_check, 0, 1)
+        self.case_check = QCheckBox("Match Case")
+        self.case_check.toggled.connect(self.updatePattern)
+        layout.addWidget(self.case_check, 0, 2)
+        self.word_check = QCheckBox("Whole Word")
+        self.word_check.toggled.connect(self.updatePattern)
+        layout.addWidget(self.word_check, 0, 3)
+        previous_button = QPushButton("Previous")
+        previous_button.clicked.connect(self.findPrevious)
+        layout.addWidget(previous_button, 0, 4)
+        next_button = QPushButton("Next")
+        next_button.clicked.connect(self.findNext)
+        layout.addWidget(next_button, 0, 5)
+        self.count_label = QLabel()
+        layout.addWidget(self.count_label, 0, 6)
+
+        self.replace_edit = QLineEdit()
+        self.replace_edit.setPlaceholderText("Replace")
+        self.replace_edit.returnPressed.connect(self.replaceCurrent)
+        layout.addWidget(self.replace_edit, 1, 0)
+        self.replace_button = QPushButton("Replace")
+        self.replace_button.clicked.connect(self.replaceCurrent)
+        layout.addWidget(self.replace_button, 1, 4)
+        self.replace_all_button = QPushButton("Replace All")
+        self.replace_all_button.clicked.connect(self.replaceAll)
+        layout.addWidget(self.replace_all_button, 1, 5)
+        layout.setColumnStretch(0, 1)
+
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(QUERY_DELAY)
+        self.query_timer.timeout.connect(self.updatePattern)
+
+    def setEditor(self, editor):
+        """Search the given editor, or none"""
+        self.search.setEditor(editor if self.isVisible() else None)
+        self.editor = editor
+
+    def open(self, replace=False, text=""):
+        """Show the bar, optionally with the replace row, and focus the query"""
+        self.setReplaceVisible(replace)
+        self.show()
+        self.search.setEditor(self.editor)
+        if text:
+            self.query_edit.setText(text)
+            self.updatePattern()
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+
+    def setReplaceVisible(self, visible):
+        """Show or hide the replace row"""
+        for widget in (self.replace_edit, self.replace_button, self.replace_all_button):
+            widget.setVisible(visible)
+
+    def keyPressEvent(self, event):
+        """Close the bar on Escape"""
+        if event.key() == Qt.Key.Key_Escape:
+            self.closeBar()
+            return
+        super().keyPressEvent(event)
+
+    def closeBar(self):
+        """Hide the bar, remove its highlights and return focus to the editor"""
+        self.hide()
+        self.search.setEditor(None)
+        if self.editor is not None:
+            self.editor.setFocus()
+
+    def onQueryChanged(self):
+        """Search once typing pauses"""
+        self.query_timer.start()
+
+    def updatePattern(self):
+        """Search for the query with the current options"""
+        self.query_timer.stop()
+        query = self.query_edit.text()
+        self.error = None
+        if not query:
+            self.search.setPattern(None)
+            return
+        is_regex = self.regex_check.isChecked()
+        try:
+            pattern = compileSearch(query, is_regex, self.case_check.isChecked(), self.word_check.isChecked())
+        except re.error as e:
+            self.error = f"Invalid regex: {str(e)}"
+            self.search.setPattern(None)
+            return
+        self.search.setPattern(pattern, is_regex)
+
+    def onCountChanged(self, total, complete):
+        """Show how many matches there are"""
+        if self.error:
+            self.count_label.setText(self.error)
+        elif not self.query_edit.text():
+            self.count_label.setText("")
+        elif complete:
+            self.count_label.setText(f"{total} matches" if total != 1 else "1 match")
+        else:
+            self.count_label.setText(f"{total}+ matches")
+
+    def ensureSearched(self):
+        """Apply a query whose typing pause hasn't ended yet"""
+        if self.query_timer.isActive():
+            self.updatePattern()
+
+    def findNext(self):
+        """Select the next match"""
+        self.ensureSearched()
+        self.search.findNext()
+
+    def findPrevious(self):
+        """Select the previous match"""
+        self.ensureSearched()
+        self.search.findPrevious()
+
+    def replaceCurrent(self):
+        """Replace the selected match and move to the next"""
+        self.ensureSearched()
+        try:
+            self.search.replaceCurrent(self.replace_edit.text())
+        except re.error as e:
+            self.count_label.setText(f"Invalid replacement: {str(e)}")
+
+    def replaceAll(self):
+        """Replace every match in one undoable edit"""
+        self.ensureSearched()
+        try:
+            count = self.search.replaceAll(self.replace_edit.text())
+        except re.error as e:
+            self.count_label.setText(f"Invalid replacement: {str(e)}")
+            return
+        self.count_label.setText(f"Replaced {count}")
+
+    def shutdown(self):
+        """Cancel the running scan"""
+        self.search.shutdown()
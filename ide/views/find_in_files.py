@@ -0,0 +1,155 @@
+"""
+Find in files panel for PyIDE
+"""
+
+import os
+import re
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QCheckBox,
+                             QLabel, QTreeWidget, QTreeWidgetItem)
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from ..project.search import SearchRunner, walkProject, compileQuery
+
+# Hits shown before the search stops
+MAX_RESULTS = 10000
+
+class FindInFilesPanel(QWidget):
+    """Panel that searches the project and lists matching lines"""
+    # File path and 1-based line of a clicked hit
+    locationActivated = pyqtSignal(str, int)
+
+    def __init__(self, project_index, parent=None):
+        super().__init__(parent)
+        self.project_index = project_index
+        self.root = None
+        self.runner = None
+        self.file_items = {}
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        options = QHBoxLayout()
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Find in files")
+        self.query_edit.returnPressed.connect(self.startSearch)
+        options.addWidget(self.query_edit)
+        self.regex_check = QCheckBox("Regex")
+        options.addWidget(self.regex_check)
+        self.case_check = QCheckBox("Match Case")
+        options.addWidget(self.case_check)
+        layout.addLayout(options)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.results_tree = QTreeWidget()
+        self.results_tree.setHeaderHidden(True)
+        self.results_tree.setUniformRowHeights(True)
+        self.results_tree.itemActivated.connect(self.onItemActivated)
+        self.results_tree.itemClicked.connect(self.onItemActivated)
+        layout.addWidget(self.results_tree)
+
+    def setRoot(self, root):
+        """Set the folder that searches cover"""
+        self.root = root
+
+    def focusQuery(self, text=""):
+        """Focus the query box, optionally filling it in"""
+        if text:
+            self.query_edit.setText(text)
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+
+    def filesToSearch(self):
+        """Return the files to search, from the project index when it covers the root"""
+        index = self.project_index.index
+        if index is not None and index.root == self.root:
+            with index.lock:
+                rel_paths = list(index.ids)
+            return (os.path.join(self.root, rel_path) for rel_path in rel_paths)
+        return walkProject(self.root)
+
+    def startSearch(self):
+        """Cancel any running search and start a new one"""
+        self.cancelSearch()
+        self.results_tree.clear()
+        self.file_items = {}
+        query = self.query_edit.text()
+        if not query:
+            self.status_label.setText("Enter a search term")
+            return
+        if not self.root:
+            self.status_label.setText("Open a folder to search its files")
+            return
+        try:
+            # Workers compile the query again; an invalid one is reported here rather than lost there
+            compileQuery(query, self.regex_check.isChecked(), self.case_check.isChecked())
+        except re.error as e:
+            self.status_label.setText(f"Invalid regex: {str(e)}")
+            return
+
+        self.runner = SearchRunner(self.filesToSearch(), query, self.regex_check.isChecked(),
+                                   self.case_check.isChecked(), MAX_RESULTS, self)
+        self.runner.hitsFound.connect(self.onHitsFound)
+        self.runner.progress.connect(self.onProgress)
+        self.runner.finished.connect(self.onSearchFinished)
+        self.status_label.setText("Searching...")
+        self.runner.start()
+
+    def cancelSearch(self):
+        """Stop the running search; results it has not delivered are dropped"""
+        if self.runner is not None:
+            self.runner.hitsFound.disconnect()
+            self.runner.progress.disconnect()
+            self.runner.finished.disconnect()
+            self.runner.requestInterruption()
+            self.runner.finished.connect(self.runner.deleteLater)
+            self.runner = None
+
+    def onHitsFound(self, results):
+        """Add a batch of hits to the tree"""
+        self.results_tree.setUpdatesEnabled(False)
+        for path, hits in results:
+            file_item = self.file_items.get(path)
+            if file_item is None:
+                label = os.path.relpath(path, self.root) if self.root else path
+                file_item = QTreeWidgetItem([label])
+                file_item.setData(0, Qt.ItemDataRole.UserRole, (path, 1))
+                self.results_tree.addTopLevelItem(file_item)
+                file_item.setExpanded(True)
+                self.file_items[path] = file_item
+            file_item.addChildren([self.hitItem(path, hit) for hit in hits])
+        self.results_tree.setUpdatesEnabled(True)
+
+    def hitItem(self, path, hit):
+        """Create the tree item for one matching line"""
+        line, column, text = hit
+        item = QTreeWidgetItem([f"{line}: {text.strip()}"])
+        item.setData(0, Qt.ItemDataRole.UserRole, (path, line))
+        return item
+
+    def onProgress(self, searched, hits):
+        """Show how far the search has got"""
+        self.status_label.setText(f"{hits} results in {len(self.file_items)} files ({searched} searched)")
+
+    def onSearchFinished(self):
+        """Report the final result count"""
+        runner = self.runner
+        self.runner = None
+        runner.deleteLater()
+        text = f"{runner.total_hits} results in {len(self.file_items)} files"
+        if runner.total_hits >= MAX_RESULTS:
+            text += f" (stopped after {MAX_RESULTS})"
+        self.status_label.setText(text)
+
+    def onItemActivated(self, item, column=0):
+        """Open the file of a clicked hit at its line"""
+        path, line = item.data(0, Qt.ItemDataRole.UserRole)
+        self.locationActivated.emit(path, line)
+
+    def shutdown(self):
+        """Cancel the running search and wait for its thread"""
+        runner = self.runner
+        self.cancelSearch()
+        if runner is not None:
+            runner.wait()
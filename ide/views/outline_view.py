@@ -0,0 +1,162 @@
+"""
+Outline view component for PyIDE
+"""
+
+from PyQt6.QtWidgets import QTreeWidget, QTreeWidgetItem
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+
+from ..project.search import processPool, shutdownPool
+from ..project.symbol_index import extractSymbols
+
+# Milliseconds after the last edit before the outline is rebuilt
+OUTLINE_DELAY = 500
+# Documents longer than this are not outlined at all
+OUTLINE_MAX_CHARS = 2 * 1024 * 1024
+# Documents up to this size may be parsed on the GUI thread when no outline is current
+SYNC_PARSE_MAX_CHARS = 256 * 1024
+# Kinds shown in the outline; imports and locals are left out
+OUTLINE_KINDS = ('class', 'function', 'method', 'variable', 'attribute')
+
+class OutlineView(QTreeWidget):
+    """Tree of the classes, functions and assignments in the current Python editor"""
+    # 1-based line of a clicked symbol
+    lineActivated = pyqtSignal(int)
+    # Generation and future of a parse; emitted from the pool's callback thread
+    parseFinished = pyqtSignal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setHeaderHidden(True)
+        self.setUniformRowHeights(True)
+        self.editor = None
+        # Bumped on every edit, so parses of older text are dropped
+        self.generation = 0
+        self.future = None
+        # Symbols of the text at parsed_generation
+        self.symbols = None
+        self.parsed_generation = -1
+        self.parseFinished.connect(self.onParseFinished)
+        self.itemActivated.connect(self.onItemActivated)
+        self.itemClicked.connect(self.onItemActivated)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(OUTLINE_DELAY)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def setEditor(self, editor, file_path):
+        """Show the outline of an editor, or clear it if it isn't a Python file"""
+        if self.editor is not None:
+            try:
+                self.editor.textChanged.disconnect(self.onTextChanged)
+            except TypeError:
+                pass
+        self.editor = editor if editor is not None and file_path.endswith('.py') else None
+        self.refresh_timer.stop()
+        self.generation += 1
+        self.cancel()
+        self.symbols = None
+        self.clear()
+        if self.editor is not None:
+            self.editor.textChanged.connect(self.onTextChanged)
+            self.refresh()
+
+    def onTextChanged(self):
+        """Note an edit; the newest text is parsed once edits pause"""
+        self.generation += 1
+        self.cancel()
+        self.refresh_timer.start()
+
+    def cancel(self):
+        """Cancel a parse that hasn't started; a running one finishes and is ignored"""
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
+
+    def refresh(self):
+        """Parse the editor's current text in the worker pool"""
+        if self.editor is None or not self.isVisible() or self.parsed_generation == self.generation:
+            return
+        if self.editor.document().characterCount() > OUTLINE_MAX_CHARS:
+            self.clear()
+            return
+        self.cancel()
+        generation = self.generation
+        try:
+            self.future = processPool().submit(extractSymbols, self.editor.toPlainText())
+        except RuntimeError as e:
+            # The pool is shutting down or broken
+            print(f"Error parsing outline: {str(e)}")
+            shutdownPool()
+            return
+        self.future.add_done_callback(lambda done: self.parseFinished.emit(generation, done))
+
+    def onParseFinished(self, generation, future):
+        """Rebuild the tree from a parse unless the text has changed since"""
+        if generation != self.generation or future.cancelled():
+            return
+        self.future = None
+        try:
+            symbols = future.result()
+        except (SyntaxError, ValueError, RecursionError):
+            # Keep the last good outline while the code is being edited
+            return
+        except Exception as e:
+            from concurrent.futures.process import BrokenProcessPool
+            if isinstance(e, BrokenProcessPool):
+                shutdownPool()
+            print(f"Error parsing outline: {str(e)}")
+            return
+        self.symbols = symbols
+        self.parsed_generation = generation
+
+        self.setUpdatesEnabled(False)
+        self.clear()
+        # Qualified name to item, so members nest under their class or function
+        items = {}
+        for name, kind, line, column, container in symbols:
+            if kind not in OUTLINE_KINDS:
+                continue
+            parent = items.get(container)
+            if container and parent is None:
+                # Defined inside a function body that isn't shown
+                continue
+            item = QTreeWidgetItem([f"{name}  ({kind})" if kind in ('variable', 'attribute') else name])
+            item.setData(0, Qt.ItemDataRole.UserRole, line)
+            item.setToolTip(0, f"{kind} {name}, line {line}")
+            if parent is None:
+                self.addTopLevelItem(item)
+            else:
+                parent.addChild(item)
+            if kind in ('class', 'function', 'method'):
+                items[f"{container}.{name}" if container else name] = item
+        self.expandAll()
+        self.setUpdatesEnabled(True)
+
+    def currentSymbols(self, editor):
+        """Return the symbol rows of an editor's current text, or None if they aren't cheap to get
+
+        Uses the last outline parse when nothing has changed since; otherwise
+        only small documents are parsed here on the GUI thread.
+        """
+        if editor is self.editor and self.parsed_generation == self.generation:
+            return self.symbols
+        if editor.document().characterCount() > SYNC_PARSE_MAX_CHARS:
+            return None
+        try:
+            return extractSymbols(editor.toPlainText())
+        except (SyntaxError, ValueError, RecursionError):
+            return None
+
+    def shutdown(self):
+        """Stop parsing; a pending parse is cancelled"""
+        self.refresh_timer.stop()
+        self.cancel()
+
+    def showEvent(self, event):
+        """Catch up on edits made while the outline was hidden"""
+        super().showEvent(event)
+        self.refresh()
+
+    def onItemActivated(self, item, column=0):
+        """Move the editor to the clicked symbol"""
+        self.lineActivated.emit(item.data(0, Qt.ItemDataRole.UserRole))
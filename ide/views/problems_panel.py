@@ -0,0 +1,49 @@
+"""
+Problems panel for PyIDE
+"""
+
+import os
+from PyQt6.QtWidgets import QTreeWidget, QTreeWidgetItem
+from PyQt6.QtCore import Qt, pyqtSignal
+
+class ProblemsPanel(QTreeWidget):
+    """Lists the diagnostics of open files, grouped by file"""
+    # File path and 1-based line of an activated problem
+    locationActivated = pyqtSignal(str, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setHeaderHidden(True)
+        self.setUniformRowHeights(True)
+        self.file_items = {}
+        self.itemActivated.connect(self.onItemActivated)
+        self.itemClicked.connect(self.onItemActivated)
+
+    def setDiagnostics(self, file_path, diagnostics):
+        """Replace the problems listed for a file"""
+        item = self.file_items.pop(file_path, None)
+        if item is not None:
+            self.takeTopLevelItem(self.indexOfTopLevelItem(item))
+        if not diagnostics:
+            return
+
+        item = QTreeWidgetItem([f"{os.path.basename(file_path)} ({len(diagnostics)})"])
+        item.setToolTip(0, file_path)
+        item.setData(0, Qt.ItemDataRole.UserRole, (file_path, None))
+        for line, column, end_line, end_column, severity, message in diagnostics:
+            child = QTreeWidgetItem([f"{line}:{column + 1}  {severity}: {message}"])
+            child.setData(0, Qt.ItemDataRole.UserRole, (file_path, line))
+            item.addChild(child)
+        self.addTopLevelItem(item)
+        item.setExpanded(True)
+        self.file_items[file_path] = item
+
+    def problemCount(self):
+        """Return the number of problems listed"""
+        return sum(item.childCount() for item in self.file_items.values())
+
+    def onItemActivated(self, item, column=0):
+        """Jump to the line of a clicked problem"""
+        file_path, line = item.data(0, Qt.ItemDataRole.UserRole)
+        if line is not None:
+            self.locationActivated.emit(file_path, line)
@@ -0,0 +1,56 @@
+"""
+Quick open dialog for PyIDE
+"""
+
+import os
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PyQt6.QtCore import Qt, pyqtSignal
+
+class QuickOpenDialog(QDialog):
+    """Dialog that fuzzy-matches project file paths as the user types"""
+    fileSelected = pyqtSignal(str)
+
+    def __init__(self, project_index, parent=None):
+        super().__init__(parent)
+        self.project_index = project_index
+        self.setWindowTitle("Go to File")
+        self.resize(600, 400)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search files by name")
+        self.search_edit.textChanged.connect(self.updateResults)
+        self.search_edit.returnPressed.connect(self.openSelected)
+        layout.addWidget(self.search_edit)
+
+        self.results_list = QListWidget()
+        self.results_list.itemActivated.connect(self.openSelected)
+        layout.addWidget(self.results_list)
+
+    def updateResults(self, text):
+        """Show the best matches for the current query"""
+        self.results_list.clear()
+        root = self.project_index.index.root if self.project_index.index else ""
+        for score, path in self.project_index.query(text):
+            rel_dir = os.path.dirname(os.path.relpath(path, root))
+            item = QListWidgetItem(f"{os.path.basename(path)}    {rel_dir}")
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            item.setToolTip(path)
+            self.results_list.addItem(item)
+        if self.results_list.count():
+            self.results_list.setCurrentRow(0)
+
+    def keyPressEvent(self, event):
+        """Move through the results while typing in the search box"""
+        if event.key() in (Qt.Key.Key_Up, Qt.Key.Key_Down, Qt.Key.Key_PageUp, Qt.Key.Key_PageDown):
+            self.results_list.keyPressEvent(event)
+        else:
+            super().keyPressEvent(event)
+
+    def openSelected(self, *args):
+        """Open the selected match and close the dialog"""
+        item = self.results_list.currentItem()
+        if item:
+            self.fileSelected.emit(item.data(Qt.ItemDataRole.UserRole))
+            self.accept()
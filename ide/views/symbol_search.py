@@ -0,0 +1,70 @@
+"""
+Workspace symbol search dialog for PyIDE
+"""
+
+import os
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PyQt6.QtCore import Qt, pyqtSignal
+
+class SymbolSearchDialog(QDialog):
+    """Dialog that lists project symbols matching the typed name"""
+    # File path and 1-based line of the chosen symbol
+    locationSelected = pyqtSignal(str, int)
+
+    def __init__(self, symbol_index, parent=None):
+        super().__init__(parent)
+        self.symbol_index = symbol_index
+        self.setWindowTitle("Go to Symbol in Workspace")
+        self.resize(700, 400)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search symbols by name")
+        self.search_edit.textChanged.connect(self.updateResults)
+        self.search_edit.returnPressed.connect(self.openSelected)
+        layout.addWidget(self.search_edit)
+
+        self.results_list = QListWidget()
+        self.results_list.itemActivated.connect(self.openSelected)
+        layout.addWidget(self.results_list)
+
+    def showDefinitions(self, definitions):
+        """List a fixed set of (name, kind, path, line, column, container) rows"""
+        self.search_edit.blockSignals(True)
+        self.search_edit.setText(definitions[0][0] if definitions else "")
+        self.search_edit.blockSignals(False)
+        self.showRows(definitions)
+
+    def updateResults(self, text):
+        """Show the best matches for the current query"""
+        self.showRows(self.symbol_index.search(text))
+
+    def showRows(self, rows):
+        """Fill the list with symbol rows"""
+        self.results_list.clear()
+        root = self.symbol_index.root or ""
+        for name, kind, path, line, column, container in rows:
+            qualified = f"{container}.{name}" if container else name
+            location = f"{os.path.relpath(path, root) if root else path}:{line}"
+            item = QListWidgetItem(f"{qualified}  ({kind})    {location}")
+            item.setData(Qt.ItemDataRole.UserRole, (path, line))
+            item.setToolTip(path)
+            self.results_list.addItem(item)
+        if self.results_list.count():
+            self.results_list.setCurrentRow(0)
+
+    def keyPressEvent(self, event):
+        """Move through the results while typing in the search box"""
+        if event.key() in (Qt.Key.Key_Up, Qt.Key.Key_Down, Qt.Key.Key_PageUp, Qt.Key.Key_PageDown):
+            self.results_list.keyPressEvent(event)
+        else:
+            super().keyPressEvent(event)
+
+    def openSelected(self, *args):
+        """Open the selected symbol and close the dialog"""
+        item = self.results_list.currentItem()
+        if item:
+            path, line = item.data(Qt.ItemDataRole.UserRole)
+            self.locationSelected.emit(path, line)
+            self.accept()
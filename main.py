@@ -0,0 +1,93 @@
+"""
+PyIDE entry point
+"""
+
+import time
+
+START_TIME = time.perf_counter()
+
+import argparse
+import sys
+
+def parseArguments(argv):
+    """Parse the command line"""
+    parser = argparse.ArgumentParser(prog="pyide", description="A lightweight Python IDE")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report time to first paint, per-phase timings and import times, then exit")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record a performance trace and write it to FILE as Chrome trace JSON on exit")
+    parser.add_argument("--new-instance", action="store_true",
+                        help="start a new window instead of handing the files to a running one")
+    parser.add_argument("files", nargs="*", metavar="PATH[:LINE[:COLUMN]]",
+                        help="files to open, or a folder to open in the explorer")
+    return parser.parse_known_args(argv)
+
+def main(argv=None):
+    """Show the main window as early as possible and run the event loop"""
+    argv = sys.argv[1:] if argv is None else argv
+    args, qt_args = parseArguments(argv)
+    if args.profile_startup and "importtime" not in sys._xoptions:
+        # Import times are only reported by an interpreter started with -X importtime
+        from ide.startup import runWithImportTime
+        return runWithImportTime(__file__, argv)
+
+    # A running instance takes the files; checked before anything heavy is imported
+    from ide.instance import parseLocation, forwardRequest
+    locations = [parseLocation(argument) for argument in args.files]
+    single = not (args.new_instance or args.profile_startup or args.trace)
+    if single and forwardRequest(locations):
+        return 0
+
+    from PyQt6.QtWidgets import QApplication
+    profile = None
+    if args.profile_startup:
+        from ide.startup import StartupProfile
+        profile = StartupProfile(START_TIME)
+        profile.mark("import Qt")
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    app.setApplicationName("PyIDE")
+    if profile:
+        profile.mark("create application")
+
+    from ide.pyide import PyIDE
+    if profile:
+        profile.mark("import ide")
+
+    server = None
+    if single:
+        from ide.instance_server import InstanceServer
+        server = InstanceServer(parent=app)
+        # Another launch may have become the running instance since the check above
+        if not server.listen() and forwardRequest(locations):
+            return 0
+
+    window = PyIDE()
+    if profile:
+        profile.mark("build window")
+        profile.watch(window)
+        profile.finished.connect(app.quit)
+
+    if args.trace:
+        window.tracing_action.setChecked(True)
+
+    if server:
+        server.requestReceived.connect(window.onInstanceRequest)
+
+    window.show()
+    if profile:
+        profile.mark("show window")
+    window.openLocations(locations)
+    exit_code = app.exec()
+    if server:
+        server.close()
+    if profile:
+        # Shut down the shell and background threads the window started
+        window.close()
+    if args.trace:
+        window.exportTrace(args.trace)
+        print(f"Trace written to {args.trace}")
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
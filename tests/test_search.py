@@ -0,0 +1,52 @@
+"""
+Tests for the find-in-files literal prefilter
+"""
+
+import os
+import tempfile
+import unittest
+
+from ide.project.search import compileQuery, requiredLiteral, searchFile
+
+# Patterns whose escapes or classes once made the prefilter skip matching files
+PATTERNS = [
+    (r'\x41BC', "ABC"),
+    (r'\101BC', "ABC"),
+    (r'ABC', "ABC"),
+    (r'(a)\1bc', "aabc"),
+    (r'[\]xyz]q', "]q"),
+    (r'[]xyz]q', "]q"),
+    (r'[^]xyz]q', "aq"),
+    (r'ab{2}c', "abbc"),
+    (r'(?i)abc', "ABC"),
+    (r'abc|xyz', "xyz"),
+]
+# Escapes only str patterns accept; searches compile bytes patterns
+UNICODE_PATTERNS = [
+    (r'\u0041BC', "ABC"),
+    (r'\U00000041BC', "ABC"),
+    (r'\N{LATIN CAPITAL LETTER A}BC', "ABC"),
+]
+
+class RequiredLiteralTest(unittest.TestCase):
+    def testPlainText(self):
+        self.assertEqual(requiredLiteral(r'def \w+\(self'), b'(self')
+        self.assertEqual(requiredLiteral(r'import os'), b'import os')
+
+    def testLiteralIsInEveryMatch(self):
+        for pattern, text in PATTERNS + UNICODE_PATTERNS:
+            with self.subTest(pattern=pattern):
+                self.assertIn(requiredLiteral(pattern), text.encode('utf-8'))
+
+    def testSearchFileFindsMatches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sample.txt")
+            for pattern, text in PATTERNS:
+                with self.subTest(pattern=pattern):
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(f"before\n{text}\nafter\n")
+                    regex, literal = compileQuery(pattern, True, True)
+                    self.assertEqual([line for line, column, hit in searchFile(path, regex, literal)], [2])
+
+if __name__ == "__main__":
+    unittest.main()